@@ -0,0 +1,179 @@
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from jose import jwt, JWTError
+from passlib.context import CryptContext
+try:
+    from . import models, config, workers
+except ImportError:
+    import models, config, workers
+
+ALGORITHM = "HS256"
+
+# Legacy rows hold plaintext passwords; "plaintext" only matches those and is
+# marked deprecated, so a successful login hands back a bcrypt hash to store.
+# Hashes below the configured work factor (bulk imports) are upgraded the same way.
+pwd_context = CryptContext(
+    schemes=["bcrypt", "plaintext"],
+    deprecated=["plaintext"],
+    bcrypt__rounds=config.AUTH_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=config.AUTH_BCRYPT_ROUNDS,
+)
+
+# Bulk onboarding: full-cost bcrypt is ~0.25 s per password, far too slow for
+# thousands of rows. Imports store a cheap bcrypt hash that the first login
+# re-hashes at AUTH_BCRYPT_ROUNDS (see pwd_context.min_rounds above).
+import_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=config.AUTH_IMPORT_BCRYPT_ROUNDS)
+
+# bcrypt is deliberately slow; async endpoints run it here instead of on the event loop
+hash_pool = workers.BoundedPool("auth", config.AUTH_HASH_WORKERS, config.AUTH_HASH_QUEUE_DEPTH)
+
+
+class InsecureConfig(RuntimeError):
+    pass
+
+
+def check_config():
+    """Startup check: refuse the built-in secret / admin password outside dev mode."""
+    if config.AUTH_DEV_MODE:
+        return
+    problems = []
+    if not config.AUTH_SECRET_KEY or config.AUTH_SECRET_KEY == config.DEV_SECRET_KEY:
+        problems.append("AUTH_SECRET_KEY")
+    if not config.ADMIN_PASSWORD or config.ADMIN_PASSWORD == config.DEV_ADMIN_PASSWORD:
+        problems.append("ADMIN_PASSWORD")
+    if problems:
+        raise InsecureConfig(
+            f"Set {' and '.join(problems)} (or AUTH_DEV_MODE=1 for a local demo) before starting the API"
+        )
+
+
+def credentials_match(given: str, expected: str) -> bool:
+    # Bytes, so non-ASCII input is a failed match rather than a TypeError
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def hash_imported_passwords(passwords):
+    """Hashes a batch for a bulk import on the auth pool's threads (bcrypt releases the GIL)."""
+    return hash_pool.map(import_context.hash, passwords)
+
+
+def verify_password(password: str, stored: str):
+    """Returns (ok, new_hash). new_hash is set when the stored value should be upgraded."""
+    if not stored:
+        return False, None
+    return pwd_context.verify_and_update(password, stored)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Who a request is acting as. Snapshot of the student row, safe to share across threads."""
+    id: Optional[int]
+    role: str
+    name: str
+    room_number: Optional[str] = None
+
+
+ADMIN = Principal(id=None, role="admin", name="admin")
+
+
+def create_access_token(principal: Principal) -> str:
+    now = datetime.now(timezone.utc)
+    claims = {
+        "sub": "admin" if principal.role == "admin" else str(principal.id),
+        "role": principal.role,
+        "iat": now,
+        "exp": now + timedelta(minutes=config.AUTH_TOKEN_TTL_MINUTES),
+    }
+    return jwt.encode(claims, config.AUTH_SECRET_KEY, algorithm=ALGORITHM)
+
+
+# Tokens whose signature already checked out, so repeat requests skip the HMAC
+# and claims parsing. Expiry is still enforced on every hit.
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
+
+
+def decode_access_token(token: str):
+    """Claims of a valid, unexpired token, or None."""
+    now = time.time()
+    with _verified_lock:
+        claims = _verified.get(token)
+        if claims is not None:
+            if claims["exp"] > now:
+                _verified.move_to_end(token)
+                return claims
+            del _verified[token]
+
+    try:
+        claims = jwt.decode(token, config.AUTH_SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+    with _verified_lock:
+        _verified[token] = claims
+        while len(_verified) > config.AUTH_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return claims
+
+
+class PrincipalCache:
+    """Bounded LRU of student principals with a TTL per entry.
+
+    Hits cost a dict lookup; misses run one primary-key SELECT. Student writes
+    call `invalidate` so this worker never serves its own stale edits.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(1, max_size)
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db, student_id: int) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(student_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        row = db.query(models.Student.id, models.Student.name, models.Student.room_number)\
+            .filter(models.Student.id == student_id)\
+            .first()
+        if row is None:
+            return None
+
+        principal = Principal(id=row.id, role="student", name=row.name, room_number=row.room_number)
+        with self._lock:
+            self._entries[student_id] = (principal, now + self.ttl)
+            self._entries.move_to_end(student_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, student_id: int):
+        with self._lock:
+            self._entries.pop(student_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+principals = PrincipalCache(config.AUTH_CACHE_SIZE, config.AUTH_CACHE_TTL_SECONDS)
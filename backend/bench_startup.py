@@ -0,0 +1,81 @@
+"""Cold-start benchmark for the API.
+
+Every run is a fresh interpreter, so nothing is warm from the previous one:
+
+    import main     -> building the app (must not touch the database)
+    startup         -> lifespan: schema check, warm-up thread kicked off
+    first request   -> per path, including the lazy router import
+
+Usage:
+
+    python bench_startup.py                       # 5 runs, default paths
+    python bench_startup.py --runs 10 --path / --path /rooms/ --path /gate/logs
+    EAGER_ROUTERS=1 python bench_startup.py       # compare with eager router imports
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_PATHS = ["/", "/rooms/", "/students/", "/marketplace/items"]
+
+# Runs inside the child interpreter; prints one JSON line of timings in ms
+_CHILD = r"""
+import json, sys, time
+paths = json.loads(sys.argv[1])
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+timings = {"import": (t1 - t0) * 1000}
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    timings["startup"] = (t2 - t1) * 1000
+    for path in paths:
+        start = time.perf_counter()
+        status = client.get(path).status_code
+        timings[path] = (time.perf_counter() - start) * 1000
+        timings[path + " status"] = status
+        start = time.perf_counter()
+        client.get(path)
+        timings[path + " (warm)"] = (time.perf_counter() - start) * 1000
+print(json.dumps(timings))
+"""
+
+
+def run_once(paths):
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, json.dumps(paths)],
+        cwd=here, capture_output=True, text=True, check=True,
+        # Local benchmark: the demo secrets are fine here (see auth.check_config)
+        env={"AUTH_DEV_MODE": "1", **os.environ},
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import, startup and first-request latency.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", action="append", dest="paths", help="GET path to time (repeatable)")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    results = [run_once(paths) for _ in range(args.runs)]
+
+    print(f"{'step':<32}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for key in results[0]:
+        if key.endswith(" status"):
+            continue
+        values = [r[key] for r in results]
+        label = key if key in ("import", "startup") else f"GET {key}"
+        print(f"{label:<32}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+    failed = {k[:-len(" status")]: v for k, v in results[0].items() if k.endswith(" status") and v >= 500}
+    if failed:
+        print(f"server errors: {failed}")
+
+
+if __name__ == "__main__":
+    main()
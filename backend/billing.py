@@ -0,0 +1,213 @@
+import hashlib
+import re
+from datetime import date, datetime, time
+from sqlalchemy import select, insert, update, delete, func, and_, or_
+from sqlalchemy.orm import Session
+try:
+    from . import models, energy, config
+except ImportError:
+    import models, energy, config
+
+# Monthly billing run. One SELECT computes every resident's inputs for the
+# month: the flat rent, their share of the room's electricity (monthly rollup
+# split evenly across the room's residents that month) and the month's
+# discipline penalties. Each bill is stored in monthly_bills together with a
+# hash of those inputs, so running the same month again only touches students
+# whose inputs changed: new bills are inserted, changed ones rewritten, the rest
+# left alone. Who is billable comes from the move-in/move-out dates against the
+# month, not today's is_active flag, so re-running a past month bills the same
+# people. Students no longer billable for it lose their bill if still unpaid.
+#
+# Only unpaid bills are ever rewritten or removed. A paid bill is settled, and a
+# late one has already been chased at its amount, so both stay as they are and
+# are reported as locked for the warden to adjust by hand.
+
+MONTH_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+# Payment statuses a re-run may still rewrite or remove
+REWRITABLE = ("unpaid",)
+
+
+def month_bounds(month: str):
+    """'2024-09' -> (date(2024, 9, 1), date(2024, 10, 1)). ValueError if malformed."""
+    if not MONTH_RE.match(month or ""):
+        raise ValueError("Month must be YYYY-MM")
+    year, mon = map(int, month.split("-"))
+    start = date(year, mon, 1)
+    end = date(year + 1, 1, 1) if mon == 12 else date(year, mon + 1, 1)
+    return start, end
+
+
+def inputs_query(month: str):
+    start, end = month_bounds(month)
+    student = models.Student
+    discipline = models.DisciplineLog
+    rollup = models.ElectricityMonthlyRollup
+
+    billable = select(
+        student.id.label("student_id"),
+        student.room_number,
+        func.count().over(partition_by=student.room_number).label("occupants"),
+    ).where(
+        or_(student.move_in_date == None, student.move_in_date < end),
+        or_(student.move_out_date == None, student.move_out_date >= start),
+    ).subquery()
+
+    penalties = select(
+        discipline.student_id,
+        func.sum(discipline.penalty_amount).label("penalty"),
+    ).where(
+        discipline.incident_date >= datetime.combine(start, time.min),
+        discipline.incident_date < datetime.combine(end, time.min),
+    ).group_by(discipline.student_id).subquery()
+
+    return select(
+        billable.c.student_id,
+        billable.c.room_number,
+        billable.c.occupants,
+        func.coalesce(rollup.units_kwh, 0.0).label("room_units"),
+        func.coalesce(penalties.c.penalty, 0.0).label("penalty"),
+    ).outerjoin(
+        rollup, and_(rollup.room_number == billable.c.room_number, rollup.month == month)
+    ).outerjoin(
+        penalties, penalties.c.student_id == billable.c.student_id
+    )
+
+
+def _bill(row, month: str):
+    share = (row.room_units or 0.0) / row.occupants if row.occupants else 0.0
+    rent = round(config.MONTHLY_RENT, 2)
+    energy_amount = energy.bill(share)
+    penalty = round(row.penalty or 0.0, 2)
+    bill = {
+        "student_id": row.student_id,
+        "month": month,
+        "room_number": row.room_number,
+        "occupants": row.occupants,
+        "rent_amount": rent,
+        "energy_units": round(share, 3),
+        "energy_amount": energy_amount,
+        "penalty_amount": penalty,
+        "total": round(rent + energy_amount + penalty, 2),
+    }
+    key = "|".join(str(bill[k]) for k in ("room_number", "occupants", "rent_amount", "energy_units", "penalty_amount"))
+    bill["inputs_hash"] = hashlib.sha1(key.encode()).hexdigest()
+    return bill
+
+
+def _notes(bill) -> str:
+    return (f"Rent {bill['rent_amount']:.2f} + electricity {bill['energy_units']:.2f} kWh "
+            f"({bill['energy_amount']:.2f}) + penalties {bill['penalty_amount']:.2f}")
+
+
+def run(db: Session, month: str):
+    """Generates or refreshes the month's bills in one transaction. Returns counts."""
+    computed = [_bill(row, month) for row in db.execute(inputs_query(month))]
+
+    existing = {
+        row.student_id: row for row in db.query(
+            models.MonthlyBill.student_id, models.MonthlyBill.inputs_hash,
+            models.MonthlyBill.rent_payment_id, models.RentPayment.status
+        ).outerjoin(models.RentPayment, models.RentPayment.id == models.MonthlyBill.rent_payment_id)
+        .filter(models.MonthlyBill.month == month)
+    }
+    # Payments recorded by hand for this month (not by a billing run) are left to the warden
+    manual = {
+        student_id for (student_id,) in db.query(models.RentPayment.student_id)
+        .outerjoin(models.MonthlyBill, models.MonthlyBill.rent_payment_id == models.RentPayment.id)
+        .filter(models.RentPayment.month == month, models.MonthlyBill.student_id == None)
+    }
+
+    now = datetime.now()
+    new, changed, orphaned = [], [], []
+    counts = {"month": month, "students": len(computed), "created": 0, "updated": 0,
+              "unchanged": 0, "removed": 0, "paid_locked": 0, "late_locked": 0, "manual_skipped": 0}
+
+    def lock(current):
+        counts["paid_locked" if current.status == "paid" else "late_locked"] += 1
+
+    for bill in computed:
+        bill["generated_at"] = now
+        current = existing.pop(bill["student_id"], None)
+        if current is None or current.status is None:
+            # No bill yet, or a bill whose payment row is gone: bill it (again)
+            if bill["student_id"] in manual:
+                counts["manual_skipped"] += 1
+            else:
+                (new if current is None else orphaned).append(bill)
+        elif current.inputs_hash == bill["inputs_hash"]:
+            counts["unchanged"] += 1
+        elif current.status not in REWRITABLE:
+            lock(current)
+        else:
+            bill["rent_payment_id"] = current.rent_payment_id
+            changed.append(bill)
+
+    # What's left in `existing` was billed before but isn't billable any more
+    stale = []
+    for current in existing.values():
+        if current.status in REWRITABLE or current.status is None:
+            stale.append(current)
+        else:
+            lock(current)
+
+    if new or orphaned:
+        payment_ids = db.execute(
+            insert(models.RentPayment).returning(models.RentPayment.id, sort_by_parameter_order=True),
+            [{"student_id": b["student_id"], "amount": b["total"], "month": month,
+              "status": "unpaid", "notes": _notes(b)} for b in new + orphaned]
+        ).scalars().all()
+        for bill, payment_id in zip(new + orphaned, payment_ids):
+            bill["rent_payment_id"] = payment_id
+        if new:
+            db.execute(insert(models.MonthlyBill), new)
+        if orphaned:
+            db.execute(update(models.MonthlyBill), orphaned)
+        counts["created"] = len(new) + len(orphaned)
+
+    if changed:
+        # Bulk UPDATE by primary key: one executemany per table
+        db.execute(update(models.RentPayment), [
+            {"id": b["rent_payment_id"], "amount": b["total"], "notes": _notes(b)} for b in changed
+        ])
+        db.execute(update(models.MonthlyBill), changed)
+        counts["updated"] = len(changed)
+
+    if stale:
+        db.execute(delete(models.MonthlyBill).where(
+            models.MonthlyBill.month == month,
+            models.MonthlyBill.student_id.in_([b.student_id for b in stale])
+        ))
+        db.execute(delete(models.RentPayment).where(
+            models.RentPayment.id.in_([b.rent_payment_id for b in stale if b.rent_payment_id is not None]),
+            models.RentPayment.status.in_(REWRITABLE)
+        ))
+        counts["removed"] = len(stale)
+
+    db.commit()
+    return counts
+
+
+def summary(db: Session, month: str):
+    month_bounds(month)
+    bill = models.MonthlyBill
+    payment = models.RentPayment
+    row = db.query(
+        func.count(bill.student_id),
+        func.coalesce(func.sum(bill.rent_amount), 0.0),
+        func.coalesce(func.sum(bill.energy_amount), 0.0),
+        func.coalesce(func.sum(bill.penalty_amount), 0.0),
+        func.coalesce(func.sum(bill.total), 0.0),
+        func.coalesce(func.sum(payment.amount).filter(payment.status == "paid"), 0.0),
+        func.max(bill.generated_at),
+    ).outerjoin(payment, payment.id == bill.rent_payment_id).filter(bill.month == month).one()
+    return {
+        "month": month,
+        "bills": row[0],
+        "rent": round(row[1], 2),
+        "energy": round(row[2], 2),
+        "penalties": round(row[3], 2),
+        "total": round(row[4], 2),
+        "collected": round(row[5], 2),
+        "generated_at": row[6],
+    }
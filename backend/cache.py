@@ -0,0 +1,302 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import parse_qsl, urlencode
+from sqlalchemy import event
+try:
+    import fcntl
+except ImportError:  # Windows: the file store still works, but only within one process
+    fcntl = None
+try:
+    from . import database, config
+except ImportError:
+    import database, config
+
+# Response cache for read-heavy GET endpoints.
+#
+# Every table has a version counter. Writes bump the counters of the tables they
+# touched once their transaction commits (session hooks below), and a cached
+# response is only reused while the counters of the tables it was built from are
+# unchanged. The ETag is derived from those counters, so a client's
+# If-None-Match is answered with 304 before the endpoint (or the database) runs.
+
+# path -> (tables it reads, whether the answer also depends on today's date)
+CACHED_ROUTES = {
+    "/rooms/": (("rooms",), False),
+    "/rent/pending": (("rent_payments",), False),
+    "/complaints/": (("complaints",), False),
+    "/monitoring/admin-stats": (("electricity_daily_rollups", "electricity_monthly_rollups"), True),
+    "/marketplace/items": (("marketplace_items", "students"), False),
+}
+
+
+class MemoryVersions:
+    """Per-process counters. Only correct with a single worker and no outside writers."""
+
+    def __init__(self):
+        self.epoch = os.urandom(8).hex()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, tables):
+        return tuple(self._versions.get(t, 0) for t in tables)
+
+    def bump(self, tables):
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+
+class FileVersions:
+    """Counters in a small shared file, mmap'd by every worker and script.
+
+    Tables hash onto SLOTS 8-byte counters (a collision only costs an extra miss).
+    Bumps take an exclusive flock; reads are plain loads from the shared mapping.
+    The header holds a random epoch written when the file is created, so ETags
+    from before a reset can never match the restarted counters.
+    """
+
+    MAGIC = b"HOSTVER1"
+    SLOTS = 256
+    HEADER = 16
+    SIZE = HEADER + SLOTS * 8
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._flock(True)
+        try:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            if os.read(self._fd, 8) != self.MAGIC or os.fstat(self._fd).st_size < self.SIZE:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self.SIZE)
+                os.pwrite(self._fd, self.MAGIC + os.urandom(8), 0)
+            self._map = mmap.mmap(self._fd, self.SIZE)
+        finally:
+            self._flock(False)
+        self.epoch = self._map[8:16].hex()
+
+    def _flock(self, exclusive: bool):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_UN)
+
+    def _offset(self, table: str) -> int:
+        return self.HEADER + (zlib.crc32(table.encode()) % self.SLOTS) * 8
+
+    def get(self, tables):
+        return tuple(struct.unpack_from("<Q", self._map, self._offset(t))[0] for t in tables)
+
+    def bump(self, tables):
+        offsets = {self._offset(t) for t in tables}
+        with self._lock:
+            self._flock(True)
+            try:
+                for offset in offsets:
+                    value = struct.unpack_from("<Q", self._map, offset)[0]
+                    struct.pack_into("<Q", self._map, offset, value + 1)
+            finally:
+                self._flock(False)
+
+
+def _make_versions():
+    if config.CACHE_BACKEND == "file":
+        return FileVersions(config.CACHE_VERSION_FILE)
+    return MemoryVersions()
+
+
+versions = _make_versions()
+
+
+def bump(*tables: str):
+    """Explicit bump for writes the session hooks can't see (engine connections, raw SQL, scripts)."""
+    versions.bump(tables)
+
+
+def bump_all():
+    try:
+        from . import models
+    except ImportError:
+        import models
+    versions.bump([t.name for t in models.Base.metadata.sorted_tables])
+
+
+# --- Invalidation: collect the tables a write session touched, bump after commit ---
+
+_DIRTY = "cache_dirty_tables"
+
+
+def _dirty(session) -> set:
+    return session.info.setdefault(_DIRTY, set())
+
+
+@event.listens_for(database.SessionLocal, "after_flush")
+def _collect_flushed(session, flush_context):
+    tables = _dirty(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tables.add(obj.__table__.name)
+
+
+@event.listens_for(database.SessionLocal, "do_orm_execute")
+def _collect_executed(orm_execute_state):
+    # Core-style insert()/update()/delete() run through the session (bulk paths)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _dirty(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(database.SessionLocal, "after_commit")
+def _bump_committed(session):
+    tables = session.info.pop(_DIRTY, None)
+    if tables:
+        versions.bump(tables)
+
+
+@event.listens_for(database.SessionLocal, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_DIRTY, None)
+
+
+# --- Response store ---
+
+class ResponseCache:
+    """Size-bounded LRU of response bodies with a TTL per entry.
+
+    An entry is served only while its ETag equals the current one (no tracked
+    write since) and it is younger than the TTL, which bounds staleness from
+    writes the hooks can't see.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_body_bytes: int):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self.max_body_bytes = max_body_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: str, etag: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == etag and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2], entry[3]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, etag: str, media_type: bytes, body: bytes):
+        if len(body) > self.max_body_bytes:
+            return
+        with self._lock:
+            self._entries[key] = (etag, time.monotonic() + self.ttl, media_type, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries), "max_entries": self.max_entries, "ttl_seconds": self.ttl,
+            "hits": self.hits, "misses": self.misses, "not_modified": self.not_modified,
+            "backend": type(versions).__name__,
+        }
+
+
+responses = ResponseCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS, config.CACHE_MAX_BODY_BYTES)
+
+
+def cache_key(path: str, query_string: bytes) -> str:
+    # Parameter order doesn't matter: ?limit=10&cursor=x and ?cursor=x&limit=10 share an entry
+    params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def etag_for(key: str, tables, daily: bool) -> str:
+    parts = [versions.epoch, key, ",".join(map(str, versions.get(tables)))]
+    if daily:
+        parts.append(date.today().isoformat())
+    return '"' + hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    if isinstance(if_none_match, bytes):
+        if_none_match = if_none_match.decode("latin-1")
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving CACHED_ROUTES from `responses`, with ETag / 304.
+
+    Sits inside CORS so cached bodies still get per-request CORS headers. Only
+    routes whose answer is the same for every caller belong in CACHED_ROUTES.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        route = CACHED_ROUTES.get(scope.get("path")) if scope["type"] == "http" else None
+        if route is None or scope["method"] != "GET" or not config.CACHE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        tables, daily = route
+        key = cache_key(scope["path"], scope.get("query_string", b""))
+        # Versions are read before the endpoint runs, so the body is never older than its ETag
+        etag = etag_for(key, tables, daily)
+        headers = dict(scope["headers"])
+
+        if b"if-none-match" in headers and etag_matches(headers[b"if-none-match"], etag):
+            responses.not_modified += 1
+            await self._send(send, 304, etag, None, b"", "REVALIDATED")
+            return
+
+        cached = responses.get(key, etag)
+        if cached is not None:
+            media_type, body = cached
+            await self._send(send, 200, etag, media_type, body, "HIT")
+            return
+
+        state = {"status": None, "media_type": None, "chunks": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        state["media_type"] = value
+                if message["status"] == 200:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"etag", etag.encode()), (b"cache-control", b"no-cache"), (b"x-cache", b"MISS")
+                    ]
+            elif message["type"] == "http.response.body" and state["status"] == 200:
+                state["chunks"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    responses.put(key, etag, state["media_type"], b"".join(state["chunks"]))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+    @staticmethod
+    async def _send(send, status, etag, media_type, body, outcome):
+        headers = [(b"etag", etag.encode()), (b"cache-control", b"no-cache"), (b"x-cache", outcome.encode())]
+        if status == 200:
+            headers += [(b"content-type", media_type or b"application/json"), (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,147 @@
+import os
+
+# Runtime knobs, overridable per deployment through environment variables.
+
+def _int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def _float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+# Mess kiosks: recognition runs on a bounded worker pool so the event loop stays free.
+# MESS_WORKERS threads do the work, MESS_QUEUE_DEPTH more requests may wait for a slot,
+# anything beyond that gets a 503 so kiosks retry instead of piling up.
+MESS_WORKERS = _int("MESS_WORKERS", 4)
+MESS_QUEUE_DEPTH = _int("MESS_QUEUE_DEPTH", 32)
+
+# Face matching: cosine similarity a probe must reach against the best enrolled
+# embedding before a meal is authorized.
+FACE_MATCH_THRESHOLD = _float("FACE_MATCH_THRESHOLD", 0.92)
+FACE_TOP_K = _int("FACE_TOP_K", 3)
+
+# Attendance check-ins arriving within this window are written in one transaction.
+ATTENDANCE_BATCH_MAX = _int("ATTENDANCE_BATCH_MAX", 256)
+ATTENDANCE_BATCH_WINDOW_MS = _int("ATTENDANCE_BATCH_WINDOW_MS", 20)
+
+# How often (at most) a worker checks the settings version row for changes made
+# by other workers. Its own writes are visible immediately.
+SETTINGS_REFRESH_SECONDS = _float("SETTINGS_REFRESH_SECONDS", 2.0)
+
+# Live event stream: events buffered per connection before a slow client is told to resync.
+EVENT_QUEUE_SIZE = _int("EVENT_QUEUE_SIZE", 256)
+EVENT_HEARTBEAT_SECONDS = _float("EVENT_HEARTBEAT_SECONDS", 15.0)
+
+# Flat electricity tariff in rupees per kWh
+ENERGY_RATE_PER_UNIT = _float("ENERGY_RATE_PER_UNIT", 10.0)
+
+# Monthly billing run (see billing.py): flat rent per student, plus their share
+# of the room's electricity and the month's discipline penalties
+MONTHLY_RENT = _float("MONTHLY_RENT", 5000.0)
+
+# Meter ingestion: buffered readings are flushed every INGEST_FLUSH_MS or every
+# INGEST_FLUSH_ROWS rows, whichever comes first. Past INGEST_QUEUE_MAX buffered
+# rows the endpoint answers 503 so meters back off.
+INGEST_FLUSH_MS = _int("INGEST_FLUSH_MS", 250)
+INGEST_FLUSH_ROWS = _int("INGEST_FLUSH_ROWS", 5000)
+INGEST_QUEUE_MAX = _int("INGEST_QUEUE_MAX", 200000)
+# A failed flush is retried INGEST_RETRY_ATTEMPTS times (backoff doubling from
+# INGEST_RETRY_BACKOFF_MS), then spilled to INGEST_SPILL_DIR and replayed later:
+# accepted readings are never dropped.
+INGEST_RETRY_ATTEMPTS = _int("INGEST_RETRY_ATTEMPTS", 5)
+INGEST_RETRY_BACKOFF_MS = _int("INGEST_RETRY_BACKOFF_MS", 100)
+INGEST_SPILL_DIR = os.getenv("INGEST_SPILL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ingest_spill"))
+
+# Gate scans for the same student serialize on one of this many in-process locks
+GATE_LOCK_STRIPES = _int("GATE_LOCK_STRIPES", 64)
+
+# Retention: rows older than the cutoff are moved out of SQLite into gzip NDJSON
+# files under ARCHIVE_DIR/<table>/<YYYY-MM>.ndjson.gz, ARCHIVE_BATCH_ROWS per transaction.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+ARCHIVE_BATCH_ROWS = _int("ARCHIVE_BATCH_ROWS", 2000)
+
+# Auth: HS256 access tokens signed with AUTH_SECRET_KEY; every worker must share
+# it so tokens verify anywhere. The built-in secret and admin/admin login are for
+# local demos only: the app refuses to start with them unless AUTH_DEV_MODE=1.
+AUTH_DEV_MODE = _int("AUTH_DEV_MODE", 0) == 1
+DEV_SECRET_KEY = "hostel-os-dev-secret-change-me"
+DEV_ADMIN_PASSWORD = "admin"
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY", DEV_SECRET_KEY)
+AUTH_TOKEN_TTL_MINUTES = _int("AUTH_TOKEN_TTL_MINUTES", 12 * 60)
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", DEV_ADMIN_PASSWORD)
+# Older clients sent an unsigned X-Student-ID header instead of a token. Anyone
+# can forge it, so it is ignored unless explicitly re-enabled.
+AUTH_ALLOW_LEGACY_HEADER = _int("AUTH_ALLOW_LEGACY_HEADER", 0) == 1
+
+# Principals resolved from tokens are cached per worker; an entry lives at most
+# AUTH_CACHE_TTL_SECONDS, so edits made through another worker show up within that.
+AUTH_CACHE_SIZE = _int("AUTH_CACHE_SIZE", 10000)
+AUTH_CACHE_TTL_SECONDS = _float("AUTH_CACHE_TTL_SECONDS", 60.0)
+
+# bcrypt work factor and the pool that runs it, off the event loop
+AUTH_BCRYPT_ROUNDS = _int("AUTH_BCRYPT_ROUNDS", 12)
+AUTH_HASH_WORKERS = _int("AUTH_HASH_WORKERS", 2)
+AUTH_HASH_QUEUE_DEPTH = _int("AUTH_HASH_QUEUE_DEPTH", 64)
+# Work factor for passwords set by bulk imports, upgraded at first login
+AUTH_IMPORT_BCRYPT_ROUNDS = _int("AUTH_IMPORT_BCRYPT_ROUNDS", 4)
+
+# SQLite engine profile. WAL lets readers run alongside the single writer;
+# write transactions start with BEGIN IMMEDIATE so two writers queue on
+# busy_timeout instead of failing with "database is locked" on lock upgrade.
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "hostel.db"))
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL") # NORMAL is durable enough under WAL
+DB_CACHE_SIZE_KB = _int("DB_CACHE_SIZE_KB", 64 * 1024) # page cache per connection
+DB_MMAP_SIZE = _int("DB_MMAP_SIZE", 256 * 1024 * 1024)
+DB_BUSY_TIMEOUT_MS = _int("DB_BUSY_TIMEOUT_MS", 10000)
+DB_READ_POOL_SIZE = _int("DB_READ_POOL_SIZE", 8)
+DB_READ_POOL_OVERFLOW = _int("DB_READ_POOL_OVERFLOW", 8)
+# SQLite has one writer at a time; a few connections just keep writers queued in the pool
+DB_WRITE_POOL_SIZE = _int("DB_WRITE_POOL_SIZE", 2)
+DB_WRITE_POOL_OVERFLOW = _int("DB_WRITE_POOL_OVERFLOW", 2)
+DB_POOL_TIMEOUT_SECONDS = _float("DB_POOL_TIMEOUT_SECONDS", 30.0)
+
+# Apply pending schema migrations at startup (1) or refuse to start until
+# `python migrations.py` has been run (0).
+AUTO_MIGRATE = _int("AUTO_MIGRATE", 1) == 1
+
+# Startup: routers are imported on their first request unless EAGER_ROUTERS=1
+# (e.g. to fail fast on a broken import at deploy time). STARTUP_WARMUP loads
+# the face index and reconciles room occupancy in a background thread.
+EAGER_ROUTERS = _int("EAGER_ROUTERS", 0) == 1
+STARTUP_WARMUP = _int("STARTUP_WARMUP", 1) == 1
+
+# Response cache for the read-heavy GET endpoints (see cache.py). Entries are
+# dropped as soon as a write touches one of their tables; the TTL only bounds
+# staleness from writes made outside the app's sessions. CACHE_BACKEND=file
+# keeps the table version counters in a shared mmap'd file so every worker
+# (and scripts like generate_data.py) agree; "memory" is per process.
+CACHE_ENABLED = _int("CACHE_ENABLED", 1) == 1
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+CACHE_VERSION_FILE = os.getenv("CACHE_VERSION_FILE", DATABASE_PATH + ".versions")
+CACHE_MAX_ENTRIES = _int("CACHE_MAX_ENTRIES", 512)
+CACHE_TTL_SECONDS = _float("CACHE_TTL_SECONDS", 60.0)
+CACHE_MAX_BODY_BYTES = _int("CACHE_MAX_BODY_BYTES", 1024 * 1024)
+
+# Streaming exports (see export.py): rows fetched and encoded per chunk
+EXPORT_CHUNK_ROWS = _int("EXPORT_CHUNK_ROWS", 2000)
+
+# Bulk onboarding imports (see onboarding.py): rows validated and inserted per
+# transaction, and how many per-row errors a response lists
+IMPORT_BATCH_ROWS = _int("IMPORT_BATCH_ROWS", 1000)
+IMPORT_MAX_ERRORS = _int("IMPORT_MAX_ERRORS", 1000)
+
+# Bank statement reconciliation (see reconciliation.py): matched payments are
+# marked paid, and unmatched lines queued for review, RECONCILE_BATCH_ROWS per transaction
+RECONCILE_BATCH_ROWS = _int("RECONCILE_BATCH_ROWS", 500)
+
+# /dashboard/summary is cached per viewer for this long (and dropped sooner
+# when a table it counts is written)
+DASHBOARD_CACHE_SECONDS = _float("DASHBOARD_CACHE_SECONDS", 15.0)
+DASHBOARD_CACHE_SIZE = _int("DASHBOARD_CACHE_SIZE", 2048)
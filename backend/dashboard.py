@@ -0,0 +1,134 @@
+import asyncio
+from datetime import date, timedelta
+from sqlalchemy import func, case
+from starlette.concurrency import run_in_threadpool
+try:
+    from . import models, database, energy, cache, config
+    from .reconciliation import OPEN_STATUSES
+except ImportError:
+    import models, database, energy, cache, config
+    from reconciliation import OPEN_STATUSES
+
+# Dashboard summary: every number the overview page shows, from aggregate
+# queries only (COUNT/SUM, no row lists). Independent sections run at the same
+# time, each on its own read connection, and the assembled summary is cached
+# briefly per viewer, keyed on the version counters of the tables it reads.
+
+ADMIN_TABLES = ("students", "rooms", "rent_payments", "complaints", "parcels",
+                "electricity_daily_rollups", "electricity_monthly_rollups")
+STUDENT_TABLES = ("students", "rent_payments", "complaints", "parcels",
+                  "electricity_daily_rollups", "electricity_monthly_rollups")
+
+summaries = cache.ResponseCache(config.DASHBOARD_CACHE_SIZE, config.DASHBOARD_CACHE_SECONDS,
+                                config.CACHE_MAX_BODY_BYTES)
+
+
+def _read(fn, *args):
+    db = database.ReadSessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def _gather(**sections):
+    """Runs each (fn, *args) on the threadpool concurrently; returns {name: result}."""
+    results = await asyncio.gather(*(run_in_threadpool(_read, *call) for call in sections.values()))
+    return dict(zip(sections, results))
+
+
+def _students(db):
+    total, active = db.query(
+        func.count(models.Student.id),
+        func.coalesce(func.sum(case((models.Student.is_active == True, 1), else_=0)), 0),
+    ).one()
+    return {"total": total, "active": active}
+
+
+def _rooms(db):
+    total, capacity, occupied = db.query(
+        func.count(models.Room.id),
+        func.coalesce(func.sum(models.Room.capacity), 0),
+        func.coalesce(func.sum(models.Room.current_occupancy), 0),
+    ).one()
+    return {"total": total, "capacity": capacity, "occupied": occupied}
+
+
+def _rent(db, student_id=None):
+    payment = models.RentPayment
+    query = db.query(func.count(payment.id), func.coalesce(func.sum(payment.amount), 0.0))\
+        .filter(payment.status.in_(OPEN_STATUSES))
+    if student_id is not None:
+        query = query.filter(payment.student_id == student_id)
+    count, amount = query.one()
+
+    collected = db.query(func.coalesce(func.sum(payment.amount), 0.0))\
+        .filter(payment.status == "paid", payment.month == energy.month_key(date.today()))
+    if student_id is not None:
+        collected = collected.filter(payment.student_id == student_id)
+    return {"pending_count": count, "pending_amount": round(amount, 2),
+            "paid_this_month": round(collected.scalar(), 2)}
+
+
+def _complaints(db, student_id=None):
+    complaint = models.Complaint
+    query = db.query(
+        func.count(complaint.id),
+        func.coalesce(func.sum(case((func.lower(complaint.status) != "resolved", 1), else_=0)), 0),
+    )
+    if student_id is not None:
+        query = query.filter(complaint.student_id == student_id)
+    total, open_count = query.one()
+    return {"total": total, "open": open_count}
+
+
+def _parcels(db, student_id=None):
+    query = db.query(func.count(models.Parcel.id)).filter(models.Parcel.status == "Waiting")
+    if student_id is not None:
+        query = query.filter(models.Parcel.student_id == student_id)
+    return {"waiting": query.scalar()}
+
+
+def _hostel_energy(db, days):
+    units = sum(energy.usage_by_room(db, days).values())
+    return {"days": days, "total_units": round(units, 2), "total_bill": energy.bill(units)}
+
+
+def _room_energy(db, room_number, days):
+    # Same numbers as /monitoring/stats/{id}, without the per-day list
+    rollup = models.ElectricityDailyRollup
+    since = date.today() - timedelta(days=days - 1)
+    reading_days = db.query(func.count()).filter(rollup.room_number == room_number, rollup.day >= since).scalar()
+    units = energy.usage_by_room(db, days, room_number).get(room_number, 0.0)
+    avg_daily = units / reading_days if reading_days else 0
+    return {
+        "days": days,
+        "room_number": room_number,
+        "total_units": round(units, 2),
+        "current_bill": energy.bill(units),
+        "projected_bill": energy.bill(avg_daily * 30),
+        "avg_daily": round(avg_daily, 2),
+    }
+
+
+async def admin_summary(days=None):
+    sections = await _gather(
+        students=(_students,),
+        rooms=(_rooms,),
+        rent=(_rent,),
+        complaints=(_complaints,),
+        parcels=(_parcels,),
+        energy=(_hostel_energy, days),
+    )
+    return {"role": "admin", **sections}
+
+
+async def student_summary(principal, days=30):
+    sections = await _gather(
+        students=(_students,),
+        rent=(_rent, principal.id),
+        complaints=(_complaints, principal.id),
+        parcels=(_parcels, principal.id),
+        energy=(_room_energy, principal.room_number, days),
+    )
+    return {"role": "student", "student_id": principal.id, "room_number": principal.room_number, **sections}
@@ -1,22 +1,72 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+try:
+    from . import config
+except ImportError:
+    import config
 
-from pathlib import Path
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{config.DATABASE_PATH}"
 
-BASE_DIR = Path(__file__).resolve().parent
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{BASE_DIR}/hostel.db"
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    if not read_only:
+        # Persistent in the file, but cheap to assert on every new connection
+        cursor.execute(f"PRAGMA journal_mode={config.DB_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={config.DB_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{config.DB_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={config.DB_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={config.DB_BUSY_TIMEOUT_MS}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+def _make_engine(read_only: bool, pool_size: int, max_overflow: int):
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": config.DB_BUSY_TIMEOUT_MS / 1000},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=config.DB_POOL_TIMEOUT_SECONDS,
+        pool_pre_ping=False,
+    )
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        # Let SQLAlchemy, not the sqlite3 module, decide when transactions begin
+        dbapi_connection.isolation_level = None
+        _apply_pragmas(dbapi_connection, read_only)
+
+    @event.listens_for(engine, "begin")
+    def on_begin(conn):
+        # Writers take the write lock up front; readers get a plain snapshot
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+    return engine
+
+# Writes (and anything that must see its own writes)
+engine = _make_engine(False, config.DB_WRITE_POOL_SIZE, config.DB_WRITE_POOL_OVERFLOW)
+# Read-only connections, refused by SQLite if they try to write
+read_engine = _make_engine(True, config.DB_READ_POOL_SIZE, config.DB_READ_POOL_OVERFLOW)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 Base = declarative_base()
 
-def get_db():
+def get_write_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Older name, kept for scripts and routers that haven't picked a side
+get_db = get_write_db
@@ -0,0 +1,128 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import delete, insert, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+try:
+    from . import models, config
+except ImportError:
+    import models, config
+
+# Per-room electricity totals are kept in two rollup tables so stats never scan
+# electricity_readings: one row per (room, day) and one per (room, month).
+
+def month_key(day: date) -> str:
+    return day.strftime("%Y-%m")
+
+def bill(units: float) -> float:
+    return round(units * config.ENERGY_RATE_PER_UNIT, 2)
+
+def _upsert(db: Session, table, key_columns, rows):
+    if not rows:
+        return
+    stmt = sqlite_insert(table).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            "units_kwh": table.units_kwh + stmt.excluded.units_kwh,
+            "readings": table.readings + stmt.excluded.readings,
+        }
+    ))
+
+def add_to_rollups(db: Session, readings):
+    """Folds newly stored (room_number, reading_date, units_kwh) tuples into both rollups.
+
+    Runs inside the caller's transaction so rollups and readings commit together.
+    """
+    daily = defaultdict(lambda: [0.0, 0])
+    for room_number, reading_date, units in readings:
+        bucket = daily[(room_number, reading_date)]
+        bucket[0] += units
+        bucket[1] += 1
+
+    monthly = defaultdict(lambda: [0.0, 0])
+    for (room_number, day), (units, count) in daily.items():
+        bucket = monthly[(room_number, month_key(day))]
+        bucket[0] += units
+        bucket[1] += count
+
+    _upsert(db, models.ElectricityDailyRollup, ["room_number", "day"], [
+        {"room_number": room, "day": day, "units_kwh": units, "readings": count}
+        for (room, day), (units, count) in daily.items()
+    ])
+    _upsert(db, models.ElectricityMonthlyRollup, ["room_number", "month"], [
+        {"room_number": room, "month": month, "units_kwh": units, "readings": count}
+        for (room, month), (units, count) in monthly.items()
+    ])
+
+def rebuild_rollups(db: Session):
+    """Recomputes both rollups from electricity_readings with two GROUP BYs."""
+    db.execute(delete(models.ElectricityDailyRollup))
+    db.execute(delete(models.ElectricityMonthlyRollup))
+
+    reading = models.ElectricityReading
+    db.execute(insert(models.ElectricityDailyRollup).from_select(
+        ["room_number", "day", "units_kwh", "readings"],
+        db.query(reading.room_number, reading.reading_date, func.sum(reading.units_kwh), func.count())
+        .group_by(reading.room_number, reading.reading_date)
+        .statement
+    ))
+
+    daily = models.ElectricityDailyRollup
+    month = func.strftime("%Y-%m", daily.day)
+    db.execute(insert(models.ElectricityMonthlyRollup).from_select(
+        ["room_number", "month", "units_kwh", "readings"],
+        db.query(daily.room_number, month, func.sum(daily.units_kwh), func.sum(daily.readings))
+        .group_by(daily.room_number, month)
+        .statement
+    ))
+
+def _window(days: int, today: date):
+    """Splits the last `days` days into whole months and leftover day ranges."""
+    start = today - timedelta(days=days - 1)
+    current_month = today.replace(day=1)
+    first_full = start if start.day == 1 else (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    if first_full >= current_month:
+        return start, [], [(start, today)]
+
+    months = []
+    cursor = first_full
+    while cursor < current_month:
+        months.append(month_key(cursor))
+        cursor = (cursor.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    day_ranges = [(current_month, today)]
+    if start < first_full:
+        day_ranges.insert(0, (start, first_full - timedelta(days=1)))
+    return start, months, day_ranges
+
+def usage_by_room(db: Session, days: int = None, room_number: str = None, today: date = None):
+    """{room_number: units} over the last `days` days (all time if None), read from rollups only."""
+    daily = models.ElectricityDailyRollup
+    monthly = models.ElectricityMonthlyRollup
+    totals = defaultdict(float)
+
+    def add(rows):
+        for room, units in rows:
+            totals[room] += units or 0.0
+
+    if days is None:
+        query = db.query(monthly.room_number, func.sum(monthly.units_kwh))
+        if room_number:
+            query = query.filter(monthly.room_number == room_number)
+        add(query.group_by(monthly.room_number).all())
+        return dict(totals)
+
+    _, months, day_ranges = _window(days, today or date.today())
+    if months:
+        query = db.query(monthly.room_number, func.sum(monthly.units_kwh)).filter(monthly.month.in_(months))
+        if room_number:
+            query = query.filter(monthly.room_number == room_number)
+        add(query.group_by(monthly.room_number).all())
+    for first, last in day_ranges:
+        query = db.query(daily.room_number, func.sum(daily.units_kwh)).filter(daily.day.between(first, last))
+        if room_number:
+            query = query.filter(daily.room_number == room_number)
+        add(query.group_by(daily.room_number).all())
+    return dict(totals)
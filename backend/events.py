@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import threading
+from datetime import datetime
+try:
+    from . import models, config
+except ImportError:
+    import models, config
+
+
+class Subscription:
+    """One connected client. Its queue is bounded: when it overflows the backlog is
+    dropped and replaced by a single `resync` event, so a slow tab costs at most
+    `queue_size` events of memory and then just refetches."""
+
+    def __init__(self, hub, topics, queue_size: int):
+        self.hub = hub
+        self.topics = topics
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def _offer(self, event):
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync", "data": {"reason": "backlog"}})
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float = None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.hub._unsubscribe(self)
+
+
+class EventHub:
+    """In-process pub/sub for live dashboard updates.
+
+    `publish` is safe to call from sync endpoints running on the threadpool;
+    each subscriber receives events on its own event loop.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topics=None) -> Subscription:
+        subscription = Subscription(self, set(topics) if topics else None, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data):
+        event = {"id": next(self._ids), "type": event_type, "data": data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.topics and event_type not in subscription.topics:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # loop already closed, connection is gone
+                self._unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "dropped": sum(s.dropped for s in subscribers),
+        }
+
+
+hub = EventHub(config.EVENT_QUEUE_SIZE)
+
+
+def room_payload(room):
+    return {
+        "id": room.id,
+        "number": room.number,
+        "capacity": room.capacity,
+        "current_occupancy": room.current_occupancy,
+    }
+
+
+def publish_rooms(db, room_numbers):
+    """Publishes the committed state of the given rooms as `room` events."""
+    numbers = [n for n in set(room_numbers) if n]
+    if not numbers:
+        return
+    for room in db.query(models.Room).filter(models.Room.number.in_(numbers)).all():
+        hub.publish("room", room_payload(room))
+
+
+def publish_gate(entry, student_name=None):
+    hub.publish("gate", {
+        "id": entry.id,
+        "student_id": entry.student_id,
+        "student_name": student_name,
+        "event_type": entry.event_type,
+        "timestamp": entry.timestamp.isoformat() if isinstance(entry.timestamp, datetime) else entry.timestamp,
+    })
@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, func, type_coerce, Date, DateTime, LargeBinary, String
+try:
+    from . import models, database, config
+except ImportError:
+    import models, database, config
+
+# Bulk exports of logs and ledgers. Rows are streamed from one read transaction
+# in chunks of EXPORT_CHUNK_ROWS (yield_per), and every chunk is encoded and
+# handed to the client before the next is fetched, so memory stays flat no
+# matter how many rows match.
+
+# table -> (model, column the date range filters and orders on)
+EXPORTABLE = {
+    "gate_entries": (models.GateEntry, "timestamp"),
+    "attendance_logs": (models.AttendanceLog, "date"),
+    "rent_payments": (models.RentPayment, "month"),  # YYYY-MM strings, filtered by month
+    "discipline_logs": (models.DisciplineLog, "incident_date"),
+    "electricity_readings": (models.ElectricityReading, "reading_date"),
+}
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _exported(column):
+    # SQLite already stores dates as ISO text; formatting them in SQL skips parsing
+    # every value into a Python datetime only to turn it back into a string.
+    # Only the separator changes, so fractional seconds survive a round trip.
+    if isinstance(column.type, DateTime):
+        return func.replace(type_coerce(column, String), " ", "T").label(column.key)
+    if isinstance(column.type, Date):
+        return type_coerce(column, String).label(column.key)
+    return column
+
+
+def build_query(table_name: str, start: date = None, end: date = None,
+                student_id: int = None, room_number: str = None):
+    """SELECT for one export: every column of the table (student name alongside), oldest first."""
+    if table_name not in EXPORTABLE:
+        raise KeyError(table_name)
+    model, time_attr = EXPORTABLE[table_name]
+    table = model.__table__
+    time_col = table.c[time_attr]
+
+    stmt = select(*[_exported(c) for c in table.columns if not isinstance(c.type, LargeBinary)])
+    if "student_id" in table.c:
+        stmt = stmt.add_columns(models.Student.name.label("student_name"))\
+            .outerjoin(models.Student, models.Student.id == table.c.student_id)
+
+    # Inclusive [start, end] whatever the column type
+    if isinstance(time_col.type, DateTime):
+        if start:
+            stmt = stmt.where(time_col >= datetime.combine(start, time.min))
+        if end:
+            stmt = stmt.where(time_col < datetime.combine(end + timedelta(days=1), time.min))
+    elif isinstance(time_col.type, Date):
+        if start:
+            stmt = stmt.where(time_col >= start)
+        if end:
+            stmt = stmt.where(time_col <= end)
+    else:
+        if start:
+            stmt = stmt.where(time_col >= start.strftime("%Y-%m"))
+        if end:
+            stmt = stmt.where(time_col <= end.strftime("%Y-%m"))
+
+    if student_id is not None and "student_id" in table.c:
+        stmt = stmt.where(table.c.student_id == student_id)
+    if room_number is not None and "room_number" in table.c:
+        stmt = stmt.where(table.c.room_number == room_number)
+    elif room_number is not None and "student_id" in table.c:
+        stmt = stmt.where(models.Student.room_number == room_number)
+
+    return stmt.order_by(time_col, table.c.id)
+
+
+def _encode_csv(keys, rows, header: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(keys)
+    writer.writerows(rows)
+    return buf.getvalue().encode()
+
+
+def _encode_ndjson(keys, rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(keys, row)), separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode()
+
+
+def stream(stmt, fmt: str, chunk_rows: int = None):
+    """Yields the encoded export chunk by chunk.
+
+    Opens its own read session: the request's session is closed before a
+    streaming body is sent. The whole export reads one consistent snapshot.
+    """
+    chunk_rows = max(1, chunk_rows or config.EXPORT_CHUNK_ROWS)
+    db = database.ReadSessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=chunk_rows))
+        keys = list(result.keys())
+        first = True
+        for rows in result.partitions():
+            if fmt == "csv":
+                yield _encode_csv(keys, rows, header=first)
+            else:
+                yield _encode_ndjson(keys, rows)
+            first = False
+        if first and fmt == "csv":
+            # No rows: still a valid CSV with its header
+            yield _encode_csv(keys, [], header=True)
+    finally:
+        db.close()
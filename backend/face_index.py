@@ -0,0 +1,141 @@
+import hashlib
+import io
+import threading
+import numpy as np
+try:
+    import face_recognition
+except ImportError:  # optional: falls back to simulated embeddings
+    face_recognition = None
+try:
+    from . import models, cache
+except ImportError:
+    import models, cache
+
+EMBEDDING_DIM = 128
+_DTYPE = np.dtype("<f4")
+
+# Counter in cache.versions bumped after every committed enroll, so the other
+# worker processes notice their copy of the index is behind and reload it
+VERSION_KEY = "face_index"
+
+def encode_embedding(vec: np.ndarray) -> bytes:
+    return np.asarray(vec, dtype=_DTYPE).tobytes()
+
+def decode_embedding(blob) -> np.ndarray:
+    # Older rows hold placeholder strings from the simulation days; skip anything
+    # that isn't exactly one float32 vector.
+    if not isinstance(blob, (bytes, bytearray, memoryview)) or len(blob) != EMBEDDING_DIM * _DTYPE.itemsize:
+        return None
+    return np.frombuffer(blob, dtype=_DTYPE)
+
+def extract_embedding(image: bytes) -> np.ndarray:
+    """Returns a 128-d face embedding for the image, or None if no face was found."""
+    if face_recognition is not None:
+        pixels = face_recognition.load_image_file(io.BytesIO(image))
+        encodings = face_recognition.face_encodings(pixels)
+        if not encodings:
+            return None
+        return np.asarray(encodings[0], dtype=np.float32)
+
+    # Simulation Mode: stable pseudo-embedding per image, so re-submitting the
+    # enrollment photo matches and anything else doesn't.
+    if not image:
+        return None
+    seed = int.from_bytes(hashlib.sha256(image).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+
+def _normalize(vec: np.ndarray) -> np.ndarray:
+    vec = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+class FaceIndex:
+    """All enrolled embeddings as one L2-normalized (N, 128) float32 matrix.
+
+    Search is a single matrix-vector product. Writers build new arrays and swap
+    them in, so readers never need the lock and never see a half-written row.
+    Each process holds its own copy; `ensure_loaded` compares the shared
+    VERSION_KEY counter (one load from shared memory) and reloads when another
+    process has enrolled since.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self._lock = threading.Lock()
+        # (ids, matrix) swapped as one tuple so a reader always gets a matching pair
+        self._state = (np.empty(0, dtype=np.int64), np.empty((0, dim), dtype=np.float32))
+        self.loaded = False
+        self.version = None
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def load(self, db):
+        # Read before the query: an enroll committed meanwhile bumps past it and triggers another load
+        version = cache.versions.get((VERSION_KEY,))[0]
+        rows = db.query(models.Student.id, models.Student.face_encoding)\
+            .filter(models.Student.face_encoding.isnot(None))\
+            .all()
+
+        ids, vectors = [], []
+        for student_id, blob in rows:
+            vec = decode_embedding(blob)
+            if vec is not None:
+                ids.append(student_id)
+                vectors.append(vec)
+
+        matrix = np.vstack(vectors) if vectors else np.empty((0, self.dim), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        with self._lock:
+            self._state = (np.asarray(ids, dtype=np.int64), (matrix / norms).astype(np.float32))
+            self.loaded = True
+            self.version = version
+        return len(ids)
+
+    def ensure_loaded(self, db):
+        if not self.loaded or cache.versions.get((VERSION_KEY,))[0] != self.version:
+            self.load(db)
+
+    def enrolled(self, student_id: int, vec: np.ndarray):
+        """Call after the embedding is committed: updates this copy and tells the other processes."""
+        cache.bump(VERSION_KEY)
+        latest = cache.versions.get((VERSION_KEY,))[0]
+        self.upsert(student_id, vec)
+        with self._lock:
+            if self.version is not None and latest == self.version + 1:
+                # Ours was the only enroll since our load, so the upsert is the whole difference
+                self.version = latest
+
+    def upsert(self, student_id: int, vec: np.ndarray):
+        row = _normalize(vec)[None, :]
+        with self._lock:
+            ids, matrix = self._state
+            hits = np.flatnonzero(ids == student_id)
+            if hits.size:
+                matrix = matrix.copy()
+                matrix[hits[0]] = row
+            else:
+                matrix = np.vstack([matrix, row])
+                ids = np.append(ids, np.int64(student_id))
+            self._state = (ids, matrix)
+
+    def remove(self, student_id: int):
+        with self._lock:
+            ids, matrix = self._state
+            keep = ids != student_id
+            self._state = (ids[keep], matrix[keep])
+
+    def search(self, vec: np.ndarray, k: int = 1):
+        """Top-k (student_id, cosine similarity) pairs, best first."""
+        ids, matrix = self._state
+        if len(ids) == 0:
+            return []
+
+        scores = matrix @ _normalize(vec)
+        k = min(k, len(ids))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+face_index = FaceIndex()
@@ -0,0 +1,251 @@
+"""Synthetic data generator for load testing.
+
+Fills the database with a reproducible, production-sized hostel:
+
+    python generate_data.py --buildings 50 --students 20000 --days 365 --reset
+
+Everything is generated with NumPy from a fixed --seed and written with bulk
+Core inserts in --chunk sized transactions, so a few million rows take seconds.
+"""
+import argparse
+import math
+import os
+import shutil
+import time
+from datetime import date
+import numpy as np
+from sqlalchemy import insert, delete, func, text
+try:
+    from backend import models, database, energy, occupancy, migrations, cache, config, retention
+    from backend.routers.attendance import rebuild_daily_rollups
+except ImportError:
+    import models, database, energy, occupancy, migrations, cache, config, retention
+    from routers.attendance import rebuild_daily_rollups
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ishaan", "Arjun", "Sai", "Reyansh", "Krishna", "Ananya", "Diya",
+               "Saanvi", "Aadhya", "Myra", "Kiara", "Riya", "Meera", "Kabir", "Rohan", "Neha", "Priya"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Patel", "Singh", "Kumar", "Reddy", "Iyer", "Nair", "Das",
+              "Mehta", "Joshi", "Rao", "Bose", "Khan", "Yadav", "Mishra", "Pillai", "Shah", "Jain"]
+COURIERS = ["Amazon", "Flipkart", "Delhivery", "BlueDart", "DTDC", "Ekart"]
+ITEMS = ["Study Table", "Cycle", "Kettle", "Mattress", "Calculator", "Textbook", "Lamp", "Cooler",
+         "Chair", "Headphones", "Guitar", "Bucket", "Iron", "Extension Board", "Shoe Rack"]
+CONDITIONS = ["New", "Like New", "Used", "Damaged"]
+
+# Wiped by --reset, children before parents
+TABLES = [
+    models.AttendanceDailyRollup, models.AttendanceLog, models.StudentPresence, models.GateEntry, models.Parcel,
+    models.MarketplaceItem, models.ElectricityDailyRollup, models.ElectricityMonthlyRollup,
+    models.ElectricityReading, models.LaundryUsage, models.Complaint, models.DisciplineLog,
+    models.MonthlyBill, models.PaymentReview, models.RentPayment, models.Student, models.Room,
+    models.ArchiveCursor,
+]
+
+
+def _sql_values(values):
+    """Column chunk -> list of SQLite-native values, formatted the way SQLAlchemy stores them."""
+    if not isinstance(values, np.ndarray):
+        return list(values)
+    if values.dtype.kind == "M":
+        unit = np.datetime_data(values.dtype)[0]
+        missing = np.isnat(values)
+        text_values = np.datetime_as_string(values, unit="D" if unit == "D" else "us")
+        if unit != "D":
+            text_values = np.char.replace(text_values, "T", " ")
+        return [None if m else v for v, m in zip(text_values.tolist(), missing.tolist())]
+    if values.dtype.kind == "b":
+        return values.astype(np.int64).tolist()
+    return values.tolist()
+
+
+def _insert(conn, table, columns, arrays, chunk):
+    """Inserts column arrays as rows, one transaction per chunk. Returns the row count.
+
+    The statement is compiled once from the Core table and run with executemany on
+    pre-converted tuples, skipping per-row bind processing.
+    """
+    sql = str(insert(table).compile(dialect=conn.dialect, column_keys=columns))
+    total = len(arrays[0]) if arrays else 0
+    for i in range(0, total, chunk):
+        values = [_sql_values(a[i:i + chunk]) for a in arrays]
+        conn.exec_driver_sql(sql, list(zip(*values)))
+        conn.commit()
+    return total
+
+
+def _timestamps(days: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    return (days.astype("datetime64[D]").astype("datetime64[s]") + seconds.astype("timedelta64[s]")).astype("datetime64[us]")
+
+
+def generate(buildings: int, students: int, days: int, seed: int, chunk: int,
+             gate_per_day: float, parcels_per_day: float, listings_per_student: float):
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(date.today(), "D")
+    first_day = today - (days - 1)
+    counts = {}
+
+    with database.engine.connect() as conn:
+        # Bulk load: durability is not a concern for throwaway data
+        # (set on the raw connection: SQLite refuses it inside the transaction SQLAlchemy would open)
+        conn.connection.driver_connection.execute("PRAGMA synchronous=OFF")
+
+        # Rooms: enough beds across the buildings for every student, 2-3 beds each
+        rooms_per_building = max(1, math.ceil(students / buildings / 2.5))
+        numbers = []
+        for b in range(1, buildings + 1):
+            for r in range(rooms_per_building):
+                numbers.append(f"B{b:02d}-{r // 20 + 1}{r % 20 + 1:02d}")
+        capacities = rng.integers(2, 4, size=len(numbers))
+        while capacities.sum() < students:
+            capacities[rng.integers(len(capacities))] += 1
+        counts["rooms"] = _insert(conn, models.Room.__table__, ["number", "capacity", "current_occupancy"],
+                                  [numbers, capacities, np.zeros(len(numbers), dtype=np.int64)], chunk)
+
+        # Students: fill beds in order, ids assigned here so child tables can reference them
+        start_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM students")).scalar() or 0) + 1
+        student_ids = np.arange(start_id, start_id + students)
+        beds = np.repeat(np.array(numbers, dtype=object), capacities)[:students]
+        phones = [str(9000000000 + i) for i in range(students)]
+        names = [f"{FIRST_NAMES[a]} {LAST_NAMES[b]}" for a, b in
+                 zip(rng.integers(len(FIRST_NAMES), size=students), rng.integers(len(LAST_NAMES), size=students))]
+        move_in = first_day - rng.integers(0, 365, size=students)
+        counts["students"] = _insert(
+            conn, models.Student.__table__,
+            ["id", "name", "phone", "room_number", "move_in_date", "is_active", "password", "meal_credits"],
+            [student_ids, names, phones, beds, move_in, np.ones(students, dtype=bool), phones,
+             rng.integers(0, 31, size=students)],
+            chunk
+        )
+
+        # Gate: events sorted per student, alternating OUT/IN
+        n = int(students * days * gate_per_day)
+        who = rng.integers(0, students, size=n)
+        stamps = _timestamps(first_day + rng.integers(0, days, size=n), rng.integers(6 * 3600, 23 * 3600, size=n))
+        order = np.lexsort((stamps, who))
+        who, stamps = who[order], stamps[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(who)) + 1]
+        position = np.arange(n) - np.repeat(group_start, np.diff(np.r_[group_start, n]))
+        events = np.where(position % 2 == 0, "OUT", "IN").astype(object)
+        counts["gate_entries"] = _insert(conn, models.GateEntry.__table__, ["student_id", "timestamp", "event_type"],
+                                         [student_ids[who], stamps, events], chunk)
+
+        # Attendance: one log most nights per student, ~5% at home / away
+        total = 0
+        for d in range(days):
+            day = first_day + d
+            marked = np.flatnonzero(rng.random(students) < 0.95)
+            away = rng.random(marked.size) < 0.05
+            distance = np.where(away, rng.uniform(600, 30000, marked.size), rng.uniform(0, 450, marked.size))
+            total += _insert(
+                conn, models.AttendanceLog.__table__,
+                ["student_id", "date", "time", "status", "latitude", "longitude", "distance_meters"],
+                [student_ids[marked], np.full(marked.size, day),
+                 _timestamps(np.full(marked.size, day), rng.integers(22 * 3600, 23 * 3600 + 1800, marked.size)),
+                 np.where(away, "Away", "Present").astype(object),
+                 28.6139 + distance / 111000, np.full(marked.size, 77.2090), distance],
+                chunk
+            )
+        counts["attendance_logs"] = total
+
+        # Electricity: one daily reading per room, weekend bump
+        room_idx = np.repeat(np.arange(len(numbers)), days)
+        reading_days = np.tile(first_day + np.arange(days), len(numbers))
+        weekend = ((reading_days.astype("datetime64[D]").view("int64") - 4) % 7) >= 5
+        units = np.round(rng.uniform(2.0, 12.0, room_idx.size) + weekend * rng.uniform(1.0, 3.0, room_idx.size), 2)
+        counts["electricity_readings"] = _insert(
+            conn, models.ElectricityReading.__table__, ["room_number", "reading_date", "units_kwh"],
+            [np.array(numbers, dtype=object)[room_idx], reading_days, units], chunk
+        )
+
+        # Parcels: everything older than two days has been collected
+        n = int(students * days * parcels_per_day)
+        arrival = _timestamps(first_day + rng.integers(0, days, size=n), rng.integers(9 * 3600, 19 * 3600, size=n))
+        waiting = arrival >= (today - 2).astype("datetime64[us]")
+        collected = np.where(waiting, np.datetime64("NaT"), arrival + np.timedelta64(6, "h"))
+        counts["parcels"] = _insert(
+            conn, models.Parcel.__table__,
+            ["student_id", "courier", "pickup_code", "status", "arrival_time", "collected_at"],
+            [student_ids[rng.integers(0, students, size=n)],
+             np.array(COURIERS, dtype=object)[rng.integers(len(COURIERS), size=n)],
+             rng.integers(1000, 10000, size=n).astype(str).astype(object),
+             np.where(waiting, "Waiting", "Collected").astype(object), arrival, collected],
+            chunk
+        )
+
+        # Marketplace
+        n = int(students * listings_per_student)
+        titles = np.array(ITEMS, dtype=object)[rng.integers(len(ITEMS), size=n)]
+        counts["marketplace_items"] = _insert(
+            conn, models.MarketplaceItem.__table__,
+            ["seller_id", "title", "description", "price", "condition", "status", "created_at"],
+            [student_ids[rng.integers(0, students, size=n)], titles,
+             [f"{t} in good shape, pick up from my room." for t in titles],
+             np.round(rng.uniform(50, 5000, size=n), -1),
+             np.array(CONDITIONS, dtype=object)[rng.integers(len(CONDITIONS), size=n)],
+             np.where(rng.random(n) < 0.7, "Available", "Sold").astype(object),
+             _timestamps(first_day + rng.integers(0, days, size=n), rng.integers(0, 86400, size=n))],
+            chunk
+        )
+
+    # Derived tables, from the raw rows just written
+    with database.engine.begin() as conn:
+        # Current side of the gate per student, as presence.py keeps it
+        migrations.backfill_student_presence(conn)
+    db = database.SessionLocal()
+    try:
+        energy.rebuild_rollups(db)
+        rebuild_daily_rollups(db, first_day.astype(object), today.astype(object))
+        db.commit()
+        occupancy.reconcile(db)
+    finally:
+        db.close()
+
+    return counts
+
+
+def reset():
+    with database.engine.begin() as conn:
+        for table in TABLES:
+            conn.execute(delete(table))
+    # Archived rows belong to the old students, and regenerated ids would collide with them
+    for table_name in retention.ARCHIVABLE:
+        shutil.rmtree(os.path.join(config.ARCHIVE_DIR, table_name), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the hostel database with synthetic data.")
+    parser.add_argument("--buildings", type=int, default=10)
+    parser.add_argument("--students", type=int, default=4000)
+    parser.add_argument("--days", type=int, default=180, help="history length for logs and readings")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk", type=int, default=20000, help="rows per insert transaction")
+    parser.add_argument("--gate-per-day", type=float, default=1.0, help="gate events per student per day")
+    parser.add_argument("--parcels-per-day", type=float, default=0.02, help="parcels per student per day")
+    parser.add_argument("--listings-per-student", type=float, default=0.3)
+    parser.add_argument("--reset", action="store_true", help="delete existing hostel data first")
+    args = parser.parse_args()
+
+    migrations.upgrade(database.engine) # includes the FTS triggers, so bulk-loaded listings are searchable
+    if args.reset:
+        reset()
+    else:
+        db = database.SessionLocal()
+        try:
+            if db.query(func.count(models.Student.id)).scalar():
+                parser.error("database already has students; pass --reset to replace them")
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    counts = generate(args.buildings, args.students, args.days, args.seed, args.chunk,
+                      args.gate_per_day, args.parcels_per_day, args.listings_per_student)
+    elapsed = time.perf_counter() - started
+    # Bulk loads go through raw connections, which the session hooks don't see
+    cache.bump_all()
+
+    for table, count in counts.items():
+        print(f"{table:>22}: {count:>10,}")
+    print(f"{'total':>22}: {sum(counts.values()):>10,} rows in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
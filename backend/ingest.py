@@ -0,0 +1,230 @@
+import json
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+try:
+    from . import models, database, config, energy
+except ImportError:
+    import models, database, config, energy
+
+
+class QueueFull(Exception):
+    pass
+
+
+class ReadingWriter:
+    """Write-behind buffer for meter readings.
+
+    Endpoints `submit` validated rows and return immediately. A background thread
+    drains the queue and writes each batch as one executemany INSERT plus rollup
+    upserts in a single transaction (group commit). Readings already stored for
+    the same (room_number, reading_time) are skipped, so meters can safely retry.
+
+    Rows were acknowledged to the meter when they were queued, so a batch is
+    never dropped: a failed write is retried with backoff, and after
+    INGEST_RETRY_ATTEMPTS it is spilled to an NDJSON file under INGEST_SPILL_DIR
+    that the writer replays whenever it is idle (and after a restart).
+    """
+
+    def __init__(self, flush_ms: int, flush_rows: int, max_queue: int, spill_dir: str = None,
+                 retry_attempts: int = None, retry_backoff_ms: int = None):
+        self.flush_interval = max(1, flush_ms) / 1000
+        self.flush_rows = max(1, flush_rows)
+        self.spill_dir = spill_dir or config.INGEST_SPILL_DIR
+        self.retry_attempts = max(1, retry_attempts or config.INGEST_RETRY_ATTEMPTS)
+        self.retry_backoff = max(1, retry_backoff_ms or config.INGEST_RETRY_BACKOFF_MS) / 1000
+        self._held = []  # batches that couldn't even be spilled, retried when idle
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self.accepted = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.flushes = 0
+        self.failed = 0
+        self.retries = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.last_flush_ms = 0.0
+        self.last_error = None
+        self._oldest_pending = None
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="reading-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flushes whatever is buffered and stops the writer thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, rows):
+        self.start()
+        now = time.monotonic()
+        for row in rows:
+            try:
+                self._queue.put_nowait((row, now))
+            except queue.Full:
+                raise QueueFull("Ingestion queue is full")
+            self.accepted += 1
+
+    def _run(self):
+        self._replay()  # leftovers from a previous process
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._replay()
+                continue
+
+            batch = [first]
+            self._oldest_pending = first[1]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush([row for row, _ in batch])
+            self._oldest_pending = None
+
+    def _write(self, rows):
+        """One transaction: insert the new readings, fold them into the rollups. Returns the stored rows."""
+        db = database.SessionLocal()
+        try:
+            # One executemany; RETURNING only yields the rows that were actually new
+            stmt = sqlite_insert(models.ElectricityReading).on_conflict_do_nothing(
+                index_elements=["room_number", "reading_time"]
+            ).returning(
+                models.ElectricityReading.room_number,
+                models.ElectricityReading.reading_date,
+                models.ElectricityReading.units_kwh
+            )
+            stored = db.execute(stmt, rows).all()
+            energy.add_to_rollups(db, stored)
+            db.commit()
+            return stored
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _flush(self, rows):
+        started = time.perf_counter()
+
+        # Last write wins inside one batch for the same (room, timestamp)
+        unique = {}
+        for row in rows:
+            unique[(row["room_number"], row["reading_time"])] = row
+        rows = list(unique.values())
+
+        for attempt in range(self.retry_attempts):
+            try:
+                stored = self._write(rows)
+                break
+            except Exception as e:
+                # Typically "database is locked" behind a long writer: back off and retry
+                self.last_error = f"{type(e).__name__}: {e}"
+                if attempt + 1 < self.retry_attempts:
+                    self.retries += 1
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+        else:
+            self.failed += len(rows)
+            self._spill(rows)
+            return
+
+        self.flushes += 1
+        self.inserted += len(stored)
+        self.duplicates += len(rows) - len(stored)
+        self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def _spill(self, rows):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{time.time_ns()}-{os.getpid()}.ndjson")
+            with open(path + ".tmp", "w") as f:
+                for row in rows:
+                    f.write(json.dumps({**row, "reading_date": row["reading_date"].isoformat(),
+                                        "reading_time": row["reading_time"].isoformat()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self.spilled += len(rows)
+        except OSError as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            self._held.append(rows)
+
+    def _spill_files(self):
+        try:
+            names = sorted(n for n in os.listdir(self.spill_dir) if n.endswith(".ndjson"))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.spill_dir, n) for n in names]
+
+    def _replay(self):
+        """Writes spilled and held batches back, one attempt each; stops at the first failure."""
+        while self._held:
+            try:
+                stored = self._write(self._held[0])
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return
+            rows = self._held.pop(0)
+            self._replayed(rows, stored)
+
+        for path in self._spill_files():
+            with open(path) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            for row in rows:
+                row["reading_date"] = date.fromisoformat(row["reading_date"])
+                row["reading_time"] = datetime.fromisoformat(row["reading_time"])
+            try:
+                stored = self._write(rows) if rows else []
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return
+            os.remove(path)
+            self._replayed(rows, stored)
+
+    def _replayed(self, rows, stored):
+        self.replayed += len(rows)
+        self.inserted += len(stored)
+        self.duplicates += len(rows) - len(stored)
+
+    def metrics(self):
+        oldest = self._oldest_pending
+        depth = self._queue.qsize()
+        lag = time.monotonic() - oldest if oldest is not None else 0.0
+        return {
+            "queue_depth": depth,
+            "lag_seconds": round(lag, 3),
+            "accepted": self.accepted,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "spill_files": len(self._spill_files()),
+            "held_batches": len(self._held),
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "last_error": self.last_error,
+        }
+
+
+reading_writer = ReadingWriter(config.INGEST_FLUSH_MS, config.INGEST_FLUSH_ROWS, config.INGEST_QUEUE_MAX)
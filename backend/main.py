@@ -1,61 +1,187 @@
+import importlib
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 try:
-    from . import models, database
-    from .routers import students, rent, discipline, laundry, complaints, gate_pass, monitoring, attendance, parcels, mess, rooms, marketplace
+    from . import database, migrations, config, cache
 except ImportError:
-    import models, database
-    from routers import students, rent, discipline, laundry, complaints, gate_pass, monitoring, attendance, parcels, mess, rooms, marketplace
+    import database, migrations, config, cache
 
-# Create database tables
-models.Base.metadata.create_all(bind=database.engine)
+# Importing this module only builds the app object: no DB work, no seeding, no
+# router imports. Schema checks run in the lifespan, routers load on first use.
+#
+#   uvicorn main:app                          (module-level app, as before)
+#   uvicorn main:create_app --factory         (fresh app per worker)
+#   python seed.py                            (demo rooms, one-shot)
 
-# Auto-seed database if empty (Fix for Render Free Tier)
-try:
-    from .seed import seed_rooms
-    seed_rooms()
-except ImportError as e:
-    # Fallback if running locally as script, but log it just in case
-    print(f"Auto-seeding skipped (ImportError): {e}")
-except Exception as e:
-    print(f"Seeding failed: {e}")
-
-app = FastAPI(title="Hostel Management System")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"], # In production, replace with frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(students.router)
-app.include_router(rent.router)
-app.include_router(discipline.router)
-app.include_router(laundry.router)
-app.include_router(complaints.router)
-app.include_router(gate_pass.router)
-app.include_router(monitoring.router)
-app.include_router(attendance.router)
-app.include_router(parcels.router)
-app.include_router(mess.router)
-app.include_router(rooms.router)
-app.include_router(marketplace.router)
-
-@app.get("/")
-def read_root():
-    return {"message": "Hostel Management System API is running"}
-
-@app.post("/seed")
-def seed_database():
+# URL prefix -> router module, imported the first time a request needs it
+ROUTERS = {
+    "/students": "students",
+    "/rent": "rent",
+    "/discipline": "discipline",
+    "/laundry": "laundry",
+    "/complaints": "complaints",
+    "/gate": "gate_pass",
+    "/monitoring": "monitoring",
+    "/attendance": "attendance",
+    "/parcels": "parcels",
+    "/mess": "mess",
+    "/rooms": "rooms",
+    "/marketplace": "marketplace",
+    "/events": "live",
+    "/archive": "archive",
+    "/export": "export",
+    "/dashboard": "dashboard",
+}
+
+# These need the full route table (OpenAPI schema, interactive docs)
+ALL_ROUTES_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+
+def _import_router(module_name: str):
+    if __package__:
+        return importlib.import_module(f".routers.{module_name}", __package__)
+    return importlib.import_module(f"routers.{module_name}")
+
+
+class RouterRegistry:
+    """Includes each router module into the app the first time it is needed.
+
+    A cold worker only pays for the modules (and their numpy/face/FTS imports)
+    that the traffic it actually serves touches.
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.loaded = set()
+        self._lock = threading.Lock()
+
+    def load(self, module_name: str):
+        if module_name in self.loaded:
+            return
+        with self._lock:
+            if module_name in self.loaded:
+                return
+            self.app.include_router(_import_router(module_name).router)
+            # Schema was cached without the new routes
+            self.app.openapi_schema = None
+            self.loaded.add(module_name)
+
+    def load_all(self):
+        for module_name in ROUTERS.values():
+            self.load(module_name)
+
+    def for_path(self, path: str):
+        if path.startswith(ALL_ROUTES_PATHS):
+            return list(ROUTERS.values())
+        for prefix, module_name in ROUTERS.items():
+            if path == prefix or path.startswith(prefix + "/"):
+                return [module_name]
+        return []
+
+
+class LazyRouters:
+    """ASGI middleware: make sure the request's router is included before routing."""
+
+    def __init__(self, app, registry: RouterRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            for module_name in self.registry.for_path(scope["path"]):
+                if module_name not in self.registry.loaded:
+                    self.registry.load(module_name)
+        await self.app(scope, receive, send)
+
+
+def _warm_up():
+    # Nice-to-have work that shouldn't delay readiness: runs after startup in a thread
+    try:
+        from .face_index import face_index
+        from . import occupancy
+    except ImportError:
+        from face_index import face_index
+        import occupancy
+
+    db = database.ReadSessionLocal()
+    try:
+        # Build the embedding matrix before the first /mess/verify needs it
+        face_index.ensure_loaded(db)
+    finally:
+        db.close()
+
+    db = database.SessionLocal()
     try:
+        # One GROUP BY to correct any occupancy drift left by older code or manual edits
+        occupancy.reconcile(db)
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Built-in demo secrets are refused here, before anything is served
+    try:
+        from .auth import check_config
+    except ImportError:
+        from auth import check_config
+    check_config()
+    # Schema check is one query when the database is current
+    migrations.ensure_current(database.engine, auto_upgrade=config.AUTO_MIGRATE)
+    if config.EAGER_ROUTERS:
+        app.state.routers.load_all()
+    if config.STARTUP_WARMUP:
+        threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+    yield
+    # Drain the write-behind buffer so acknowledged readings aren't lost
+    try:
+        from .ingest import reading_writer
+    except ImportError:
+        from ingest import reading_writer
+    reading_writer.stop()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="Hostel Management System", lifespan=lifespan)
+
+    # Inside CORS, so cached responses still get the CORS headers for each request
+    app.add_middleware(cache.ResponseCacheMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"], # In production, replace with frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Hostel Management System API is running"}
+
+    @app.get("/cache/stats")
+    def cache_stats():
+        return cache.responses.stats()
+
+    @app.post("/seed")
+    def seed_database():
         try:
-            from backend.seed import seed_rooms
-        except ImportError:
-            from seed import seed_rooms
-            
-        result = seed_rooms()
-        return {"message": "Seeding operation completed", "details": result}
-    except Exception as e:
-        return {"error": str(e), "type": type(e).__name__}
+            try:
+                from backend.seed import seed_rooms
+            except ImportError:
+                from seed import seed_rooms
+
+            result = seed_rooms()
+            return {"message": "Seeding operation completed", "details": result}
+        except Exception as e:
+            return {"error": str(e), "type": type(e).__name__}
+
+    # Added last = outermost, so routes exist before CORS preflight and routing see the request
+    app.state.routers = RouterRegistry(app)
+    app.add_middleware(LazyRouters, registry=app.state.routers)
+
+    return app
+
+
+app = create_app()
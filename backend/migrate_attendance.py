@@ -1,27 +0,0 @@
-import sqlite3
-
-def migrate():
-    conn = import os; sqlite3.connect(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hostel.db'))
-    cursor = conn.cursor()
-    
-    print("Creating attendance_logs table...")
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS attendance_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id INTEGER,
-        date DATE,
-        time TIMESTAMP,
-        status VARCHAR,
-        latitude FLOAT,
-        longitude FLOAT,
-        distance_meters FLOAT,
-        FOREIGN KEY(student_id) REFERENCES students(id)
-    )
-    """)
-    
-    conn.commit()
-    conn.close()
-    print("Migration successful.")
-
-if __name__ == "__main__":
-    migrate()
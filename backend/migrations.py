@@ -0,0 +1,201 @@
+"""Versioned schema migrations.
+
+Every migration runs in its own transaction together with the schema_version
+row that records it, so a failed step leaves the database at the previous
+version. Usage:
+
+    python migrations.py            # upgrade to the latest version
+    python migrations.py --status   # show current / latest version
+
+Add new steps to the end of MIGRATIONS. Version 1 builds whatever tables are
+missing from the current models, so on a fresh database later steps may find
+their objects already present: write them idempotently (IF NOT EXISTS,
+checkfirst=True, column checks).
+"""
+import argparse
+from datetime import datetime
+from sqlalchemy import insert, func, select
+try:
+    from . import models, database, search
+except ImportError:
+    import models, database, search
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def _columns(conn, table: str):
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(conn):
+    """ALTER TABLE ADD COLUMN for model columns an older database doesn't have yet."""
+    added = []
+    for table in models.Base.metadata.sorted_tables:
+        existing = _columns(conn, table.name)
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if isinstance(default, (int, float)) and not isinstance(default, bool):
+                ddl += f" DEFAULT {default}"
+            conn.exec_driver_sql(ddl)
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def baseline_schema(conn):
+    # Replaces the old migrate_*.py scripts: create missing tables, then bring
+    # older tables up to the model columns.
+    models.Base.metadata.create_all(bind=conn)
+    added = _add_missing_columns(conn)
+    # create_all skips existing tables, so their newer column indexes come from here
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+    if "students.password" in added:
+        # Same rule the old password migration used; hashed on first login (see auth.py)
+        conn.exec_driver_sql("UPDATE students SET password = phone")
+
+
+def backfill_student_presence(conn):
+    # Current IN/OUT per student from their latest gate entry (see presence.py)
+    conn.exec_driver_sql("""
+    INSERT OR IGNORE INTO student_presence (student_id, state, updated_at)
+    SELECT student_id, event_type, timestamp FROM (
+        SELECT student_id, event_type, timestamp,
+               ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY timestamp DESC, id DESC) AS rn
+        FROM gate_entries
+    ) WHERE rn = 1
+    """)
+
+
+# Indexes behind the hot queries, declared on the models
+PERFORMANCE_INDEXES = [
+    ("attendance_logs", "ix_attendance_logs_student_date"),   # per-student attendance, daily report
+    ("gate_entries", "ix_gate_entries_student_time"),         # presence seeding, per-student history
+    ("gate_entries", "ix_gate_entries_timestamp"),            # /gate/logs keyset paging
+    ("parcels", "ix_parcels_status_student"),                 # pending / my parcels
+    ("electricity_readings", "ix_electricity_readings_room_date"),  # rollup rebuilds, room history
+    ("electricity_readings", "ux_electricity_readings_room_time"),  # idempotent meter ingestion
+    ("marketplace_items", "ix_marketplace_items_status_created"),   # browse newest first
+]
+
+
+def performance_indexes(conn):
+    tables = models.Base.metadata.tables
+    for table_name, index_name in PERFORMANCE_INDEXES:
+        index = next(i for i in tables[table_name].indexes if i.name == index_name)
+        index.create(bind=conn, checkfirst=True)
+    # Fresh statistics so the planner actually picks them
+    conn.exec_driver_sql("ANALYZE")
+
+
+def marketplace_search(conn):
+    search.ensure_index(conn)
+
+
+def monthly_billing(conn):
+    models.MonthlyBill.__table__.create(bind=conn, checkfirst=True)
+    index = next(i for i in models.RentPayment.__table__.indexes if i.name == "ix_rent_payments_student_month")
+    index.create(bind=conn, checkfirst=True)
+
+
+def payment_reconciliation(conn):
+    models.PaymentReview.__table__.create(bind=conn, checkfirst=True)
+    index = next(i for i in models.RentPayment.__table__.indexes if i.name == "ix_rent_payments_status")
+    index.create(bind=conn, checkfirst=True)
+
+
+def rent_payment_statuses(conn):
+    # /rent/pending lists status IN ('unpaid', 'late') instead of != 'paid':
+    # fold older spellings into those, so nothing that used to be pending disappears
+    conn.exec_driver_sql("UPDATE rent_payments SET status = lower(trim(status)) WHERE status != lower(trim(status))")
+    conn.exec_driver_sql(
+        "UPDATE rent_payments SET status = 'unpaid' WHERE status IS NULL OR status NOT IN ('paid', 'unpaid', 'late')"
+    )
+
+
+MIGRATIONS = [
+    (1, "baseline_schema", baseline_schema),
+    (2, "backfill_student_presence", backfill_student_presence),
+    (3, "performance_indexes", performance_indexes),
+    (4, "marketplace_search", marketplace_search),
+    (5, "monthly_billing", monthly_billing),
+    (6, "payment_reconciliation", payment_reconciliation),
+    (7, "rent_payment_statuses", rent_payment_statuses),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).first()
+    if not exists:
+        return 0
+    return conn.execute(select(func.coalesce(func.max(models.SchemaVersion.version), 0))).scalar()
+
+
+def upgrade(engine=None, target: int = None):
+    """Applies pending migrations up to `target` (default: latest). Returns their names."""
+    engine = engine or database.engine
+    target = SCHEMA_VERSION if target is None else target
+    applied = []
+    for version, name, step in MIGRATIONS:
+        if version > target:
+            break
+        with engine.begin() as conn:
+            # Checked inside the write transaction, so two processes can't both apply a step
+            models.SchemaVersion.__table__.create(bind=conn, checkfirst=True)
+            if current_version(conn) >= version:
+                continue
+            step(conn)
+            conn.execute(insert(models.SchemaVersion).values(version=version, name=name, applied_at=datetime.now()))
+        applied.append(name)
+    return applied
+
+
+def ensure_current(engine=None, auto_upgrade: bool = True):
+    """Startup check: one query when the schema is current.
+
+    Behind and auto_upgrade -> migrate now; behind otherwise -> SchemaOutOfDate.
+    """
+    engine = engine or database.engine
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version >= SCHEMA_VERSION:
+        return []
+    if not auto_upgrade:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {version}, the code needs {SCHEMA_VERSION}. Run: python migrations.py"
+        )
+    return upgrade(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="print the schema version and exit")
+    parser.add_argument("--to", type=int, default=None, help="stop at this version")
+    args = parser.parse_args()
+
+    with database.engine.connect() as conn:
+        version = current_version(conn)
+    if args.status:
+        print(f"schema version {version} (latest {SCHEMA_VERSION})")
+        for v, name, _ in MIGRATIONS:
+            print(f"  {'x' if v <= version else ' '} {v:>3} {name}")
+        return
+
+    applied = upgrade(database.engine, args.to)
+    for name in applied:
+        print(f"applied {name}")
+    with database.engine.connect() as conn:
+        print(f"schema version {current_version(conn)}")
+
+
+if __name__ == "__main__":
+    main()
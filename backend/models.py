@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, DateTime, Text, Float, LargeBinary, Index
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -13,13 +13,13 @@ class Student(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     phone = Column(String, unique=True, index=True)
-    room_number = Column(String)
+    room_number = Column(String, index=True)
     move_in_date = Column(Date)
     move_out_date = Column(Date, nullable=True)
     is_active = Column(Boolean, default=True)
     password = Column(String, default="password") # Default password for existing users
     meal_credits = Column(Integer, default=30)
-    face_encoding = Column(Text, nullable=True)
+    face_encoding = Column(LargeBinary, nullable=True) # float32 embedding, see face_index.py
 
     rent_payments = relationship("RentPayment", back_populates="student")
     discipline_logs = relationship("DisciplineLog", back_populates="student")
@@ -31,10 +31,14 @@ class Room(Base):
     id = Column(Integer, primary_key=True, index=True)
     number = Column(String, unique=True, index=True)
     capacity = Column(Integer)
-    current_occupancy = Column(Integer, default=0)
+    current_occupancy = Column(Integer, default=0) # maintained by occupancy.py
 
 class RentPayment(Base):
     __tablename__ = "rent_payments"
+    __table_args__ = (
+        Index("ix_rent_payments_student_month", "student_id", "month"), # billing runs, per-student ledger
+        Index("ix_rent_payments_status", "status"), # /rent/pending, open payments for reconciliation
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -82,6 +86,10 @@ class Complaint(Base):
 
 class GateEntry(Base):
     __tablename__ = "gate_entries"
+    __table_args__ = (
+        Index("ix_gate_entries_student_time", "student_id", "timestamp"),
+        Index("ix_gate_entries_timestamp", "timestamp"), # keyset paging of /gate/logs
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -92,14 +100,48 @@ class GateEntry(Base):
 
 class ElectricityReading(Base):
     __tablename__ = "electricity_readings"
+    __table_args__ = (
+        # Meters may resend a reading; (room, timestamp) makes ingestion idempotent
+        Index("ux_electricity_readings_room_time", "room_number", "reading_time", unique=True),
+        Index("ix_electricity_readings_room_date", "room_number", "reading_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     room_number = Column(String) # Storing room number directly for simplicity in simulation
     reading_date = Column(Date)
+    reading_time = Column(DateTime, nullable=True) # Set by meter ingestion, NULL for simulated daily rows
     units_kwh = Column(Float)
 
+class StudentPresence(Base):
+    __tablename__ = "student_presence"
+
+    # Current side of the gate per student; flipped atomically by presence.py on every scan
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    state = Column(String) # "IN" or "OUT"
+    updated_at = Column(DateTime)
+
+class ElectricityDailyRollup(Base):
+    __tablename__ = "electricity_daily_rollups"
+
+    # Maintained by energy.add_to_rollups whenever readings are stored
+    room_number = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    units_kwh = Column(Float, default=0.0)
+    readings = Column(Integer, default=0)
+
+class ElectricityMonthlyRollup(Base):
+    __tablename__ = "electricity_monthly_rollups"
+
+    room_number = Column(String, primary_key=True)
+    month = Column(String, primary_key=True) # Format: YYYY-MM
+    units_kwh = Column(Float, default=0.0)
+    readings = Column(Integer, default=0)
+
 class AttendanceLog(Base):
     __tablename__ = "attendance_logs"
+    __table_args__ = (
+        Index("ix_attendance_logs_student_date", "student_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -112,6 +154,33 @@ class AttendanceLog(Base):
 
     student = relationship("Student")
 
+class AttendanceDailyRollup(Base):
+    __tablename__ = "attendance_daily_rollups"
+
+    # Kept in step with attendance_logs by apply_checkins; rebuild with /attendance/rollups/rebuild
+    date = Column(Date, primary_key=True)
+    room_number = Column(String, primary_key=True)
+    present = Column(Integer, default=0)
+    away = Column(Integer, default=0)
+
+class ArchiveCursor(Base):
+    __tablename__ = "archive_cursors"
+    # Progress of a retention run per table (see retention.py), so an interrupted run resumes
+
+    table_name = Column(String, primary_key=True)
+    cutoff = Column(DateTime) # rows older than this are being archived
+    last_id = Column(Integer, default=0) # highest id already moved for this cutoff
+    archived_rows = Column(Integer, default=0) # lifetime total
+    updated_at = Column(DateTime)
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+    # One row per applied migration (see migrations.py)
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String)
+    applied_at = Column(DateTime)
+
 class SystemSetting(Base):
     __tablename__ = "system_settings"
 
@@ -120,6 +189,9 @@ class SystemSetting(Base):
 
 class Parcel(Base):
     __tablename__ = "parcels"
+    __table_args__ = (
+        Index("ix_parcels_status_student", "status", "student_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -133,6 +205,9 @@ class Parcel(Base):
 
 class MarketplaceItem(Base):
     __tablename__ = "marketplace_items"
+    __table_args__ = (
+        Index("ix_marketplace_items_status_created", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     seller_id = Column(Integer, ForeignKey("students.id"))
@@ -145,3 +220,39 @@ class MarketplaceItem(Base):
     created_at = Column(DateTime, default=func.now())
 
     seller = relationship("Student")
+
+class MonthlyBill(Base):
+    __tablename__ = "monthly_bills"
+    # What the billing run charged a student for a month and the inputs it used
+    # (see billing.py). A re-run only rewrites bills whose inputs_hash changed.
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    month = Column(String, primary_key=True) # Format: YYYY-MM
+    rent_payment_id = Column(Integer, ForeignKey("rent_payments.id"))
+    room_number = Column(String)
+    occupants = Column(Integer)
+    rent_amount = Column(Float)
+    energy_units = Column(Float) # this student's share of the room's kWh
+    energy_amount = Column(Float)
+    penalty_amount = Column(Float)
+    total = Column(Float)
+    inputs_hash = Column(String)
+    generated_at = Column(DateTime)
+
+class PaymentReview(Base):
+    __tablename__ = "payment_reviews"
+    # Bank statement lines reconciliation couldn't match (see reconciliation.py)
+
+    id = Column(Integer, primary_key=True, index=True)
+    statement = Column(String) # uploaded file name
+    line = Column(Integer)
+    txn_date = Column(Date, nullable=True)
+    amount = Column(Float, nullable=True)
+    reference = Column(String, nullable=True)
+    narration = Column(Text, nullable=True)
+    phone = Column(String, nullable=True)
+    reason = Column(String)
+    status = Column(String, default="open", index=True) # open, applied, dismissed
+    rent_payment_id = Column(Integer, ForeignKey("rent_payments.id"), nullable=True) # set when applied
+    created_at = Column(DateTime, default=datetime.now)
+    resolved_at = Column(DateTime, nullable=True)
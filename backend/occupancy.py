@@ -0,0 +1,52 @@
+from sqlalchemy import update, func
+from sqlalchemy.orm import Session
+try:
+    from . import models
+except ImportError:
+    import models
+
+# rooms.current_occupancy is a maintained count of active students per room.
+# Every write that creates, moves or deactivates a student calls student_changed()
+# inside its own transaction; reconcile() repairs drift with one GROUP BY.
+
+def adjust(db: Session, room_number: str, delta: int):
+    if not room_number or not delta:
+        return
+    db.execute(
+        update(models.Room)
+        .where(models.Room.number == room_number)
+        .values(current_occupancy=func.max(models.Room.current_occupancy + delta, 0))
+    )
+
+def student_changed(db: Session, old_room, old_active, new_room, new_active):
+    """Moves one unit of occupancy from the student's old placement to the new one.
+
+    Returns the room numbers that changed so callers can publish them after commit.
+    """
+    old = old_room if old_active else None
+    new = new_room if new_active else None
+    if old == new:
+        return []
+    adjust(db, old, -1)
+    adjust(db, new, +1)
+    return [n for n in (old, new) if n]
+
+def reconcile(db: Session):
+    """Recounts active students per room and fixes any room that drifted. Returns the fixes."""
+    counts = dict(
+        db.query(models.Student.room_number, func.count(models.Student.id))
+        .filter(models.Student.is_active == True)
+        .group_by(models.Student.room_number)
+        .all()
+    )
+
+    fixes = []
+    for room_id, number, occupancy in db.query(models.Room.id, models.Room.number, models.Room.current_occupancy).all():
+        actual = counts.get(number, 0)
+        if occupancy != actual:
+            fixes.append({"id": room_id, "room_number": number, "was": occupancy, "current_occupancy": actual})
+
+    if fixes:
+        db.execute(update(models.Room), [{"id": f["id"], "current_occupancy": f["current_occupancy"]} for f in fixes])
+    db.commit()
+    return [{k: v for k, v in f.items() if k != "id"} for f in fixes]
@@ -0,0 +1,254 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+from pydantic import ValidationError
+from sqlalchemy import insert, func
+from sqlalchemy.exc import IntegrityError
+try:
+    from . import models, schemas, database, occupancy, auth, config
+except ImportError:
+    import models, schemas, database, occupancy, auth, config
+
+# Bulk onboarding from an uploaded CSV or NDJSON file. The file is read record
+# by record; every IMPORT_BATCH_ROWS records are validated together (one query
+# for duplicates already in the database), inserted with one executemany and
+# committed. Bad rows are reported with their line number and skipped, the rest
+# of the file still loads. Room occupancy is recounted once at the end.
+# Students must name an existing room with a free bed: rooms and their active
+# occupants are loaded once per import and counted down as rows are accepted.
+
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str, content_type: str = None):
+    name = (filename or "").lower()
+    if name.endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return None
+
+
+def read_records(fileobj, fmt: str):
+    """Yields (line number, dict or error message) without loading the whole file."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                # Empty cells mean "not given", so schema defaults apply
+                yield reader.line_num, {
+                    k.strip(): v.strip() for k, v in record.items() if k and v is not None and v.strip()
+                }
+        else:
+            for line_no, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, f"invalid JSON: {e}"
+                    continue
+                yield line_no, record if isinstance(record, dict) else "expected a JSON object"
+    finally:
+        text.detach()
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+
+
+class StudentSpec:
+    model = models.Student
+    key = "phone"
+    new_rooms = False
+
+    @staticmethod
+    def parse(record: dict):
+        if isinstance(record, dict) and "password" not in record and record.get("phone"):
+            # Same rule as the legacy password migration: phone until the student changes it
+            record = {**record, "password": str(record["phone"])}
+        return schemas.StudentCreate(**record).dict()
+
+    @staticmethod
+    def context(db):
+        """Room capacities and active occupants, once per import."""
+        capacity = dict(db.query(models.Room.number, models.Room.capacity))
+        occupied = Counter(dict(
+            db.query(models.Student.room_number, func.count(models.Student.id))
+            .filter(models.Student.is_active == True)
+            .group_by(models.Student.room_number)
+        ))
+        return {"capacity": capacity, "occupied": occupied}
+
+    @staticmethod
+    def admit(context, row):
+        """None if the row fits, otherwise why not. Takes the bed when it does."""
+        room = row["room_number"]
+        if room not in context["capacity"]:
+            return f"room {room!r} does not exist"
+        if row.get("is_active", True):
+            if context["occupied"][room] >= (context["capacity"][room] or 0):
+                return f"room {room!r} is full"
+            context["occupied"][room] += 1
+        return None
+
+    @staticmethod
+    def prepare(rows):
+        hashes = auth.hash_imported_passwords([row["password"] for row in rows])
+        for row, hashed in zip(rows, hashes):
+            row["password"] = hashed
+        return rows
+
+
+class RoomSpec:
+    model = models.Room
+    key = "number"
+    new_rooms = True  # inserted rows are rooms to publish
+
+    @staticmethod
+    def parse(record: dict):
+        return {**schemas.RoomCreate(**record).dict(), "current_occupancy": 0}
+
+    @staticmethod
+    def context(db):
+        return None
+
+    @staticmethod
+    def admit(context, row):
+        return None
+
+    @staticmethod
+    def prepare(rows):
+        return rows
+
+
+SPECS = {"students": StudentSpec, "rooms": RoomSpec}
+
+
+class Importer:
+    def __init__(self, spec, batch_rows: int = None, max_errors: int = None):
+        self.spec = spec
+        self.batch_rows = max(1, batch_rows or config.IMPORT_BATCH_ROWS)
+        self.max_errors = config.IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.seen = set()
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.new_rooms = []
+        self.context = None
+
+    def _error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def _validate(self, db, batch):
+        key = self.spec.key
+        valid = []
+        for line, record in batch:
+            if isinstance(record, str):
+                self._error(line, record)
+                continue
+            try:
+                row = self.spec.parse(record)
+            except ValidationError as e:
+                self._error(line, _validation_message(e))
+                continue
+            if row[key] in self.seen:
+                self._error(line, f"duplicate {key} {row[key]!r} in file")
+                continue
+            self.seen.add(row[key])
+            valid.append((line, row))
+
+        # One lookup per batch for rows that already exist
+        column = getattr(self.spec.model, key)
+        existing = {
+            value for (value,) in
+            db.query(column).filter(column.in_([row[key] for _, row in valid])).all()
+        } if valid else set()
+        accepted = []
+        for line, row in valid:
+            if row[key] in existing:
+                self._error(line, f"{key} {row[key]!r} already exists")
+                continue
+            problem = self.spec.admit(self.context, row)
+            if problem:
+                self._error(line, problem)
+            else:
+                accepted.append((line, row))
+        return accepted
+
+    def _insert(self, db, accepted, rows):
+        try:
+            db.execute(insert(self.spec.model), rows)
+            db.commit()
+            inserted = rows
+        except IntegrityError:
+            # Lost a race with another writer: retry row by row to find the culprits
+            db.rollback()
+            inserted = []
+            for (line, _), row in zip(accepted, rows):
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(self.spec.model), [row])
+                    inserted.append(row)
+                except IntegrityError as e:
+                    self._error(line, f"rejected by database: {e.orig}")
+            db.commit()
+        self.inserted += len(inserted)
+        if self.spec.new_rooms:
+            self.new_rooms.extend(row["number"] for row in inserted)
+
+    def _flush(self, read_db, db, batch):
+        # Validation and password hashing happen outside the write transaction,
+        # so the write lock is only held for the executemany itself
+        accepted = self._validate(read_db, batch)
+        read_db.rollback()
+        if accepted:
+            rows = self.spec.prepare([row for _, row in accepted])
+            self._insert(db, accepted, rows)
+
+    def run(self, records):
+        read_db = database.ReadSessionLocal()
+        db = database.SessionLocal()
+        try:
+            self.context = self.spec.context(read_db)
+            read_db.rollback()
+            batch = []
+            for item in records:
+                batch.append(item)
+                self.rows += 1
+                if len(batch) >= self.batch_rows:
+                    self._flush(read_db, db, batch)
+                    batch = []
+            if batch:
+                self._flush(read_db, db, batch)
+
+            # Once for the whole file instead of one adjustment per student
+            return occupancy.reconcile(db)
+        finally:
+            read_db.close()
+            db.close()
+
+
+def import_file(kind: str, fileobj, fmt: str):
+    """Loads one uploaded file; returns the summary and the room numbers to publish."""
+    started = time.perf_counter()
+    importer = Importer(SPECS[kind])
+    fixes = importer.run(read_records(fileobj, fmt))
+    summary = {
+        "kind": kind,
+        "format": fmt,
+        "rows": importer.rows,
+        "inserted": importer.inserted,
+        "failed": importer.failed,
+        "errors": importer.errors,
+        "errors_truncated": importer.failed > len(importer.errors),
+        "occupancy_fixes": len(fixes),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return summary, importer.new_rooms + [f["room_number"] for f in fixes]
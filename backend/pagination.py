@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import tuple_, literal, type_coerce, String
+
+# Keyset pagination: pages are addressed by an opaque cursor holding the
+# (sort_key, id) of the last row served, so page N costs the same as page 1.
+#
+# Datetime sort keys are carried as the text SQLite actually stores. Rows
+# written by func.now() hold 'YYYY-MM-DD HH:MM:SS' while a bound datetime
+# renders with microseconds, so comparing against the parsed value would put
+# every row of the same second before the bound and serve it again.
+
+MAX_LIMIT = 500
+
+class RawKey(str):
+    """A sort key exactly as stored, compared as text."""
+
+def _stored_key(query, sort_column, id_column, row_id):
+    # One primary key lookup for the last row of the page
+    return RawKey(query.session.query(type_coerce(sort_column, String))
+                  .filter(id_column == row_id).scalar())
+
+def encode_cursor(sort_value, row_id) -> str:
+    if isinstance(sort_value, RawKey):
+        payload = ["raw", str(sort_value), row_id]
+    elif isinstance(sort_value, datetime):
+        payload = ["dt", sort_value.isoformat(), row_id]
+    elif isinstance(sort_value, date):
+        payload = ["d", sort_value.isoformat(), row_id]
+    else:
+        payload = ["v", sort_value, row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        kind, value, row_id = json.loads(raw)
+        if kind == "dt":
+            value = datetime.fromisoformat(value)
+        elif kind == "d":
+            value = date.fromisoformat(value)
+        elif kind == "raw":
+            value = RawKey(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate(query, sort_column, id_column, cursor: str = None, limit: int = 100, descending: bool = False):
+    """Applies keyset ordering/filtering to `query`.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page. Rows must
+    expose the sort and id columns as attributes (ORM entities or labeled tuples).
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    same_column = sort_column is id_column
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        if same_column:
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            if isinstance(value, RawKey):
+                key = tuple_(type_coerce(sort_column, String), id_column)
+                bound = tuple_(literal(str(value), String), last_id)
+            else:
+                key = tuple_(sort_column, id_column)
+                bound = tuple_(value, last_id)
+            query = query.filter(key < bound if descending else key > bound)
+
+    if same_column:
+        order = [id_column.desc() if descending else id_column.asc()]
+    else:
+        order = [sort_column.desc(), id_column.desc()] if descending else [sort_column.asc(), id_column.asc()]
+
+    rows = query.order_by(*order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    sort_value, last_id = getattr(last, sort_column.key), getattr(last, id_column.key)
+    if isinstance(sort_value, datetime):
+        sort_value = _stored_key(query, sort_column, id_column, last_id)
+    return rows, encode_cursor(sort_value, last_id)
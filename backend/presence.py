@@ -0,0 +1,95 @@
+import threading
+from datetime import datetime
+from sqlalchemy import update, case, desc, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+try:
+    from . import models, config
+except ImportError:
+    import models, config
+
+# With no gate history a student is assumed to be inside, so their first scan is OUT
+DEFAULT_STATE = "IN"
+
+
+class PresenceTracker:
+    """Current IN/OUT state per student.
+
+    The source of truth is the student_presence table, flipped with a single
+    UPDATE ... RETURNING so concurrent workers can't both write the same event.
+    Reads go to the table too (a primary-key lookup), since another worker may
+    have flipped the state since this one last saw it. Within a process, scans
+    for one student serialize on a striped lock.
+    """
+
+    def __init__(self, stripes: int):
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+
+    def _lock_for(self, student_id: int):
+        return self._locks[student_id % len(self._locks)]
+
+    def _ensure_row(self, db: Session, student_id: int):
+        # First scan since the table was introduced: seed from the gate log once
+        last = db.query(models.GateEntry.event_type)\
+            .filter(models.GateEntry.student_id == student_id)\
+            .order_by(desc(models.GateEntry.timestamp))\
+            .first()
+        state = last.event_type if last else DEFAULT_STATE
+        db.execute(sqlite_insert(models.StudentPresence).values(
+            student_id=student_id, state=state, updated_at=datetime.now()
+        ).on_conflict_do_nothing(index_elements=["student_id"]))
+
+    @staticmethod
+    def _flip(db: Session, student_id: int, now: datetime):
+        presence = models.StudentPresence
+        return db.execute(
+            update(presence)
+            .where(presence.student_id == student_id)
+            .values(state=case((presence.state == "OUT", "IN"), else_="OUT"), updated_at=now)
+            .returning(presence.state)
+        ).scalar_one_or_none()
+
+    def toggle(self, db: Session, student_id: int) -> models.GateEntry:
+        """Flips the student's state and logs the matching gate entry in one transaction.
+
+        `db` must be a write session with no transaction open yet: its BEGIN IMMEDIATE
+        has to come after the stripe lock, or two scans can wait on each other.
+        """
+        with self._lock_for(student_id):
+            now = datetime.now()
+            new_state = self._flip(db, student_id, now)
+            if new_state is None:
+                # No presence row yet: seed it from the gate log, then flip
+                self._ensure_row(db, student_id)
+                new_state = self._flip(db, student_id, now)
+
+            entry = models.GateEntry(student_id=student_id, event_type=new_state, timestamp=now)
+            db.add(entry)
+            db.commit()
+            db.refresh(entry)
+            return entry
+
+    def state_of(self, db: Session, student_id: int) -> str:
+        row = db.query(models.StudentPresence.state).filter(models.StudentPresence.student_id == student_id).first()
+        if row:
+            return row.state
+        last = db.query(models.GateEntry.event_type)\
+            .filter(models.GateEntry.student_id == student_id)\
+            .order_by(desc(models.GateEntry.timestamp))\
+            .first()
+        return last.event_type if last else DEFAULT_STATE
+
+    def summary(self, db: Session):
+        # Every active student counts; no presence row yet means DEFAULT_STATE
+        state = func.coalesce(models.StudentPresence.state, DEFAULT_STATE)
+        counts = dict(
+            db.query(state, func.count(models.Student.id))
+            .outerjoin(models.StudentPresence, models.StudentPresence.student_id == models.Student.id)
+            .filter(models.Student.is_active == True)
+            .group_by(state)
+            .all()
+        )
+        return {"in": counts.get("IN", 0), "out": counts.get("OUT", 0)}
+
+
+tracker = PresenceTracker(config.GATE_LOCK_STRIPES)
@@ -0,0 +1,258 @@
+import re
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy import insert, update, case
+from sqlalchemy.orm import Session
+try:
+    from . import models, database, config
+    from .onboarding import read_records
+except ImportError:
+    import models, database, config
+    from onboarding import read_records
+
+# Bank statement reconciliation. Open rent payments (unpaid / late) are loaded
+# once into in-memory hash indexes; the statement is then streamed line by line
+# and every credit is matched in O(1):
+#
+#   1. a payment reference in the reference/narration ("RP-1234" -> payment 1234)
+#   2. the payer's phone number -> that student's open payment for the amount
+#   3. amount + month, only when exactly one open payment fits
+#
+# Matches are marked paid and misses are written to payment_reviews, in batches
+# of RECONCILE_BATCH_ROWS per transaction. The index is a snapshot, so marking
+# paid is conditional on the payment still being open: a line whose payment was
+# settled meanwhile (another upload, a manual entry) goes to review instead.
+
+OPEN_STATUSES = ("unpaid", "late")
+
+REFERENCE_RE = re.compile(r"\bRP[-/ ]?(\d+)\b", re.IGNORECASE)
+
+# Header aliases seen in bank exports -> our field names
+FIELDS = {
+    "date": "txn_date", "txn_date": "txn_date", "value_date": "txn_date", "transaction_date": "txn_date",
+    "amount": "amount", "credit": "amount", "credit_amount": "amount", "deposit": "amount", "deposit_amount": "amount",
+    "debit": "debit", "debit_amount": "debit", "withdrawal": "debit", "withdrawal_amount": "debit",
+    "reference": "reference", "ref": "reference", "ref_no": "reference", "utr": "reference",
+    "narration": "narration", "description": "narration", "remarks": "narration",
+    "phone": "phone", "mobile": "phone",
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%d-%b-%Y", "%d %b %Y")
+
+
+def normalize_phone(value) -> str:
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits[-10:] if len(digits) >= 10 else digits
+
+
+def _parse_date(value):
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_amount(value):
+    try:
+        return round(float(str(value).replace(",", "").strip()), 2)
+    except ValueError:
+        return None
+
+
+def _previous_month(month: str) -> str:
+    year, mon = map(int, month.split("-"))
+    return f"{year - 1}-12" if mon == 1 else f"{year}-{mon - 1:02d}"
+
+
+class OpenPayments:
+    """Hash indexes over the open payments; matched payments are taken out of all three."""
+
+    def __init__(self, db: Session):
+        self.by_id = {}
+        self.by_phone = defaultdict(list)
+        self.by_amount_month = defaultdict(list)
+        rows = db.query(
+            models.RentPayment.id, models.RentPayment.amount, models.RentPayment.month, models.Student.phone
+        ).join(models.Student, models.Student.id == models.RentPayment.student_id)\
+            .filter(models.RentPayment.status.in_(OPEN_STATUSES))\
+            .order_by(models.RentPayment.month, models.RentPayment.id)
+        for row in rows:
+            payment = (row.id, round(row.amount or 0.0, 2), row.month, normalize_phone(row.phone))
+            self.by_id[row.id] = payment
+            self.by_phone[payment[3]].append(payment)
+            self.by_amount_month[(payment[1], payment[2])].append(payment)
+
+    def take(self, payment):
+        del self.by_id[payment[0]]
+        self.by_phone[payment[3]].remove(payment)
+        self.by_amount_month[(payment[1], payment[2])].remove(payment)
+
+    def match(self, amount, month, reference_text, phone):
+        """Returns (payment, None) or (None, reason)."""
+        ref = REFERENCE_RE.search(reference_text or "")
+        if ref:
+            payment = self.by_id.get(int(ref.group(1)))
+            if payment is None:
+                return None, "reference has no open payment"
+            if payment[1] != amount:
+                return None, "amount differs from referenced payment"
+            return payment, None
+
+        if phone:
+            candidates = [p for p in self.by_phone.get(phone, ()) if p[1] == amount]
+            if candidates:
+                # Same month first, then the oldest outstanding one
+                same_month = [p for p in candidates if p[2] == month]
+                return (same_month or candidates)[0], None
+
+        if month:
+            # Rent for a month is often paid early in the next one
+            for key in ((amount, month), (amount, _previous_month(month))):
+                candidates = self.by_amount_month.get(key, ())
+                if len(candidates) == 1:
+                    return candidates[0], None
+                if len(candidates) > 1:
+                    return None, "several open payments with this amount and month"
+        return None, "no matching open payment"
+
+
+class Reconciler:
+    def __init__(self, statement: str, batch_rows: int = None):
+        self.statement = statement
+        self.batch_rows = max(1, batch_rows or config.RECONCILE_BATCH_ROWS)
+        self.paid = []
+        self.reviews = []
+        self.counts = {"lines": 0, "matched": 0, "queued": 0, "ignored": 0, "amount_matched": 0.0}
+
+    def _line(self, index: OpenPayments, line: int, record):
+        if isinstance(record, str):
+            self._queue(line, {}, None, None, record)
+            return
+        fields = {}
+        for key, value in record.items():
+            name = FIELDS.get(str(key).strip().lower().replace(" ", "_"))
+            if name and value not in (None, ""):
+                fields[name] = value
+
+        amount = _parse_amount(fields.get("amount", ""))
+        debit = _parse_amount(fields.get("debit", ""))
+        if (amount is not None and amount <= 0) or (amount is None and debit):
+            self.counts["ignored"] += 1  # debits and zero lines aren't rent
+            return
+        txn_date = _parse_date(fields.get("txn_date", ""))
+        if amount is None:
+            self._queue(line, fields, txn_date, None, "missing or invalid amount")
+            return
+
+        month = txn_date.strftime("%Y-%m") if txn_date else None
+        reference_text = " ".join(str(fields.get(k, "")) for k in ("reference", "narration"))
+        payment, reason = index.match(amount, month, reference_text, normalize_phone(fields.get("phone")))
+        if payment is None:
+            self._queue(line, fields, txn_date, amount, reason)
+            return
+
+        index.take(payment)
+        self.paid.append((payment[0], txn_date or date.today(), line, fields, txn_date, amount))
+        self.counts["matched"] += 1
+        self.counts["amount_matched"] += amount
+
+    def _queue(self, line, fields, txn_date, amount, reason):
+        self.reviews.append({
+            "statement": self.statement,
+            "line": line,
+            "txn_date": txn_date,
+            "amount": amount,
+            "reference": str(fields["reference"]) if "reference" in fields else None,
+            "narration": str(fields["narration"]) if "narration" in fields else None,
+            "phone": str(fields["phone"]) if "phone" in fields else None,
+            "reason": reason,
+            "status": "open",
+            "created_at": datetime.now(),
+        })
+        self.counts["queued"] += 1
+
+    def _flush(self, db: Session):
+        if self.paid:
+            # One guarded UPDATE for the batch; RETURNING says which payments were still open
+            payment = models.RentPayment
+            won = set(db.execute(
+                update(payment)
+                .where(payment.id.in_([p[0] for p in self.paid]), payment.status.in_(OPEN_STATUSES))
+                .values(status="paid", payment_date=case({p[0]: p[1] for p in self.paid}, value=payment.id))
+                .returning(payment.id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+            for payment_id, _, line, fields, txn_date, amount in self.paid:
+                if payment_id not in won:
+                    self.counts["matched"] -= 1
+                    self.counts["amount_matched"] -= amount
+                    self._queue(line, fields, txn_date, amount, "payment was settled by another update")
+        if self.reviews:
+            db.execute(insert(models.PaymentReview), self.reviews)
+        if self.paid or self.reviews:
+            db.commit()
+        self.paid, self.reviews = [], []
+
+    def run(self, records):
+        read_db = database.ReadSessionLocal()
+        try:
+            index = OpenPayments(read_db)
+        finally:
+            read_db.close()
+
+        db = database.SessionLocal()
+        try:
+            for line, record in records:
+                self.counts["lines"] += 1
+                self._line(index, line, record)
+                if len(self.paid) + len(self.reviews) >= self.batch_rows:
+                    self._flush(db)
+            self._flush(db)
+        finally:
+            db.close()
+        self.counts["amount_matched"] = round(self.counts["amount_matched"], 2)
+        return self.counts
+
+
+def reconcile_file(fileobj, fmt: str, statement: str):
+    started = time.perf_counter()
+    counts = Reconciler(statement).run(read_records(fileobj, fmt))
+    counts.update({"statement": statement, "format": fmt, "seconds": round(time.perf_counter() - started, 3)})
+    return counts
+
+
+def apply_review(db: Session, review: models.PaymentReview, payment_id: int = None):
+    """Resolves a queued line: applied to `payment_id` (marked paid) or dismissed.
+
+    LookupError if the payment doesn't exist, ValueError if it isn't open any
+    more or its amount differs from the statement line.
+    """
+    if payment_id is not None:
+        payment = models.RentPayment
+        row = db.query(payment.status, payment.amount).filter(payment.id == payment_id).first()
+        if row is None:
+            raise LookupError("Payment not found")
+        if row.status not in OPEN_STATUSES:
+            raise ValueError(f"Payment is {row.status}, not open")
+        if review.amount is not None and round(row.amount or 0.0, 2) != round(review.amount, 2):
+            raise ValueError(f"Payment amount {row.amount} differs from the statement line ({review.amount})")
+        applied = db.execute(
+            update(payment)
+            .where(payment.id == payment_id, payment.status.in_(OPEN_STATUSES))
+            .values(status="paid", payment_date=review.txn_date or date.today())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not applied:
+            raise ValueError("Payment is not open")
+        review.status = "applied"
+        review.rent_payment_id = payment_id
+    else:
+        review.status = "dismissed"
+    review.resolved_at = datetime.now()
+    db.commit()
+    return review
@@ -0,0 +1,222 @@
+import gzip
+import json
+import os
+from datetime import date, datetime
+from sqlalchemy import select, delete, DateTime
+try:
+    from . import models, database, config
+except ImportError:
+    import models, database, config
+
+# Tables with an archive, with the column that decides a row's age and partition
+ARCHIVABLE = {
+    "gate_entries": (models.GateEntry, "timestamp"),
+    "attendance_logs": (models.AttendanceLog, "date"),
+    "laundry_usage": (models.LaundryUsage, "usage_date"),
+    "electricity_readings": (models.ElectricityReading, "reading_date"),
+}
+
+# Raw rows that live reports and rollup rebuilds still read. Moving them out
+# would turn archived days into absences and let a rebuild wipe their history,
+# so `archive` refuses them; files written before this rule stay readable.
+KEEP_LIVE = {
+    "attendance_logs": "/attendance/report/range and the attendance rollup rebuild read it",
+    "electricity_readings": "the electricity rollup rebuild recomputes from it",
+}
+
+UNDATED = "undated"
+
+
+def _spec(table_name: str):
+    if table_name not in ARCHIVABLE:
+        raise KeyError(table_name)
+    model, time_attr = ARCHIVABLE[table_name]
+    return model.__table__, model.__table__.c[time_attr]
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return None
+    return value
+
+
+def _partition(value) -> str:
+    return value.strftime("%Y-%m") if value is not None else UNDATED
+
+
+def _partition_path(table_name: str, partition: str) -> str:
+    return os.path.join(config.ARCHIVE_DIR, table_name, f"{partition}.ndjson.gz")
+
+
+def _append(table_name: str, partition: str, records):
+    """Appends one gzip member to the partition file and fsyncs it.
+
+    Concatenated gzip members read back as one stream, so every batch can append
+    without rewriting the file.
+    """
+    path = _partition_path(table_name, partition)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records).encode()
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+            gz.write(payload)
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive(table_name: str, cutoff: datetime, batch_rows: int = None, max_batches: int = None):
+    """Moves rows older than `cutoff` from `table_name` into monthly archive files.
+
+    Works in id order, `batch_rows` at a time: read the batch from a snapshot,
+    append it to its partition files, then delete it and advance the cursor in
+    one short write transaction, so other writers get the lock between batches.
+    A crash after the file append but before the commit leaves the batch in the
+    table and it is archived again on the next run; readers drop the duplicate ids.
+    """
+    table, time_col = _spec(table_name)
+    if table_name in KEEP_LIVE:
+        raise ValueError(f"{table_name} stays in the database: {KEEP_LIVE[table_name]}")
+    batch_rows = max(1, batch_rows or config.ARCHIVE_BATCH_ROWS)
+    bound = cutoff if isinstance(time_col.type, DateTime) else cutoff.date()
+
+    archived = 0
+    batches = 0
+    done = False
+    while max_batches is None or batches < max_batches:
+        # Select on a read snapshot and write the files with no lock held; the
+        # write transaction below only deletes and moves the cursor
+        read_db = database.ReadSessionLocal()
+        try:
+            cursor = read_db.get(models.ArchiveCursor, table_name)
+            # New cutoff: rows below the old cursor may now qualify too
+            last_id = cursor.last_id if cursor is not None and cursor.cutoff == cutoff else 0
+            rows = read_db.execute(
+                select(table)
+                .where(time_col < bound, table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_rows)
+            ).all()
+        finally:
+            read_db.close()
+
+        if rows:
+            by_partition = {}
+            for row in rows:
+                record = {k: _plain(v) for k, v in row._mapping.items()}
+                by_partition.setdefault(_partition(row._mapping[time_col.key]), []).append(record)
+            for partition, records in by_partition.items():
+                _append(table_name, partition, records)
+
+        db = database.SessionLocal()
+        try:
+            cursor = db.get(models.ArchiveCursor, table_name)
+            if cursor is None:
+                cursor = models.ArchiveCursor(table_name=table_name, last_id=0, archived_rows=0)
+                db.add(cursor)
+            cursor.cutoff = cutoff
+            cursor.updated_at = datetime.now()
+            if rows:
+                first_id, last_id = rows[0].id, rows[-1].id
+                db.execute(
+                    delete(table)
+                    .where(table.c.id >= first_id, table.c.id <= last_id, time_col < bound)
+                )
+                cursor.last_id = last_id
+                cursor.archived_rows = (cursor.archived_rows or 0) + len(rows)
+            else:
+                cursor.last_id = last_id
+            db.commit()
+        finally:
+            db.close()
+
+        if not rows:
+            done = True
+            break
+        archived += len(rows)
+        batches += 1
+
+    return {"table": table_name, "cutoff": cutoff.isoformat(), "archived": archived, "batches": batches, "done": done}
+
+
+def partitions(table_name: str):
+    """Archive files of a table as [{partition, bytes}], oldest first."""
+    _spec(table_name)
+    folder = os.path.join(config.ARCHIVE_DIR, table_name)
+    if not os.path.isdir(folder):
+        return []
+    result = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".ndjson.gz"):
+            result.append({
+                "partition": name[:-len(".ndjson.gz")],
+                "bytes": os.path.getsize(os.path.join(folder, name))
+            })
+    return result
+
+
+def read_archive(table_name: str, start: date = None, end: date = None, filters: dict = None):
+    """Yields archived rows (as dicts) whose time falls in [start, end], oldest partition first.
+
+    Only the monthly files overlapping the range are opened. `filters` are exact
+    matches on columns, e.g. {"student_id": 12}; a column the table doesn't
+    have is a ValueError (raised here, before any file is read).
+    """
+    table, time_col = _spec(table_name)
+    filters = {k: v for k, v in (filters or {}).items() if v is not None}
+    unknown = sorted(set(filters) - set(table.c.keys()))
+    if unknown:
+        raise ValueError(f"{table_name} can't be filtered by {', '.join(unknown)}")
+    return _scan_archive(table_name, time_col, start, end, filters)
+
+
+def _scan_archive(table_name, time_col, start, end, filters):
+    lo = start.isoformat() if start else None
+    hi = end.isoformat() if end else None
+
+    for part in partitions(table_name):
+        month = part["partition"]
+        if month != UNDATED:
+            if lo and month < lo[:7]:
+                continue
+            if hi and month > hi[:7]:
+                continue
+        elif lo or hi:
+            continue
+
+        seen = set()
+        with gzip.open(_partition_path(table_name, month), "rt") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["id"] in seen:
+                    continue
+                seen.add(record["id"])
+
+                stamp = record.get(time_col.key)
+                if lo and (stamp is None or stamp[:len(lo)] < lo):
+                    continue
+                if hi and (stamp is None or stamp[:len(hi)] > hi):
+                    continue
+                if any(record.get(k) != v for k, v in filters.items()):
+                    continue
+                yield record
+
+
+def status(db):
+    cursors = {c.table_name: c for c in db.query(models.ArchiveCursor).all()}
+    result = []
+    for table_name in ARCHIVABLE:
+        cursor = cursors.get(table_name)
+        files = partitions(table_name)
+        result.append({
+            "table": table_name,
+            "archived_rows": cursor.archived_rows if cursor else 0,
+            "cutoff": cursor.cutoff if cursor else None,
+            "last_id": cursor.last_id if cursor else 0,
+            "updated_at": cursor.updated_at if cursor else None,
+            "partitions": len(files),
+            "bytes": sum(f["bytes"] for f in files),
+            "archiving": table_name not in KEEP_LIVE,
+        })
+    return result
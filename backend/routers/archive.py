@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+try: from .. import database, retention
+except ImportError:
+    import sys
+    sys.path.append("..")
+    import database, retention
+
+router = APIRouter(
+    prefix="/archive",
+    tags=["archive"]
+)
+
+def retention_cutoff(days: int) -> datetime:
+    # Midnight-aligned so repeated runs on the same day share a cursor and resume
+    if days < 1:
+        raise HTTPException(status_code=400, detail="Days must be positive")
+    return datetime.combine(date.today() - timedelta(days=days), time.min)
+
+def _check_table(table: str):
+    if table not in retention.ARCHIVABLE:
+        raise HTTPException(status_code=404, detail=f"Unknown table, expected one of {', '.join(retention.ARCHIVABLE)}")
+
+@router.get("/status")
+def archive_status(db: Session = Depends(database.get_read_db)):
+    return retention.status(db)
+
+@router.post("/{table}/run")
+def run_archive(table: str, days: int = 180, max_batches: int = None):
+    # Archives rows older than `days`; max_batches bounds one call, repeat to continue
+    _check_table(table)
+    try:
+        return retention.archive(table, retention_cutoff(days), max_batches=max_batches)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{table}/partitions")
+def list_partitions(table: str):
+    _check_table(table)
+    return retention.partitions(table)
+
+@router.get("/{table}")
+def read_archived(table: str, start: date = None, end: date = None, student_id: int = None,
+                  room_number: str = None, limit: int = 1000):
+    # Audit reads over archived history; only partitions overlapping [start, end] are opened
+    _check_table(table)
+    limit = max(1, min(limit, 10000))
+    try:
+        rows = retention.read_archive(table, start, end, {"student_id": student_id, "room_number": room_number})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = list(islice(rows, limit + 1))
+    return {"items": items[:limit], "truncated": len(items) > limit}
@@ -6,6 +6,9 @@ except ImportError:
     import sys
     sys.path.append("..")
     import models, schemas, database
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
 
 router = APIRouter(
     prefix="/complaints",
@@ -13,20 +16,20 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.Complaint)
-def create_complaint(complaint: schemas.ComplaintCreate, db: Session = Depends(database.get_db)):
+def create_complaint(complaint: schemas.ComplaintCreate, db: Session = Depends(database.get_write_db)):
     db_complaint = models.Complaint(**complaint.dict())
     db.add(db_complaint)
     db.commit()
     db.refresh(db_complaint)
     return db_complaint
 
-@router.get("/", response_model=List[schemas.Complaint])
-def read_complaints(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    complaints = db.query(models.Complaint).offset(skip).limit(limit).all()
-    return complaints
+@router.get("/", response_model=schemas.ComplaintPage)
+def read_complaints(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
+    complaints, next_cursor = paginate(db.query(models.Complaint), models.Complaint.id, models.Complaint.id, cursor, limit)
+    return {"items": complaints, "next_cursor": next_cursor}
 
 @router.put("/{complaint_id}", response_model=schemas.Complaint)
-def update_complaint(complaint_id: int, complaint: schemas.ComplaintUpdate, db: Session = Depends(database.get_db)):
+def update_complaint(complaint_id: int, complaint: schemas.ComplaintUpdate, db: Session = Depends(database.get_write_db)):
     db_complaint = db.query(models.Complaint).filter(models.Complaint.id == complaint_id).first()
     if db_complaint is None:
         raise HTTPException(status_code=404, detail="Complaint not found")
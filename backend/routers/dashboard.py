@@ -0,0 +1,56 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from typing import Optional
+try: from .. import auth, cache, dashboard
+except ImportError:
+    import sys
+    sys.path.append("..")
+    import auth, cache, dashboard
+try: from .students import get_current_principal
+except ImportError:
+    from routers.students import get_current_principal
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"]
+)
+
+@router.get("/summary")
+async def read_summary(days: Optional[int] = None,
+                       if_none_match: Optional[str] = Header(None),
+                       principal: Optional[auth.Principal] = Depends(get_current_principal)):
+    # One small response for the overview page, shaped by who is asking
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Login required")
+    if days is not None and days < 1:
+        raise HTTPException(status_code=400, detail="Days must be positive")
+
+    if principal.role == "admin":
+        key, tables = f"admin|{days}", dashboard.ADMIN_TABLES
+    else:
+        days = days or 30
+        key, tables = f"student|{principal.id}|{principal.room_number}|{days}", dashboard.STUDENT_TABLES
+
+    etag = cache.etag_for(key, tables, daily=True)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and cache.etag_matches(if_none_match, etag):
+        dashboard.summaries.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    cached = dashboard.summaries.get(key, etag)
+    if cached is not None:
+        return Response(content=cached[1], media_type="application/json", headers=headers)
+
+    if principal.role == "admin":
+        summary = await dashboard.admin_summary(days)
+    else:
+        summary = await dashboard.student_summary(principal, days)
+    body = json.dumps(jsonable_encoder(summary)).encode()
+    dashboard.summaries.put(key, etag, b"application/json", body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/cache")
+def read_summary_cache_stats():
+    return dashboard.summaries.stats()
@@ -6,6 +6,9 @@ except ImportError:
     import sys
     sys.path.append("..")
     import models, schemas, database
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
 
 router = APIRouter(
     prefix="/discipline",
@@ -13,14 +16,14 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.DisciplineLog)
-def create_discipline_log(log: schemas.DisciplineLogCreate, db: Session = Depends(database.get_db)):
+def create_discipline_log(log: schemas.DisciplineLogCreate, db: Session = Depends(database.get_write_db)):
     db_log = models.DisciplineLog(**log.dict())
     db.add(db_log)
     db.commit()
     db.refresh(db_log)
     return db_log
 
-@router.get("/", response_model=List[schemas.DisciplineLog])
-def read_discipline_logs(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    logs = db.query(models.DisciplineLog).offset(skip).limit(limit).all()
-    return logs
+@router.get("/", response_model=schemas.DisciplineLogPage)
+def read_discipline_logs(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
+    logs, next_cursor = paginate(db.query(models.DisciplineLog), models.DisciplineLog.id, models.DisciplineLog.id, cursor, limit)
+    return {"items": logs, "next_cursor": next_cursor}
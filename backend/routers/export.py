@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import date
+try: from .. import export
+except ImportError:
+    import sys
+    sys.path.append("..")
+    import export
+
+router = APIRouter(
+    prefix="/export",
+    tags=["export"]
+)
+
+@router.get("/{table}")
+def export_table(table: str, format: str = "csv", start: date = None, end: date = None,
+                 student_id: int = None, room_number: str = None):
+    # e.g. /export/gate_entries?format=csv&start=2024-01-01&end=2024-12-31
+    if table not in export.EXPORTABLE:
+        raise HTTPException(status_code=404, detail=f"Unknown table, expected one of {', '.join(export.EXPORTABLE)}")
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of {', '.join(export.FORMATS)}")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    stmt = export.build_query(table, start, end, student_id, room_number)
+    filename = "_".join(filter(None, [table, start and start.isoformat(), end and end.isoformat()])) + f".{format}"
+    return StreamingResponse(
+        export.stream(stmt, format),
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
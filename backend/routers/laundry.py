@@ -6,6 +6,9 @@ except ImportError:
     import sys
     sys.path.append("..")
     import models, schemas, database
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
 
 router = APIRouter(
     prefix="/laundry",
@@ -13,15 +16,15 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.LaundryUsage)
-def log_laundry_usage(usage: schemas.LaundryUsageCreate, db: Session = Depends(database.get_db)):
+def log_laundry_usage(usage: schemas.LaundryUsageCreate, db: Session = Depends(database.get_write_db)):
     db_usage = models.LaundryUsage(**usage.dict())
     db.add(db_usage)
     db.commit()
     db.refresh(db_usage)
     return db_usage
 
-@router.get("/", response_model=List[schemas.LaundryUsage])
-def read_laundry_usage(skip: int = 0, limit: int = 100, date: str = None, db: Session = Depends(database.get_db)):
+@router.get("/", response_model=schemas.LaundryUsagePage)
+def read_laundry_usage(cursor: str = None, limit: int = 100, date: str = None, db: Session = Depends(database.get_read_db)):
     query = db.query(models.LaundryUsage)
     if date:
         # Filter where usage_date contains the date string (simple text matching for SQLite date strings)
@@ -29,5 +32,5 @@ def read_laundry_usage(skip: int = 0, limit: int = 100, date: str = None, db: Se
         # Assuming format YYYY-MM-DD
         query = query.filter(models.LaundryUsage.usage_date.like(f"{date}%"))
     
-    usage = query.offset(skip).limit(limit).all()
-    return usage
+    usage, next_cursor = paginate(query, models.LaundryUsage.id, models.LaundryUsage.id, cursor, limit)
+    return {"items": usage, "next_cursor": next_cursor}
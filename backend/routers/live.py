@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+try: from .. import config
+except ImportError:
+    import sys
+    sys.path.append("..")
+    import config
+try: from ..events import hub
+except ImportError:
+    from events import hub
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"]
+)
+
+def _format(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+@router.get("/stream")
+async def stream_events(request: Request, topics: str = None):
+    # Server-Sent Events: `room` deltas, `gate` events and `resync` when the client fell behind.
+    # topics=room,gate limits what this connection receives.
+    subscription = hub.subscribe(topics.split(",") if topics else None)
+
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await subscription.get(timeout=config.EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _format(event)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+def get_event_stats():
+    return hub.stats()
@@ -1,16 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 try:
-    from backend.database import get_db
+    from backend.database import get_read_db, get_write_db
     from backend.models import MarketplaceItem, Student
     from backend.routers.students import get_current_student
+    from backend.pagination import paginate
+    from backend.serialize import page_response, row_dicts
+    from backend import search
+    from backend.auth import Principal
 except ImportError:
-    from database import get_db
+    from database import get_read_db, get_write_db
     from models import MarketplaceItem, Student
     from routers.students import get_current_student
+    from pagination import paginate
+    from serialize import page_response, row_dicts
+    import search
+    from auth import Principal
 
 router = APIRouter(
     prefix="/marketplace",
@@ -41,51 +51,61 @@ class ItemResponse(BaseModel):
     class Config:
         orm_mode = True
 
-@router.get("/items", response_model=List[ItemResponse])
-def get_available_items(db: Session = Depends(get_db)):
-    items = db.query(MarketplaceItem).filter(MarketplaceItem.status == "Available").order_by(MarketplaceItem.created_at.desc()).all()
-    
-    # Enrich response with seller details
-    response = []
-    for item in items:
-        response.append({
-            "id": item.id,
-            "seller_id": item.seller_id,
-            "title": item.title,
-            "description": item.description,
-            "price": item.price,
-            "condition": item.condition,
-            "status": item.status,
-            "image_url": item.image_url,
-            "created_at": item.created_at,
-            "seller_name": item.seller.name if item.seller else "Unknown",
-            "seller_room": item.seller.room_number if item.seller else "N/A"
-        })
-    return response
+class ItemPage(BaseModel):
+    items: List[ItemResponse]
+    next_cursor: Optional[str] = None
+
+def _item_rows(db: Session):
+    # Items joined with their seller as flat rows, shaped like ItemResponse
+    return db.query(
+        MarketplaceItem.id,
+        MarketplaceItem.seller_id,
+        MarketplaceItem.title,
+        MarketplaceItem.description,
+        MarketplaceItem.price,
+        MarketplaceItem.condition,
+        MarketplaceItem.status,
+        MarketplaceItem.image_url,
+        MarketplaceItem.created_at,
+        func.coalesce(Student.name, "Unknown").label("seller_name"),
+        func.coalesce(Student.room_number, "N/A").label("seller_room")
+    ).outerjoin(Student, Student.id == MarketplaceItem.seller_id)
+
+@router.get("/items", response_model=ItemPage)
+def get_available_items(q: str = None, min_price: float = None, max_price: float = None, condition: str = None,
+                        cursor: str = None, limit: int = 50, db: Session = Depends(get_read_db)):
+    query = _item_rows(db).filter(MarketplaceItem.status == "Available")
+    if min_price is not None:
+        query = query.filter(MarketplaceItem.price >= min_price)
+    if max_price is not None:
+        query = query.filter(MarketplaceItem.price <= max_price)
+    if condition:
+        query = query.filter(MarketplaceItem.condition == condition)
+
+    expression = search.match_expression(q)
+    if expression is None:
+        # Plain browse: newest first
+        items, next_cursor = paginate(query, MarketplaceItem.created_at, MarketplaceItem.id, cursor, limit, descending=True)
+        return page_response(items, next_cursor)
+
+    # Search: FTS5 match, best bm25 first, keyset on (relevance, id)
+    relevance = search.relevance().label("relevance")
+    query = query.add_columns(relevance)\
+        .join(search.fts_table, search.fts_table.c.rowid == MarketplaceItem.id)\
+        .filter(search.matches(expression))
+    items, next_cursor = paginate(query, relevance, MarketplaceItem.id, cursor, limit)
+    return page_response(items, next_cursor)
 
 @router.get("/my-items", response_model=List[ItemResponse])
-def get_my_items(current_student: Student = Depends(get_current_student), db: Session = Depends(get_db)):
-    items = db.query(MarketplaceItem).filter(MarketplaceItem.seller_id == current_student.id).order_by(MarketplaceItem.created_at.desc()).all()
-    
-    response = []
-    for item in items:
-        response.append({
-            "id": item.id,
-            "seller_id": item.seller_id,
-            "title": item.title,
-            "description": item.description,
-            "price": item.price,
-            "condition": item.condition,
-            "status": item.status,
-            "image_url": item.image_url,
-            "created_at": item.created_at,
-            "seller_name": current_student.name,
-            "seller_room": current_student.room_number
-        })
-    return response
+def get_my_items(current_student: Principal = Depends(get_current_student), db: Session = Depends(get_read_db)):
+    items = _item_rows(db)\
+        .filter(MarketplaceItem.seller_id == current_student.id)\
+        .order_by(MarketplaceItem.created_at.desc())\
+        .all()
+    return JSONResponse(row_dicts(items))
 
 @router.post("/items", response_model=ItemResponse)
-def create_item(item: ItemCreate, current_student: Student = Depends(get_current_student), db: Session = Depends(get_db)):
+def create_item(item: ItemCreate, current_student: Principal = Depends(get_current_student), db: Session = Depends(get_write_db)):
     db_item = MarketplaceItem(
         seller_id=current_student.id,
         title=item.title,
@@ -113,7 +133,7 @@ def create_item(item: ItemCreate, current_student: Student = Depends(get_current
     }
 
 @router.put("/items/{item_id}/sold")
-def mark_as_sold(item_id: int, current_student: Student = Depends(get_current_student), db: Session = Depends(get_db)):
+def mark_as_sold(item_id: int, current_student: Principal = Depends(get_current_student), db: Session = Depends(get_write_db)):
     item = db.query(MarketplaceItem).filter(MarketplaceItem.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -125,7 +145,7 @@ def mark_as_sold(item_id: int, current_student: Student = Depends(get_current_st
     return {"message": "Marked as sold"}
 
 @router.delete("/items/{item_id}")
-def delete_item(item_id: int, current_student: Student = Depends(get_current_student), db: Session = Depends(get_db)):
+def delete_item(item_id: int, current_student: Principal = Depends(get_current_student), db: Session = Depends(get_write_db)):
     item = db.query(MarketplaceItem).filter(MarketplaceItem.id == item_id).first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
@@ -1,57 +1,120 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
-# import face_recognition
-import random
-import time
-try: from .. import models, schemas, database
+from sqlalchemy import update
+try: from .. import models, schemas, database, config, workers
 except ImportError:
     import sys
     sys.path.append("..")
-    import models, schemas, database
+    import models, schemas, database, config, workers
+try: from ..face_index import face_index, extract_embedding, encode_embedding
+except ImportError:
+    from face_index import face_index, extract_embedding, encode_embedding
 
 router = APIRouter(
     prefix="/mess",
     tags=["mess"]
 )
 
-@router.post("/enroll/{student_id}")
-async def enroll_face(student_id: int, file: UploadFile = File(...), db: Session = Depends(database.get_db)):
-    # Simulation Mode
-    time.sleep(1) 
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-        
-    student.face_encoding = "simulated_encoding_123"
-    db.commit()
-    return {"message": "Face enrolled successfully (Simulation Mode)"}
+# Recognition + DB work for the kiosks runs here, never on the event loop.
+mess_pool = workers.BoundedPool("mess", config.MESS_WORKERS, config.MESS_QUEUE_DEPTH)
 
-@router.post("/verify")
-async def verify_face(file: UploadFile = File(...), db: Session = Depends(database.get_db)):
-    # Simulation Mode
-    time.sleep(1.5)
-    
-    # 70% chance of success for demo purposes
-    if random.choice([True, True, True, False, True, False, True]): 
-        student = db.query(models.Student).filter(models.Student.meal_credits > 0).first()
+def _enroll_sync(student_id: int, image: bytes):
+    embedding = extract_embedding(image)
+    if embedding is None:
+        raise HTTPException(status_code=400, detail="No face detected in image")
+
+    # Index load (first call reads every embedding) on the read side, so the
+    # write lock is only held for the one UPDATE
+    read_db = database.ReadSessionLocal()
+    try:
+        face_index.ensure_loaded(read_db)
+    finally:
+        read_db.close()
+
+    db = database.SessionLocal()
+    try:
+        result = db.execute(
+            update(models.Student)
+            .where(models.Student.id == student_id)
+            .values(face_encoding=encode_embedding(embedding))
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Student not found")
+        db.commit()
+    finally:
+        db.close()
+
+    face_index.enrolled(student_id, embedding)
+    return {"message": "Face enrolled successfully"}
+
+def _verify_sync(image: bytes):
+    embedding = extract_embedding(image)
+    if embedding is None:
+        return {"status": "denied", "reason": "No face detected"}
+
+    # Matching and the student lookup run on a read snapshot; only the credit
+    # decrement takes the write lock
+    read_db = database.ReadSessionLocal()
+    try:
+        face_index.ensure_loaded(read_db)
+        matches = face_index.search(embedding, k=config.FACE_TOP_K)
+        if not matches or matches[0][1] < config.FACE_MATCH_THRESHOLD:
+            return {
+                "status": "denied",
+                "reason": "Face Not Recognized"
+            }
+
+        student = read_db.query(models.Student.id, models.Student.name)\
+            .filter(models.Student.id == matches[0][0]).first()
         if not student:
-             return {"status": "denied", "reason": "No students with credits found"}
+            face_index.remove(matches[0][0])
+            return {"status": "denied", "reason": "Face Not Recognized"}
+    finally:
+        read_db.close()
 
-        student.meal_credits -= 1
+    db = database.SessionLocal()
+    try:
+        # Conditional decrement so two kiosks can't both spend the last credit
+        credits = db.execute(
+            update(models.Student)
+            .where(models.Student.id == student.id, models.Student.meal_credits > 0)
+            .values(meal_credits=models.Student.meal_credits - 1)
+            .returning(models.Student.meal_credits)
+        ).scalar()
         db.commit()
-        
-        return {
-            "status": "authorized",
-            "student": student.name,
-            "credits": student.meal_credits
-        }
-    else:
-        return {
-            "status": "denied",
-            "reason": "Face Not Recognized"
-        }
+    finally:
+        db.close()
+    if credits is None:
+        return {"status": "denied", "reason": "No meal credits left"}
+
+    return {
+        "status": "authorized",
+        "student": student.name,
+        "credits": credits,
+        "confidence": round(matches[0][1], 4)
+    }
+
+async def _run_on_pool(fn, *args):
+    try:
+        return await mess_pool.run(fn, *args)
+    except workers.PoolSaturated:
+        raise HTTPException(status_code=503, detail="Mess kiosks are busy, please retry")
+
+@router.post("/enroll/{student_id}")
+async def enroll_face(student_id: int, file: UploadFile = File(...)):
+    image = await file.read()
+    return await _run_on_pool(_enroll_sync, student_id, image)
+
+@router.post("/verify")
+async def verify_face(file: UploadFile = File(...)):
+    image = await file.read()
+    return await _run_on_pool(_verify_sync, image)
+
+@router.get("/pool")
+def get_pool_stats():
+    return mess_pool.stats()
 
 @router.get("/credits/{student_id}")
-def get_credits(student_id: int, db: Session = Depends(database.get_db)):
+def get_credits(student_id: int, db: Session = Depends(database.get_read_db)):
     student = db.query(models.Student).filter(models.Student.id == student_id).first()
     return {"credits": student.meal_credits if student else 0}
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import func, insert
+from typing import List, Optional
 from datetime import date, timedelta
 import random
-try: from .. import models, schemas, database
+import json
+try: from .. import models, schemas, database, energy
 except ImportError:
     import sys
     sys.path.append("..")
-    import models, schemas, database
+    import models, schemas, database, energy
+try: from ..ingest import reading_writer, QueueFull
+except ImportError:
+    from ingest import reading_writer, QueueFull
 
 router = APIRouter(
     prefix="/monitoring",
@@ -16,10 +22,9 @@ router = APIRouter(
 )
 
 @router.post("/simulate")
-def simulate_readings(db: Session = Depends(database.get_db)):
+def simulate_readings(db: Session = Depends(database.get_write_db)):
     # 1. Get all unique rooms from students
-    students = db.query(models.Student).all()
-    rooms = set(s.room_number for s in students if s.room_number)
+    rooms = [r for (r,) in db.query(models.Student.room_number).distinct().all() if r]
     
     # 2. Clear existing readings to avoid duplicates in this simple sim
     db.query(models.ElectricityReading).delete()
@@ -38,35 +43,48 @@ def simulate_readings(db: Session = Depends(database.get_db)):
             if day.weekday() >= 5: 
                 usage += random.uniform(1.0, 3.0)
                 
-            readings.append(models.ElectricityReading(
-                room_number=room,
-                reading_date=day,
-                units_kwh=usage
-            ))
+            readings.append({
+                "room_number": room,
+                "reading_date": day,
+                "units_kwh": usage
+            })
             
-    db.add_all(readings)
+    if readings:
+        db.execute(insert(models.ElectricityReading), readings)
+    # Table was wiped, so rebuild the rollups rather than adding to them
+    energy.rebuild_rollups(db)
     db.commit()
     
     return {"message": f"Simulated {len(readings)} readings for {len(rooms)} rooms"}
 
+def _check_days(days: Optional[int]):
+    if days is not None and days < 1:
+        raise HTTPException(status_code=400, detail="days must be positive")
+
 @router.get("/stats/{student_id}")
-def get_student_stats(student_id: int, db: Session = Depends(database.get_db)):
+def get_student_stats(student_id: int, days: int = 30, db: Session = Depends(database.get_read_db)):
+    _check_days(days)
     student = db.query(models.Student).filter(models.Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
-        
-    readings = db.query(models.ElectricityReading)\
-        .filter(models.ElectricityReading.room_number == student.room_number)\
-        .order_by(models.ElectricityReading.reading_date)\
+
+    # Daily totals for the room straight from the rollup table
+    since = date.today() - timedelta(days=days - 1)
+    rollup = models.ElectricityDailyRollup
+    readings = [
+        {"room_number": student.room_number, "reading_date": day, "units_kwh": round(units, 2)}
+        for day, units in db.query(rollup.day, rollup.units_kwh)
+        .filter(rollup.room_number == student.room_number, rollup.day >= since)
+        .order_by(rollup.day)
         .all()
-        
-    total_units = sum(r.units_kwh for r in readings)
+    ]
+
+    total_units = energy.usage_by_room(db, days, student.room_number).get(student.room_number, 0.0)
     avg_daily = total_units / len(readings) if readings else 0
     projected_units = avg_daily * 30
     
-    # Simple rate: ₹10 per unit
-    projected_bill = round(projected_units * 10, 2)
-    current_bill = round(total_units * 10, 2)
+    projected_bill = energy.bill(projected_units)
+    current_bill = energy.bill(total_units)
     
     return {
         "room_number": student.room_number,
@@ -78,32 +96,86 @@ def get_student_stats(student_id: int, db: Session = Depends(database.get_db)):
     }
 
 @router.get("/admin-stats")
-def get_admin_stats(db: Session = Depends(database.get_db)):
-    readings = db.query(models.ElectricityReading).all()
-    
-    # Aggregate Totals
-    total_units = sum(r.units_kwh for r in readings)
-    total_bill = round(total_units * 10, 2) # Rate 10
-    
-    # Group by Room
-    room_stats = {}
-    for r in readings:
-        if r.room_number not in room_stats:
-            room_stats[r.room_number] = 0
-        room_stats[r.room_number] += r.units_kwh
-        
-    # Convert to list and sort by usage desc
-    sorted_rooms = []
-    for room, units in room_stats.items():
-        sorted_rooms.append({
+def get_admin_stats(days: Optional[int] = None, db: Session = Depends(database.get_read_db)):
+    # days=7/30/365 for a window, omit for all time. Reads rollups only.
+    _check_days(days)
+    room_units = energy.usage_by_room(db, days)
+
+    total_units = sum(room_units.values())
+    sorted_rooms = [
+        {
             "room_number": room,
             "total_units": round(units, 2),
-            "bill": round(units * 10, 2)
-        })
-    sorted_rooms.sort(key=lambda x: x['total_units'], reverse=True)
+            "bill": energy.bill(units)
+        }
+        for room, units in sorted(room_units.items(), key=lambda x: x[1], reverse=True)
+    ]
     
     return {
+        "days": days,
         "total_units": round(total_units, 2),
-        "total_bill": total_bill,
+        "total_bill": energy.bill(total_units),
         "room_breakdown": sorted_rooms
     }
+
+@router.post("/rollups/rebuild")
+def rebuild_energy_rollups(db: Session = Depends(database.get_write_db)):
+    energy.rebuild_rollups(db)
+    db.commit()
+    return {"message": "Electricity rollups rebuilt"}
+
+MAX_REPORTED_ERRORS = 20
+
+def _ingest_sync(body: bytes, ndjson: bool):
+    # JSON parsing, validation and queueing are per-row CPU work: kept off the event loop
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+    else:
+        try:
+            items = json.loads(body or b"[]")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array")
+        lines = items
+
+    rows, errors = [], []
+    for index, line in enumerate(lines):
+        try:
+            item = json.loads(line) if isinstance(line, (bytes, str)) else line
+            reading = schemas.ElectricityReadingIn(**item)
+        except (ValueError, TypeError, ValidationError) as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"index": index, "error": str(e).splitlines()[0]})
+            continue
+        # Stored as naive local time like every other timestamp: convert offsets
+        # first, so "...Z" and "...+05:30" for the same instant dedupe as one
+        stamp = reading.timestamp
+        if stamp.tzinfo is not None:
+            stamp = stamp.astimezone().replace(tzinfo=None)
+        rows.append({
+            "room_number": reading.room_number,
+            "reading_date": stamp.date(),
+            "reading_time": stamp,
+            "units_kwh": reading.units_kwh,
+        })
+
+    try:
+        reading_writer.submit(rows)
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Ingestion backlog is full, retry later")
+
+    return {"accepted": len(rows), "rejected": len(lines) - len(rows), "errors": errors}
+
+@router.post("/readings", status_code=202)
+async def ingest_readings(request: Request):
+    """Accepts a JSON array or NDJSON (application/x-ndjson) of
+    {room_number, timestamp, units_kwh}. Rows are buffered and written in
+    batches; a reading already stored for the same room and timestamp is ignored."""
+    body = await request.body()
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    return await run_in_threadpool(_ingest_sync, body, ndjson)
+
+@router.get("/ingest/metrics")
+def get_ingest_metrics():
+    return reading_writer.metrics()
@@ -7,6 +7,9 @@ except ImportError:
     import sys
     sys.path.append("..")
     import models, schemas, database
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
 
 router = APIRouter(
     prefix="/parcels",
@@ -14,7 +17,7 @@ router = APIRouter(
 )
 
 @router.post("/receive", response_model=schemas.Parcel)
-def receive_parcel(parcel: schemas.ParcelCreate, db: Session = Depends(database.get_db)):
+def receive_parcel(parcel: schemas.ParcelCreate, db: Session = Depends(database.get_write_db)):
     # Generate 4-digit code
     code = str(random.randint(1000, 9999))
     
@@ -30,21 +33,23 @@ def receive_parcel(parcel: schemas.ParcelCreate, db: Session = Depends(database.
     db.refresh(new_parcel)
     return new_parcel
 
-@router.get("/pending", response_model=list[schemas.Parcel])
-def get_pending_parcels(db: Session = Depends(database.get_db)):
+@router.get("/pending", response_model=schemas.ParcelPage)
+def get_pending_parcels(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
     # Return all waiting parcels (Joined with Student for UI convenience if needed, 
     # but for now returning raw parcel objects. Frontend can match names or we can upgrade schema)
-    return db.query(models.Parcel).filter(models.Parcel.status == "Waiting").all()
+    query = db.query(models.Parcel).filter(models.Parcel.status == "Waiting")
+    parcels, next_cursor = paginate(query, models.Parcel.id, models.Parcel.id, cursor, limit)
+    return {"items": parcels, "next_cursor": next_cursor}
 
 @router.get("/my-parcels/{student_id}", response_model=list[schemas.Parcel])
-def get_my_parcels(student_id: int, db: Session = Depends(database.get_db)):
+def get_my_parcels(student_id: int, db: Session = Depends(database.get_read_db)):
     return db.query(models.Parcel).filter(
         models.Parcel.student_id == student_id,
         models.Parcel.status == "Waiting"
     ).all()
 
 @router.post("/collect/{parcel_id}")
-def collect_parcel(parcel_id: int, db: Session = Depends(database.get_db)):
+def collect_parcel(parcel_id: int, db: Session = Depends(database.get_write_db)):
     parcel = db.query(models.Parcel).filter(models.Parcel.id == parcel_id).first()
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
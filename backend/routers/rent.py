@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
-try: from .. import models, schemas, database
+try: from .. import models, schemas, database, billing, reconciliation, onboarding
 except ImportError:
     import sys
     sys.path.append("..")
-    import models, schemas, database
+    import models, schemas, database, billing, reconciliation, onboarding
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
+try: from .students import get_admin
+except ImportError:
+    from routers.students import get_admin
 
 router = APIRouter(
     prefix="/rent",
@@ -13,18 +19,70 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.RentPayment)
-def create_rent_payment(payment: schemas.RentPaymentCreate, db: Session = Depends(database.get_db)):
+def create_rent_payment(payment: schemas.RentPaymentCreate, db: Session = Depends(database.get_write_db)):
     db_payment = models.RentPayment(**payment.dict())
     db.add(db_payment)
     db.commit()
     db.refresh(db_payment)
     return db_payment
 
-@router.get("/", response_model=List[schemas.RentPayment])
-def read_rent_payments(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    payments = db.query(models.RentPayment).offset(skip).limit(limit).all()
-    return payments
+@router.get("/", response_model=schemas.RentPaymentPage)
+def read_rent_payments(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
+    payments, next_cursor = paginate(db.query(models.RentPayment), models.RentPayment.id, models.RentPayment.id, cursor, limit)
+    return {"items": payments, "next_cursor": next_cursor}
 
 @router.get("/pending", response_model=List[schemas.RentPayment])
-def read_pending_payments(db: Session = Depends(database.get_db)):
-    return db.query(models.RentPayment).filter(models.RentPayment.status != "paid").all()
+def read_pending_payments(db: Session = Depends(database.get_read_db)):
+    # IN on the indexed status column instead of a != scan of the whole ledger
+    return db.query(models.RentPayment)\
+        .filter(models.RentPayment.status.in_(reconciliation.OPEN_STATUSES))\
+        .all()
+
+def _check_month(month: str):
+    try:
+        billing.month_bounds(month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/billing/{month}/run", dependencies=[Depends(get_admin)])
+def run_billing(month: str, db: Session = Depends(database.get_write_db)):
+    # Safe to repeat: only new students and bills whose inputs changed are written
+    _check_month(month)
+    return billing.run(db, month)
+
+@router.get("/billing/{month}")
+def read_billing_summary(month: str, db: Session = Depends(database.get_read_db)):
+    _check_month(month)
+    return billing.summary(db, month)
+
+@router.post("/reconcile", dependencies=[Depends(get_admin)])
+def reconcile_statement(file: UploadFile = File(...), format: str = None):
+    # Bank export (CSV/NDJSON) with date, amount and reference/narration/phone columns.
+    # Matched credits mark payments paid; the rest land in /rent/review.
+    fmt = format or onboarding.detect_format(file.filename, file.content_type)
+    if fmt not in onboarding.FORMATS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass format=csv|ndjson")
+    return reconciliation.reconcile_file(file.file, fmt, file.filename or "statement")
+
+@router.get("/review", response_model=schemas.PaymentReviewPage)
+def read_review_queue(status: str = "open", cursor: str = None, limit: int = 100,
+                      db: Session = Depends(database.get_read_db)):
+    query = db.query(models.PaymentReview).filter(models.PaymentReview.status == status)
+    items, next_cursor = paginate(query, models.PaymentReview.id, models.PaymentReview.id, cursor, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.put("/review/{review_id}", response_model=schemas.PaymentReview, dependencies=[Depends(get_admin)])
+def resolve_review(review_id: int, resolution: schemas.PaymentReviewResolve,
+                   db: Session = Depends(database.get_write_db)):
+    review = db.get(models.PaymentReview, review_id)
+    if review is None:
+        raise HTTPException(status_code=404, detail="Review item not found")
+    if review.status != "open":
+        raise HTTPException(status_code=400, detail=f"Already {review.status}")
+    try:
+        return reconciliation.apply_review(db, review, resolution.rent_payment_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,30 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-try: from .. import models, schemas, database
+try: from .. import models, schemas, database, occupancy
 except ImportError:
     import sys
     sys.path.append("..")
-    import models, schemas, database
+    import models, schemas, database, occupancy
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
+try: from ..events import publish_rooms
+except ImportError:
+    from events import publish_rooms
 
 router = APIRouter(
     prefix="/rooms",
     tags=["rooms"]
 )
 
-@router.get("/", response_model=List[schemas.Room])
-def read_rooms(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    rooms = db.query(models.Room).offset(skip).limit(limit).all()
-    
-    # Dynamic Occupancy Calculation
-    for room in rooms:
-        student_count = db.query(models.Student).filter(models.Student.room_number == room.number).count()
-        room.current_occupancy = student_count
-        
-    return rooms
+@router.get("/", response_model=schemas.RoomPage)
+def read_rooms(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
+    # current_occupancy is maintained on student writes (see occupancy.py)
+    rooms, next_cursor = paginate(db.query(models.Room), models.Room.id, models.Room.id, cursor, limit)
+    return {"items": rooms, "next_cursor": next_cursor}
+
+@router.post("/reconcile")
+def reconcile_occupancy(db: Session = Depends(database.get_write_db)):
+    fixes = occupancy.reconcile(db)
+    publish_rooms(db, [f["room_number"] for f in fixes])
+    return {"message": f"Corrected {len(fixes)} rooms", "fixes": fixes}
 
 @router.get("/{room_id}", response_model=schemas.Room)
-def read_room(room_id: int, db: Session = Depends(database.get_db)):
+def read_room(room_id: int, db: Session = Depends(database.get_read_db)):
     room = db.query(models.Room).filter(models.Room.id == room_id).first()
     if room is None:
         raise HTTPException(status_code=404, detail="Room not found")
@@ -1,78 +1,211 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File
 from sqlalchemy.orm import Session
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
-try: from .. import models, schemas, database
+try: from .. import models, schemas, database, occupancy, config, auth, workers, onboarding
 except ImportError:
     import sys
     sys.path.append("..")
-    import models, schemas, database
+    import models, schemas, database, occupancy, config, auth, workers, onboarding
+try: from ..events import publish_rooms, hub, room_payload
+except ImportError:
+    from events import publish_rooms, hub, room_payload
+try: from ..pagination import paginate
+except ImportError:
+    from pagination import paginate
 
-def get_current_student(
+def get_current_principal(
+    authorization: Optional[str] = Header(None),
     x_student_id: Optional[str] = Header(None, alias="X-Student-ID"),
-    db: Session = Depends(database.get_db)
+    db: Session = Depends(database.get_read_db)
 ):
-    if not x_student_id:
+    # Bearer token first: signature check + cached principal, no DB on a cache hit.
+    # The db session is only opened if the cache misses.
+    if authorization and authorization.lower().startswith("bearer "):
+        claims = auth.decode_access_token(authorization[7:].strip())
+        if claims is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        if claims.get("role") == "admin":
+            return auth.ADMIN
+        try:
+            student_id = int(claims.get("sub"))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+    elif x_student_id and config.AUTH_ALLOW_LEGACY_HEADER:
+        # Unsigned header from older clients, only when explicitly allowed (see config)
+        try:
+            student_id = int(x_student_id)
+        except ValueError:
+            return None
+    else:
         return None # Or raise 401
-    
-    # Try parsing as int
-    try:
-        student_id = int(x_student_id)
-    except ValueError:
-        return None
 
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
-    if not student:
+    principal = auth.principals.get(db, student_id)
+    if principal is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return student
+    return principal
+
+def get_current_student(principal: Optional[auth.Principal] = Depends(get_current_principal)):
+    # Student-only endpoints: admins have no student row to act as
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if principal.role != "student":
+        raise HTTPException(status_code=403, detail="Students only")
+    return principal
+
+def get_admin(principal: Optional[auth.Principal] = Depends(get_current_principal)):
+    # Admin-only endpoints (bulk imports, billing runs, statement uploads)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if principal.role != "admin":
+        raise HTTPException(status_code=403, detail="Admins only")
+    return principal
 
 router = APIRouter(
     prefix="/students",
     tags=["students"]
 )
 
-@router.post("/login", response_model=schemas.Student)
-def login_student(credentials: schemas.StudentLogin, db: Session = Depends(database.get_db)):
-    student = db.query(models.Student).filter(models.Student.phone == credentials.phone).first()
-    if not student:
-        raise HTTPException(status_code=400, detail="Incorrect phone number")
-    
-    # Simple direct comparison for prototype. In production, use bcrypt.
-    if student.password != credentials.password:
+def _login_sync(phone: str, password: str):
+    # Lookup and bcrypt verify (~250 ms) on a read snapshot: a write session would
+    # hold SQLite's write lock (BEGIN IMMEDIATE) for the whole verify
+    db = database.ReadSessionLocal()
+    try:
+        student = db.query(models.Student).filter(models.Student.phone == phone).first()
+        if not student:
+            raise HTTPException(status_code=400, detail="Incorrect phone number")
+        result = {key: getattr(student, key) for key in schemas.StudentBase.model_fields}
+        result["id"] = student.id
+        stored = student.password
+    finally:
+        db.close()
+
+    ok, new_hash = auth.verify_password(password, stored)
+    if not ok:
         raise HTTPException(status_code=400, detail="Incorrect password")
-        
-    return student
+    if new_hash:
+        # Legacy plaintext (or weaker) password: store the bcrypt hash now, in a
+        # short write that only replaces the value we verified against
+        db = database.SessionLocal()
+        try:
+            db.execute(
+                update(models.Student)
+                .where(models.Student.id == result["id"], models.Student.password == stored)
+                .values(password=new_hash)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    principal = auth.Principal(id=result["id"], role="student", name=result["name"], room_number=result["room_number"])
+    result["access_token"] = auth.create_access_token(principal)
+    return result
+
+@router.post("/login", response_model=schemas.StudentToken)
+async def login_student(credentials: schemas.StudentLogin):
+    try:
+        return await auth.hash_pool.run(_login_sync, credentials.phone, credentials.password)
+    except workers.PoolSaturated:
+        raise HTTPException(status_code=503, detail="Too many logins in progress, please retry")
+
+@router.post("/admin/login", response_model=schemas.AdminToken)
+def login_admin(credentials: schemas.AdminLogin):
+    # Single admin account from config (ADMIN_USERNAME / ADMIN_PASSWORD)
+    valid = auth.credentials_match(credentials.username, config.ADMIN_USERNAME) & \
+        auth.credentials_match(credentials.password, config.ADMIN_PASSWORD)
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid admin credentials")
+    return {"access_token": auth.create_access_token(auth.ADMIN)}
+
+@router.get("/auth/cache")
+def read_auth_cache_stats():
+    return {"principals": auth.principals.stats(), "hash_pool": auth.hash_pool.stats()}
 
 @router.post("/", response_model=schemas.Student)
-def create_student(student: schemas.StudentCreate, db: Session = Depends(database.get_db)):
+def create_student(student: schemas.StudentCreate, db: Session = Depends(database.get_write_db)):
     # Default password to phone number if not provided (handling old clients or manual creation) purely logic-side
     # Schema requires password now, so it must be passed
-    db_student = models.Student(**student.dict())
+    fields = student.dict()
+    fields["password"] = auth.hash_password(fields["password"])
+    db_student = models.Student(**fields)
     db.add(db_student)
+    touched = occupancy.student_changed(db, None, False, db_student.room_number, db_student.is_active)
     db.commit()
     db.refresh(db_student)
+    publish_rooms(db, touched)
     return db_student
 
-@router.get("/", response_model=List[schemas.Student])
-def read_students(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    students = db.query(models.Student).offset(skip).limit(limit).all()
-    return students
+def _import_upload(kind: str, file: UploadFile, format: Optional[str]):
+    fmt = format or onboarding.detect_format(file.filename, file.content_type)
+    if fmt not in onboarding.FORMATS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .ndjson file, or pass format=csv|ndjson")
+    summary, touched = onboarding.import_file(kind, file.file, fmt)
+    db = database.ReadSessionLocal()
+    try:
+        publish_rooms(db, touched)
+    finally:
+        db.close()
+    return summary
+
+@router.post("/import", dependencies=[Depends(get_admin)])
+def import_students(file: UploadFile = File(...), format: Optional[str] = None):
+    # Semester onboarding: name, phone, room_number, move_in_date[, is_active, password] per row.
+    # Bad rows are listed in "errors" and skipped; everything else is loaded.
+    return _import_upload("students", file, format)
+
+@router.get("/", response_model=schemas.StudentPage)
+def read_students(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
+    students, next_cursor = paginate(db.query(models.Student), models.Student.id, models.Student.id, cursor, limit)
+    return {"items": students, "next_cursor": next_cursor}
 
 @router.get("/{student_id}", response_model=schemas.Student)
-def read_student(student_id: int, db: Session = Depends(database.get_db)):
+def read_student(student_id: int, db: Session = Depends(database.get_read_db)):
     student = db.query(models.Student).filter(models.Student.id == student_id).first()
     if student is None:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
+@router.put("/{student_id}", response_model=schemas.Student)
+def update_student(student_id: int, changes: schemas.StudentUpdate, db: Session = Depends(database.get_write_db)):
+    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    old_room, old_active = student.room_number, student.is_active
+    for key, value in changes.dict(exclude_unset=True).items():
+        setattr(student, key, value)
+    try:
+        touched = occupancy.student_changed(db, old_room, old_active, student.room_number, student.is_active)
+        db.commit()
+    except IntegrityError:
+        # Phone is unique; the rollback also undoes the occupancy moves above
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Phone number already registered")
+    db.refresh(student)
+    auth.principals.invalidate(student_id)
+    publish_rooms(db, touched)
+    return student
+
 @router.post("/rooms/", tags=["rooms"], response_model=schemas.Room)
-def create_room(room: schemas.RoomCreate, db: Session = Depends(database.get_db)):
+def create_room(room: schemas.RoomCreate, db: Session = Depends(database.get_write_db)):
     db_room = models.Room(**room.dict())
+    # Students may already be assigned to this number
+    db_room.current_occupancy = db.query(models.Student)\
+        .filter(models.Student.room_number == db_room.number, models.Student.is_active == True)\
+        .count()
     db.add(db_room)
     db.commit()
     db.refresh(db_room)
+    hub.publish("room", room_payload(db_room))
     return db_room
 
-@router.get("/rooms/", tags=["rooms"], response_model=List[schemas.Room])
-def read_rooms(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    rooms = db.query(models.Room).offset(skip).limit(limit).all()
-    return rooms
+@router.post("/rooms/import", tags=["rooms"], dependencies=[Depends(get_admin)])
+def import_rooms(file: UploadFile = File(...), format: Optional[str] = None):
+    # number, capacity per row; occupancy is counted from students already assigned
+    return _import_upload("rooms", file, format)
+
+@router.get("/rooms/", tags=["rooms"], response_model=schemas.RoomPage)
+def read_rooms(cursor: str = None, limit: int = 100, db: Session = Depends(database.get_read_db)):
+    rooms, next_cursor = paginate(db.query(models.Room), models.Room.id, models.Room.id, cursor, limit)
+    return {"items": rooms, "next_cursor": next_cursor}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import date, datetime
 
 class StudentBase(BaseModel):
@@ -12,9 +12,15 @@ class StudentBase(BaseModel):
 class StudentCreate(StudentBase):
     password: str
 
+class StudentUpdate(BaseModel):
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    room_number: Optional[str] = None
+    move_out_date: Optional[date] = None
+    is_active: Optional[bool] = None
+
 class Student(StudentBase):
-    id: int
-    password: str # Include password in response just for verification in this simple app, or remove for security
+    id: int # password is input-only (StudentCreate); the stored hash never goes out
 
     class Config:
         orm_mode = True
@@ -23,6 +29,20 @@ class StudentLogin(BaseModel):
     phone: str
     password: str
 
+class StudentToken(StudentBase):
+    id: int
+    access_token: str # send as "Authorization: Bearer <token>"
+    token_type: str = "bearer"
+
+class AdminLogin(BaseModel):
+    username: str
+    password: str
+
+class AdminToken(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    role: str = "admin"
+
 class RoomBase(BaseModel):
     number: str
     capacity: int
@@ -46,6 +66,8 @@ class RentPaymentBase(BaseModel):
 
 class RentPaymentCreate(RentPaymentBase):
     student_id: int
+    # Stored statuses are exactly these; /rent/pending lists the unpaid and late ones
+    status: Literal["paid", "unpaid", "late"]
 
 class RentPayment(RentPaymentBase):
     id: int
@@ -54,6 +76,25 @@ class RentPayment(RentPaymentBase):
     class Config:
         from_attributes = True
 
+class PaymentReview(BaseModel):
+    id: int
+    statement: Optional[str] = None
+    line: Optional[int] = None
+    txn_date: Optional[date] = None
+    amount: Optional[float] = None
+    reference: Optional[str] = None
+    narration: Optional[str] = None
+    phone: Optional[str] = None
+    reason: str
+    status: str
+    rent_payment_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class PaymentReviewResolve(BaseModel):
+    rent_payment_id: Optional[int] = None # omit to dismiss the line
+
 class DisciplineLogBase(BaseModel):
     category: str
     description: str
@@ -128,6 +169,11 @@ class ElectricityReadingBase(BaseModel):
     reading_date: date
     units_kwh: float
 
+class ElectricityReadingIn(BaseModel):
+    room_number: str
+    timestamp: datetime
+    units_kwh: float
+
 class ElectricityReading(ElectricityReadingBase):
     id: int
 
@@ -141,6 +187,9 @@ class AttendanceLogBase(BaseModel):
 class AttendanceLogCreate(AttendanceLogBase):
     pass
 
+class AttendanceCheckin(AttendanceLogBase):
+    student_id: int
+
 class AttendanceLog(AttendanceLogBase):
     id: int
     student_id: int
@@ -174,3 +223,40 @@ class Parcel(ParcelBase):
     
     class Config:
         from_attributes = True
+
+# Keyset-paginated list responses: pass next_cursor back as ?cursor= for the next page
+class StudentPage(BaseModel):
+    items: List[Student]
+    next_cursor: Optional[str] = None
+
+class RoomPage(BaseModel):
+    items: List[Room]
+    next_cursor: Optional[str] = None
+
+class RentPaymentPage(BaseModel):
+    items: List[RentPayment]
+    next_cursor: Optional[str] = None
+
+class PaymentReviewPage(BaseModel):
+    items: List[PaymentReview]
+    next_cursor: Optional[str] = None
+
+class DisciplineLogPage(BaseModel):
+    items: List[DisciplineLog]
+    next_cursor: Optional[str] = None
+
+class ComplaintPage(BaseModel):
+    items: List[Complaint]
+    next_cursor: Optional[str] = None
+
+class LaundryUsagePage(BaseModel):
+    items: List[LaundryUsage]
+    next_cursor: Optional[str] = None
+
+class GateEntryPage(BaseModel):
+    items: List[GateEntry]
+    next_cursor: Optional[str] = None
+
+class ParcelPage(BaseModel):
+    items: List[Parcel]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,66 @@
+import re
+from sqlalchemy import func, literal_column, table, column
+
+# Marketplace full-text search: an external-content FTS5 table over
+# marketplace_items(title, description), kept in sync by triggers so every
+# insert path (ORM, Core bulk loads, raw SQL) is indexed.
+
+FTS_TABLE = "marketplace_fts"
+
+_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='marketplace_items', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS marketplace_items_ai AFTER INSERT ON marketplace_items BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS marketplace_items_ad AFTER DELETE ON marketplace_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS marketplace_items_au AFTER UPDATE OF title, description ON marketplace_items BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+def ensure_index(conn):
+    """Creates the FTS table and triggers if missing; a new index is built from existing rows.
+
+    Runs on the caller's connection/transaction (see migrations.py).
+    """
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    for statement in _DDL:
+        conn.exec_driver_sql(statement)
+    if not exists:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+def rebuild(engine):
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+def match_expression(text: str):
+    """User text -> safe FTS5 query: every word must match, the last one as a prefix.
+
+    Quoting each token keeps FTS5 operators and punctuation in the input from
+    being parsed as query syntax. Returns None when nothing searchable is left.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+# Lightweight handles for building queries against the virtual table
+fts_table = table(FTS_TABLE, column("rowid"))
+fts = literal_column(FTS_TABLE)
+
+def relevance():
+    # bm25 is lower-is-better; title hits weigh more than description hits
+    return func.bm25(fts, 10.0, 1.0)
+
+def matches(expression: str):
+    return fts.op("MATCH")(expression)
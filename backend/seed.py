@@ -1,7 +1,7 @@
 try:
-    from backend import models, database
+    from backend import models, database, migrations
 except ImportError:
-    import models, database
+    import models, database, migrations
 from sqlalchemy.orm import Session
 
 def seed_rooms():
@@ -41,3 +41,9 @@ def seed_rooms():
         raise e  # Re-raise to let the API know it failed
     finally:
         db.close()
+
+
+if __name__ == "__main__":
+    # One-shot: python seed.py (the API no longer seeds on import)
+    migrations.upgrade(database.engine)
+    seed_rooms()
@@ -0,0 +1,21 @@
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+
+# Fast path for big listings: rows come straight from column queries (no ORM
+# entities, no lazy loads) and are turned into plain dicts, skipping per-row
+# Pydantic construction. Output matches what the response_model would emit.
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def row_dicts(rows):
+    """Column-query rows -> list of JSON-ready dicts keyed by column label."""
+    if not rows:
+        return []
+    keys = list(rows[0]._fields)
+    return [{k: _plain(v) for k, v in zip(keys, row)} for row in rows]
+
+def page_response(rows, next_cursor):
+    return JSONResponse({"items": row_dicts(rows), "next_cursor": next_cursor})
@@ -0,0 +1,119 @@
+import threading
+import time
+from sqlalchemy import Integer, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+try:
+    from . import models, database, config
+except ImportError:
+    import models, database, config
+
+# Every known setting with its type and default. Reads of unknown keys are an error.
+SETTINGS = {
+    "HOSTEL_LAT": (float, 28.6139),
+    "HOSTEL_LNG": (float, 77.2090),
+    "GEOFENCE_RADIUS_METERS": (float, 500.0),
+}
+
+# Bumped on every write so other worker processes know to reload
+VERSION_KEY = "_settings_version"
+
+
+class SettingsCache:
+    """Typed, in-memory view of the system_settings table.
+
+    Reads are a dict lookup. Writes go through `update`, which stores the
+    values and bumps the version row in one transaction; other processes pick
+    the change up the next time they revalidate (at most every
+    SETTINGS_REFRESH_SECONDS), which costs one primary-key lookup.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._values = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self, key: str):
+        default = SETTINGS[key][1]
+        self._revalidate()
+        return self._values.get(key, default)
+
+    def all(self):
+        self._revalidate()
+        return {key: self._values.get(key, default) for key, (_, default) in SETTINGS.items()}
+
+    @property
+    def version(self):
+        return self._version
+
+    def update(self, db, values: dict):
+        """Write-through: persists `values`, bumps the version and refreshes this process."""
+        parsed = {key: self._parse(key, value, strict=True) for key, value in values.items()}
+
+        rows = [{"key": key, "value": str(value)} for key, value in parsed.items()]
+        if rows:
+            stmt = sqlite_insert(models.SystemSetting).values(rows)
+            db.execute(stmt.on_conflict_do_update(index_elements=["key"], set_={"value": stmt.excluded.value}))
+        version = self._bump_version(db)
+        db.commit()
+
+        with self._lock:
+            if self._version is not None and version == self._version + 1:
+                # No other writer since our last load: `parsed` is the whole difference
+                self._values.update(parsed)
+                self._version = version
+                self._checked_at = time.monotonic()
+            else:
+                # Another process bumped in between; its change isn't in _values,
+                # so reload everything on the next read
+                self._version = None
+        return version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def _revalidate(self):
+        if self._version is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+            db = database.ReadSessionLocal()
+            try:
+                row = db.query(models.SystemSetting.value).filter(models.SystemSetting.key == VERSION_KEY).first()
+                version = int(row.value) if row else 0
+                if version != self._version:
+                    self._values = {
+                        setting.key: self._parse(setting.key, setting.value)
+                        for setting in db.query(models.SystemSetting).filter(models.SystemSetting.key.in_(SETTINGS)).all()
+                    }
+                    self._version = version
+            finally:
+                db.close()
+            self._checked_at = time.monotonic()
+
+    def _bump_version(self, db) -> int:
+        stmt = sqlite_insert(models.SystemSetting).values(key=VERSION_KEY, value="1")
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"value": (models.SystemSetting.value.cast(Integer) + 1).cast(String)}
+        ).returning(models.SystemSetting.value)
+        return int(db.execute(stmt).scalar_one())
+
+    @staticmethod
+    def _parse(key, value, strict=False):
+        if key not in SETTINGS:
+            raise ValueError(f"Unknown setting {key}")
+        kind, default = SETTINGS[key]
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            if strict:
+                raise ValueError(f"{key} must be {kind.__name__}")
+            return default
+
+
+settings = SettingsCache(config.SETTINGS_REFRESH_SECONDS)
@@ -0,0 +1,80 @@
+import itertools
+import os
+import sys
+import tempfile
+from datetime import date
+
+# Point every module at a throwaway database before config.py is imported.
+# Run from backend/:  python -m pytest -q
+_tmp = tempfile.mkdtemp(prefix="hostel-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(_tmp, "hostel.db")
+os.environ["ARCHIVE_DIR"] = os.path.join(_tmp, "archive")
+os.environ["INGEST_SPILL_DIR"] = os.path.join(_tmp, "ingest_spill")
+os.environ.setdefault("STARTUP_WARMUP", "0")
+os.environ.setdefault("AUTH_BCRYPT_ROUNDS", "4")
+os.environ.setdefault("AUTH_DEV_MODE", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import delete
+
+import cache, database, models, migrations
+
+migrations.upgrade(database.engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    with database.engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            if table.name != "schema_version":
+                conn.execute(delete(table))
+    # Raw deletes skip the session hooks, so cached responses must be told explicitly
+    cache.bump_all()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.create_app()) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_headers(client):
+    response = client.post("/students/admin/login", json={"username": "admin", "password": "admin"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def db():
+    # No reload on attribute access after commit, which would reopen a write transaction
+    session = database.SessionLocal(expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def read_db():
+    session = database.ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+_phones = itertools.count(9000000001)
+
+
+def add_student(db, name="Student", room_number="101", **fields):
+    fields.setdefault("phone", str(next(_phones)))
+    fields.setdefault("is_active", True)
+    fields.setdefault("move_in_date", date(2024, 1, 1))
+    student = models.Student(name=name, room_number=room_number, password="x", **fields)
+    db.add(student)
+    db.commit()
+    return student
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from datetime import date, timedelta
+
+import models
+import workers
+from conftest import add_student
+from routers.attendance import apply_checkins, rebuild_daily_rollups
+from system_settings import settings
+
+FAR = 0.5  # degrees, well outside any geofence
+
+
+def _rollups(session):
+    rollup = models.AttendanceDailyRollup
+    return {(r.date, r.room_number): (r.present, r.away) for r in session.query(rollup)}
+
+
+def test_batch_upserts_todays_logs_in_one_transaction(db, read_db):
+    lat, lng = settings.get("HOSTEL_LAT"), settings.get("HOSTEL_LNG")
+    a, b = add_student(db, room_number="101"), add_student(db, room_number="102")
+
+    first = apply_checkins(db, [(a.id, lat, lng), (b.id, lat + FAR, lng), (a.id, lat + FAR, lng)])
+    # Last position wins for a repeated student, and both entries get the same row
+    assert [r["status"] for r in first] == ["Away", "Away", "Away"]
+    assert first[0]["id"] == first[2]["id"]
+
+    second = apply_checkins(db, [(a.id, lat, lng)])
+    assert second[0]["id"] == first[0]["id"] and second[0]["status"] == "Present"
+    assert read_db.query(models.AttendanceLog).count() == 2
+
+    today = date.today()
+    assert _rollups(read_db) == {(today, "101"): (1, 0), (today, "102"): (0, 1)}
+
+
+def test_micro_batcher_coalesces_concurrent_submits():
+    batches = []
+    lock = threading.Lock()
+
+    def handler(items):
+        with lock:
+            batches.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = workers.MicroBatcher(handler, max_batch=3, window_ms=50)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(submit_all()) == [0, 10, 20, 30, 40]
+    assert sorted(map(len, batches)) == [2, 3]
+    assert batcher.stats()["items"] == 5
+
+
+def _log(db, student, day, status="Present"):
+    db.add(models.AttendanceLog(student_id=student.id, date=day, status=status))
+
+
+def test_range_report_counts_days_and_streaks(client, db):
+    start = date(2024, 3, 1)
+    student = add_student(db, room_number="101")
+    add_student(db, room_number="102")  # never checked in
+    for offset in (0, 1, 4):
+        _log(db, student, start + timedelta(days=offset))
+    _log(db, student, start + timedelta(days=2), "Away")
+    db.commit()
+    rebuild_daily_rollups(db, start, start + timedelta(days=6))
+    db.commit()
+
+    body = client.get("/attendance/report/range", params={"start": "2024-03-01", "end": "2024-03-07"}).json()
+    by_room = {s["room_number"]: s for s in body["students"]}
+    assert by_room["101"] == {**by_room["101"], "days": 7, "present": 3, "absent": 4,
+                              "longest_absent_streak": 2, "current_absent_streak": 2}
+    assert by_room["102"]["present"] == 0 and by_room["102"]["longest_absent_streak"] == 7
+    assert body["stats"] == {"students": 2, "present_days": 3, "absent_days": 11}
+    assert [(r["room_number"], r["present"], r["away"]) for r in body["rooms"]] == [("101", 3, 1)]
+    assert [d["present"] for d in body["daily"]] == [1, 1, 0, 1]
+
+
+def test_rebuild_matches_incremental_rollups(db, read_db):
+    lat, lng = settings.get("HOSTEL_LAT"), settings.get("HOSTEL_LNG")
+    students = [add_student(db, room_number=room) for room in ("101", "101", "102")]
+    apply_checkins(db, [(s.id, lat, lng) for s in students[:2]] + [(students[2].id, lat + FAR, lng)])
+    apply_checkins(db, [(students[1].id, lat + FAR, lng)])
+    incremental = _rollups(read_db)
+
+    today = date.today()
+    rebuild_daily_rollups(db, today, today)
+    db.commit()
+    read_db.rollback()
+    assert _rollups(read_db) == incremental == {(today, "101"): (1, 1), (today, "102"): (0, 1)}
@@ -0,0 +1,55 @@
+import pytest
+
+import auth, config, models
+from conftest import add_student
+
+
+def _login(client, student):
+    response = client.post("/students/login", json={"phone": student.phone, "password": "x"})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_login_token_has_no_password(client, db):
+    body = _login(client, add_student(db))
+    assert "password" not in body
+    assert body["access_token"] and body["token_type"] == "bearer"
+
+
+def test_student_endpoints_do_not_return_the_password(client, db):
+    student = add_student(db)
+    assert "password" not in client.get(f"/students/{student.id}").json()
+    assert all("password" not in s for s in client.get("/students/").json()["items"])
+
+
+def test_unsigned_student_header_is_ignored(client, db):
+    student = add_student(db)
+    response = client.get("/dashboard/summary", headers={"X-Student-ID": str(student.id)})
+    assert response.status_code == 401
+    assert client.get("/marketplace/my-items", headers={"X-Student-ID": str(student.id)}).status_code == 401
+
+    token = _login(client, student)["access_token"]
+    response = client.get("/dashboard/summary", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200 and response.json()["student_id"] == student.id
+
+
+def test_admin_login_with_non_ascii_input_is_rejected(client):
+    response = client.post("/students/admin/login", json={"username": "admin", "password": "pässwörd"})
+    assert response.status_code == 400
+
+
+def test_startup_refuses_dev_secrets(monkeypatch):
+    monkeypatch.setattr(config, "AUTH_DEV_MODE", False)
+    with pytest.raises(auth.InsecureConfig):
+        auth.check_config()
+    monkeypatch.setattr(config, "AUTH_SECRET_KEY", "a-real-secret")
+    monkeypatch.setattr(config, "ADMIN_PASSWORD", "a-real-password")
+    auth.check_config()
+
+
+def test_login_upgrades_a_plaintext_password(client, db):
+    student = add_student(db)  # stored as plaintext "x"
+    _login(client, student)
+    stored = db.query(models.Student.password).filter(models.Student.id == student.id).scalar()
+    assert stored.startswith("$2") and auth.verify_password("x", stored)[0]
+    _login(client, student)
@@ -0,0 +1,115 @@
+from datetime import date, datetime
+
+import pytest
+
+import billing, config, models
+from conftest import add_student
+
+MONTH = "2024-05"
+
+
+def _payment(db, student_id):
+    bill = db.get(models.MonthlyBill, (student_id, MONTH))
+    return db.get(models.RentPayment, bill.rent_payment_id) if bill else None
+
+
+def _set_status(db, student_id, status):
+    _payment(db, student_id).status = status
+    db.commit()
+
+
+@pytest.fixture
+def students(db):
+    a = add_student(db, "A", room_number="101")
+    b = add_student(db, "B", room_number="101")
+    db.add(models.ElectricityMonthlyRollup(room_number="101", month=MONTH, units_kwh=100.0, readings=1))
+    db.commit()
+    return a, b
+
+
+def test_first_run_bills_everyone_and_rerun_is_a_no_op(db, students):
+    counts = billing.run(db, MONTH)
+    assert (counts["students"], counts["created"]) == (2, 2)
+    expected = config.MONTHLY_RENT + 50 * config.ENERGY_RATE_PER_UNIT
+    assert _payment(db, students[0].id).amount == pytest.approx(expected)
+
+    counts = billing.run(db, MONTH)
+    assert (counts["created"], counts["updated"], counts["unchanged"]) == (0, 0, 2)
+    assert billing.summary(db, MONTH)["bills"] == 2
+
+
+def test_changed_inputs_rewrite_unpaid_bills_only(db, students):
+    a, b = students
+    billing.run(db, MONTH)
+    _set_status(db, b.id, "paid")
+    for student in (a, b):
+        db.add(models.DisciplineLog(student_id=student.id, incident_date=datetime(2024, 5, 10),
+                                    category="Noise", description="", penalty_amount=200.0))
+    db.commit()
+
+    counts = billing.run(db, MONTH)
+    assert (counts["updated"], counts["paid_locked"]) == (1, 1)
+    assert _payment(db, a.id).amount == pytest.approx(config.MONTHLY_RENT + 500 + 200)
+    assert _payment(db, b.id).amount == pytest.approx(config.MONTHLY_RENT + 500)
+
+
+def test_late_bills_keep_their_amount(db, students):
+    a, _ = students
+    billing.run(db, MONTH)
+    _set_status(db, a.id, "late")
+    db.query(models.ElectricityMonthlyRollup).update({"units_kwh": 300.0})
+    db.commit()
+
+    counts = billing.run(db, MONTH)
+    assert (counts["updated"], counts["late_locked"]) == (1, 1)
+    assert _payment(db, a.id).amount == pytest.approx(config.MONTHLY_RENT + 500)
+
+
+def test_students_no_longer_billable_lose_their_unpaid_bill(db, students):
+    a, b = students
+    billing.run(db, MONTH)
+    db.get(models.Student, a.id).move_out_date = date(2024, 4, 20)
+    db.commit()
+
+    counts = billing.run(db, MONTH)
+    assert (counts["students"], counts["removed"]) == (1, 1)
+    assert _payment(db, a.id) is None
+    assert db.query(models.RentPayment).filter_by(student_id=a.id).count() == 0
+    assert billing.summary(db, MONTH)["bills"] == 1
+    # b now has the room's electricity to themselves
+    assert counts["updated"] == 1
+
+
+def test_paid_bills_of_departed_students_are_kept(db, students):
+    a, _ = students
+    billing.run(db, MONTH)
+    _set_status(db, a.id, "paid")
+    db.get(models.Student, a.id).move_out_date = date(2024, 4, 20)
+    db.commit()
+
+    counts = billing.run(db, MONTH)
+    assert (counts["removed"], counts["paid_locked"]) == (0, 1)
+    assert _payment(db, a.id).status == "paid"
+
+
+def test_moving_out_later_does_not_change_a_past_month(db, students):
+    a, b = students
+    billing.run(db, MONTH)
+    student = db.get(models.Student, a.id)
+    student.move_out_date, student.is_active = date(2024, 6, 30), False
+    db.commit()
+
+    counts = billing.run(db, MONTH)
+    assert (counts["students"], counts["unchanged"], counts["removed"]) == (2, 2, 0)
+    assert _payment(db, a.id).amount == _payment(db, b.id).amount
+
+
+def test_bill_whose_payment_was_deleted_is_billed_again(db, students):
+    billing.run(db, MONTH)
+    db.query(models.RentPayment).delete()
+    db.commit()
+
+    counts = billing.run(db, MONTH)
+    assert (counts["created"], counts["late_locked"], counts["paid_locked"]) == (2, 0, 0)
+    assert db.query(models.RentPayment).filter_by(month=MONTH, status="unpaid").count() == 2
+    assert all(_payment(db, s.id) is not None for s in students)
@@ -0,0 +1,46 @@
+import cache, models
+
+
+def _rooms(client, etag=None):
+    return client.get("/rooms/", headers={"If-None-Match": etag} if etag else {})
+
+
+def test_hit_revalidate_and_invalidate_on_commit(client, db):
+    db.add(models.Room(number="101", capacity=2))
+    db.commit()
+
+    first = _rooms(client)
+    assert first.headers["x-cache"] == "MISS"
+    second = _rooms(client)
+    assert second.headers["x-cache"] == "HIT" and second.json() == first.json()
+    etag = first.headers["etag"]
+    assert _rooms(client, etag).status_code == 304
+
+    db.add(models.Room(number="102", capacity=2))
+    db.commit()
+    fresh = _rooms(client, etag)
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert [r["number"] for r in fresh.json()["items"]] == ["101", "102"]
+
+
+def test_rolled_back_write_keeps_the_etag(client, db):
+    etag = _rooms(client).headers["etag"]
+    db.add(models.Room(number="103", capacity=1))
+    db.flush()
+    db.rollback()
+    assert _rooms(client, etag).status_code == 304
+
+
+def test_bump_reaches_other_processes(tmp_path):
+    path = str(tmp_path / "versions")
+    ours, theirs = cache.FileVersions(path), cache.FileVersions(path)
+    before = ours.get(["rooms", "complaints"])
+    theirs.bump(["rooms"])
+    after = ours.get(["rooms", "complaints"])
+    assert after[0] == before[0] + 1 and after[1] == before[1]
+    assert ours.epoch == theirs.epoch
+
+
+def test_query_order_shares_a_cache_entry():
+    assert cache.cache_key("/rooms/", b"limit=10&cursor=x") == cache.cache_key("/rooms/", b"cursor=x&limit=10")
+    assert cache.etag_matches(b'W/"abc", "def"', '"abc"')
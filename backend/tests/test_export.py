@@ -0,0 +1,17 @@
+import json
+from datetime import datetime
+
+import models
+from conftest import add_student
+
+
+def test_datetimes_round_trip_with_microseconds(client, db):
+    student = add_student(db)
+    stamps = [datetime(2024, 5, 1, 8, 30, 15, 123456), datetime(2024, 5, 1, 9, 0)]
+    db.add_all(models.GateEntry(student_id=student.id, timestamp=s, event_type="IN") for s in stamps)
+    db.commit()
+
+    response = client.get("/export/gate_entries", params={"format": "ndjson"})
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [datetime.fromisoformat(r["timestamp"]) for r in rows] == stamps
+    assert rows[0]["timestamp"] == "2024-05-01T08:30:15.123456"
@@ -0,0 +1,28 @@
+from sqlalchemy import update
+
+import models
+from conftest import add_student
+from face_index import FaceIndex, encode_embedding, extract_embedding
+
+
+def _enroll(db, index, student, image):
+    vec = extract_embedding(image)
+    db.execute(update(models.Student).where(models.Student.id == student.id).values(face_encoding=encode_embedding(vec)))
+    db.commit()
+    index.enrolled(student.id, vec)
+    return vec
+
+
+def test_enroll_in_one_worker_is_seen_by_the_others(db, read_db):
+    ours, theirs = FaceIndex(), FaceIndex()   # two worker processes
+    ours.ensure_loaded(read_db)
+    theirs.ensure_loaded(read_db)
+
+    student = add_student(db)
+    vec = _enroll(db, ours, student, b"photo")
+    assert ours.version == theirs.version + 1   # our upsert already covers it, no reload
+
+    read_db.rollback()
+    theirs.ensure_loaded(read_db)
+    assert theirs.search(vec)[0][0] == student.id
+    assert theirs.version == ours.version
@@ -0,0 +1,82 @@
+import os
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import func
+
+import models
+from ingest import ReadingWriter, reading_writer
+
+
+def _rows(n, room="101", day=date(2024, 5, 1)):
+    return [{"room_number": room, "reading_date": day, "reading_time": datetime(2024, 5, 1, 10, i),
+             "units_kwh": 1.5} for i in range(n)]
+
+
+@pytest.fixture
+def writer(tmp_path):
+    return ReadingWriter(10, 100, 1000, spill_dir=str(tmp_path), retry_attempts=3, retry_backoff_ms=1)
+
+
+def _stored(read_db):
+    return read_db.query(func.count(models.ElectricityReading.id)).scalar()
+
+
+def test_flush_is_idempotent_and_updates_rollups(writer, read_db):
+    writer._flush(_rows(3) + _rows(1))  # last write wins inside the batch
+    writer._flush(_rows(3))             # meter retry
+    assert (writer.inserted, writer.duplicates) == (3, 3)
+    assert _stored(read_db) == 3
+    daily = read_db.query(models.ElectricityDailyRollup.units_kwh).filter_by(room_number="101").scalar()
+    assert daily == pytest.approx(4.5)
+
+
+def test_transient_failures_are_retried(writer, read_db, monkeypatch):
+    real_write, calls = writer._write, []
+
+    def flaky(rows):
+        calls.append(len(rows))
+        if len(calls) < 3:
+            raise RuntimeError("database is locked")
+        return real_write(rows)
+
+    monkeypatch.setattr(writer, "_write", flaky)
+    writer._flush(_rows(2))
+    assert writer.retries == 2 and writer.failed == 0
+    assert _stored(read_db) == 2
+
+
+def test_batch_that_keeps_failing_is_spilled_and_replayed(writer, read_db, monkeypatch, tmp_path):
+    real_write = writer._write
+    monkeypatch.setattr(writer, "_write", lambda rows: (_ for _ in ()).throw(RuntimeError("database is locked")))
+    writer._flush(_rows(4))
+    assert writer.spilled == 4 and _stored(read_db) == 0
+    assert len(os.listdir(tmp_path)) == 1
+
+    writer._replay()  # still failing: the file stays
+    assert len(os.listdir(tmp_path)) == 1
+
+    monkeypatch.setattr(writer, "_write", real_write)
+    writer._replay()
+    read_db.rollback()
+    assert writer.replayed == 4 and _stored(read_db) == 4
+    assert os.listdir(tmp_path) == []
+
+
+def test_same_instant_in_different_offsets_is_one_reading(client, read_db):
+    body = [
+        {"room_number": "101", "timestamp": "2024-05-01T04:30:00Z", "units_kwh": 1.0},
+        {"room_number": "101", "timestamp": "2024-05-01T10:00:00+05:30", "units_kwh": 1.0},
+    ]
+    assert client.post("/monitoring/readings", json=body).json()["accepted"] == 2
+    reading_writer.stop()
+    assert _stored(read_db) == 1
+
+
+def test_ndjson_and_malformed_bodies(client):
+    lines = b'{"room_number": "101", "timestamp": "2024-05-02T08:00:00", "units_kwh": 1.5}\n{"room_number": "101"}\n'
+    response = client.post("/monitoring/readings", content=lines, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 202
+    assert (response.json()["accepted"], response.json()["rejected"]) == (1, 1)
+    assert client.post("/monitoring/readings", content=b"{oops", headers={"Content-Type": "application/json"}).status_code == 400
+    reading_writer.stop()
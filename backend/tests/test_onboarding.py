@@ -0,0 +1,77 @@
+import io
+
+import models, onboarding
+from conftest import add_student
+
+HEADER = "name,phone,room_number,move_in_date\n"
+
+
+def _rooms(db, **capacities):
+    db.add_all([models.Room(number=number, capacity=capacity, current_occupancy=0)
+                for number, capacity in capacities.items()])
+    db.commit()
+
+
+def _import(text, kind="students", batch_rows=2):
+    importer = onboarding.Importer(onboarding.SPECS[kind], batch_rows=batch_rows)
+    importer.run(onboarding.read_records(io.BytesIO(text.encode()), "csv"))
+    return importer
+
+
+def test_valid_rows_load_and_bad_rows_report_their_line(db):
+    _rooms(db, r101=3)
+    importer = _import(HEADER +
+                       "A,9100000001,r101,2024-07-01\n"
+                       "B,9100000002,r101,not-a-date\n"
+                       "C,9100000001,r101,2024-07-01\n"   # same phone as line 2
+                       "D,9100000004,r101,2024-07-01\n")
+    assert (importer.rows, importer.inserted, importer.failed) == (4, 2, 2)
+    assert [e["line"] for e in importer.errors] == [3, 4]
+    assert db.query(models.Room.current_occupancy).filter_by(number="r101").scalar() == 2
+    # Imported passwords default to the phone, stored as bcrypt
+    stored = db.query(models.Student.password).filter_by(phone="9100000001").scalar()
+    assert stored.startswith("$2")
+
+
+def test_existing_phone_is_rejected(db):
+    _rooms(db, r101=3)
+    student = add_student(db, room_number="r101")
+    importer = _import(HEADER + f"A,{student.phone},r101,2024-07-01\n")
+    assert importer.inserted == 0 and "already exists" in importer.errors[0]["error"]
+
+
+def test_unknown_and_full_rooms_are_rejected(db):
+    _rooms(db, r101=1, r102=2)
+    add_student(db, room_number="r102")
+    importer = _import(HEADER +
+                       "A,9100000001,999,2024-07-01\n"
+                       "B,9100000002,r101,2024-07-01\n"
+                       "C,9100000003,r101,2024-07-01\n"   # r101 now full
+                       "D,9100000004,r102,2024-07-01\n"
+                       "E,9100000005,r102,2024-07-01\n")  # r102 now full
+    assert importer.inserted == 2
+    assert [(e["line"], e["error"]) for e in importer.errors] == [
+        (2, "room '999' does not exist"), (4, "room 'r101' is full"), (6, "room 'r102' is full"),
+    ]
+    assert db.query(models.Student).filter_by(room_number="999").count() == 0
+
+
+def test_inactive_students_do_not_take_a_bed(db):
+    _rooms(db, r101=1)
+    importer = _import("name,phone,room_number,move_in_date,is_active\n"
+                       "A,9100000001,r101,2024-07-01,false\n"
+                       "B,9100000002,r101,2024-07-01,true\n")
+    assert importer.inserted == 2
+
+
+def test_room_import(db):
+    importer = _import("number,capacity\nr201,2\nr201,3\nr202,x\n", kind="rooms")
+    assert (importer.inserted, importer.failed) == (1, 2)
+
+
+def test_bulk_endpoints_require_the_admin(client, admin_headers):
+    files = {"file": ("s.csv", HEADER.encode(), "text/csv")}
+    for path in ("/students/import", "/students/rooms/import", "/rent/reconcile"):
+        assert client.post(path, files=files).status_code == 401
+    assert client.post("/rent/billing/2024-05/run").status_code == 401
+    assert client.post("/students/import", files=files, headers=admin_headers).status_code == 200
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import models
+from pagination import paginate, encode_cursor, decode_cursor, RawKey
+from conftest import add_student
+
+
+def _walk(db, limit):
+    query = db.query(models.MarketplaceItem.id, models.MarketplaceItem.created_at)
+    seen, cursor = [], None
+    for _ in range(20):
+        rows, cursor = paginate(query, models.MarketplaceItem.created_at, models.MarketplaceItem.id,
+                                cursor, limit, descending=True)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            return seen
+    raise AssertionError(f"cursor never ended, served {seen}")
+
+
+def test_rows_sharing_a_timestamp_are_served_once(db):
+    seller = add_student(db)
+    # func.now() default: all five stored as the same 'YYYY-MM-DD HH:MM:SS'
+    db.add_all([models.MarketplaceItem(seller_id=seller.id, title=f"item {i}", description="", price=1,
+                                       condition="Good") for i in range(5)])
+    db.commit()
+    stored = db.execute(models.MarketplaceItem.__table__.select()).all()
+    assert len({row.created_at for row in stored}) <= 2
+
+    ids = _walk(db, limit=2)
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == len(set(ids)) == 5
+
+
+def test_mixed_precision_timestamps_page_in_order(db):
+    seller = add_student(db)
+    second = datetime(2024, 5, 1, 10, 0, 0)
+    for created in (second, second.replace(microsecond=500), second, second.replace(second=1)):
+        db.add(models.MarketplaceItem(seller_id=seller.id, title="x", description="", price=1,
+                                      condition="Good", created_at=created))
+    db.commit()
+    ids = _walk(db, limit=1)
+    assert len(ids) == len(set(ids)) == 4
+
+
+def test_id_cursor_round_trip():
+    assert decode_cursor(encode_cursor(41, 41)) == (41, 41)
+    value, row_id = decode_cursor(encode_cursor(RawKey("2024-05-01 10:00:00"), 7))
+    assert isinstance(value, RawKey) and value == "2024-05-01 10:00:00" and row_id == 7
@@ -0,0 +1,33 @@
+import database
+from conftest import add_student
+from presence import PresenceTracker
+
+
+def _scan(tracker, student_id):
+    db = database.SessionLocal()
+    try:
+        return tracker.toggle(db, student_id).event_type
+    finally:
+        db.close()
+
+
+def test_summary_counts_students_without_gate_history(db, read_db):
+    a, b, _ = add_student(db), add_student(db), add_student(db)
+    add_student(db, is_active=False)
+    tracker = PresenceTracker(4)
+    assert tracker.summary(read_db) == {"in": 3, "out": 0}
+
+    _scan(tracker, a.id)
+    read_db.rollback()
+    assert tracker.summary(read_db) == {"in": 2, "out": 1}
+
+
+def test_state_is_shared_across_workers(db, read_db):
+    student = add_student(db)
+    first, second = PresenceTracker(4), PresenceTracker(4)  # two worker processes
+    assert _scan(first, student.id) == "OUT"
+    assert second.state_of(read_db, student.id) == "OUT"
+    assert _scan(second, student.id) == "IN"
+    read_db.rollback()
+    assert first.state_of(read_db, student.id) == "IN"
+    assert _scan(first, student.id) == "OUT"
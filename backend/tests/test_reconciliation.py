@@ -0,0 +1,134 @@
+import io
+from datetime import date
+
+import pytest
+from sqlalchemy import update
+
+import database, migrations, models, reconciliation
+from conftest import add_student
+
+
+def _payment(db, student, amount=5000.0, month="2024-05", status="unpaid"):
+    payment = models.RentPayment(student_id=student.id, amount=amount, month=month, status=status)
+    db.add(payment)
+    db.commit()
+    return payment
+
+
+def _statement(*lines):
+    text = "date,amount,reference,phone\n" + "".join(f"{','.join(map(str, l))}\n" for l in lines)
+    return io.BytesIO(text.encode())
+
+
+def _status(db, payment_id):
+    db.rollback()
+    return db.query(models.RentPayment.status).filter_by(id=payment_id).scalar()
+
+
+def test_lines_match_by_reference_phone_and_amount(db):
+    a, b, c = add_student(db, "A"), add_student(db, "B"), add_student(db, "C")
+    by_ref, by_phone, by_amount = _payment(db, a), _payment(db, b, 5100.0), _payment(db, c, 5200.0)
+
+    counts = reconciliation.reconcile_file(_statement(
+        ("2024-05-03", 5000, f"RP-{by_ref.id}", ""),
+        ("2024-05-04", 5100, "UPI", b.phone),
+        ("2024-06-02", 5200, "NEFT", ""),   # early next month still counts
+        ("2024-05-05", 999, "UNKNOWN", ""),
+        ("2024-05-05", -50, "FEE", ""),
+    ), "csv", "may.csv")
+
+    assert (counts["matched"], counts["queued"], counts["ignored"]) == (3, 1, 1)
+    assert {_status(db, p.id) for p in (by_ref, by_phone, by_amount)} == {"paid"}
+    assert db.query(models.PaymentReview).one().reason == "no matching open payment"
+
+
+def test_debit_lines_with_a_blank_credit_are_ignored(db):
+    payment = _payment(db, add_student(db))
+    text = ("Txn Date,Narration,Withdrawal Amount,Deposit Amount\n"
+            "03-05-2024,ATM CASH,2000.00,\n"
+            "04-05-2024,NEFT OUT,\"1,250.00\",\n"
+            f"05-05-2024,RP-{payment.id} RENT,,5000.00\n"
+            "06-05-2024,UNREADABLE,,\n")
+    counts = reconciliation.reconcile_file(io.BytesIO(text.encode()), "csv", "bank.csv")
+    assert (counts["matched"], counts["ignored"], counts["queued"]) == (1, 2, 1)
+    assert db.query(models.PaymentReview).one().reason == "missing or invalid amount"
+
+
+def test_payment_settled_after_the_snapshot_goes_to_review(db, monkeypatch):
+    student = add_student(db)
+    payment = _payment(db, student)
+    real_index = reconciliation.OpenPayments
+
+    def snapshot_then_settle(read_db):
+        index = real_index(read_db)
+        # e.g. a manual payment or a concurrent upload lands after the index was built
+        with database.engine.begin() as conn:
+            conn.execute(update(models.RentPayment.__table__).values(status="paid"))
+        return index
+
+    monkeypatch.setattr(reconciliation, "OpenPayments", snapshot_then_settle)
+    counts = reconciliation.reconcile_file(_statement(("2024-05-03", 5000, f"RP-{payment.id}", "")), "csv", "s.csv")
+    assert (counts["matched"], counts["queued"], counts["amount_matched"]) == (0, 1, 0)
+    assert db.query(models.PaymentReview).one().reason == "payment was settled by another update"
+
+
+def test_two_uploads_of_the_same_statement_credit_once(db):
+    payment = _payment(db, add_student(db))
+    first = reconciliation.reconcile_file(_statement(("2024-05-03", 5000, f"RP-{payment.id}", "")), "csv", "a.csv")
+    second = reconciliation.reconcile_file(_statement(("2024-05-03", 5000, f"RP-{payment.id}", "")), "csv", "b.csv")
+    assert (first["matched"], second["matched"], second["queued"]) == (1, 0, 1)
+
+
+def _review(db, amount=5000.0):
+    review = models.PaymentReview(statement="s", line=2, amount=amount, txn_date=date(2024, 5, 3),
+                                  reason="no matching open payment", status="open")
+    db.add(review)
+    db.commit()
+    return review
+
+
+def test_review_applies_only_to_open_payments_with_the_same_amount(db):
+    student = add_student(db)
+    paid = _payment(db, student, status="paid")
+    other_amount = _payment(db, student, amount=4000.0)
+    open_payment = _payment(db, student)
+
+    with pytest.raises(ValueError):
+        reconciliation.apply_review(db, _review(db), paid.id)
+    db.rollback()
+    with pytest.raises(ValueError):
+        reconciliation.apply_review(db, _review(db), other_amount.id)
+    db.rollback()
+
+    review = reconciliation.apply_review(db, _review(db), open_payment.id)
+    assert review.status == "applied" and _status(db, open_payment.id) == "paid"
+
+
+def test_review_endpoint_rejects_paid_payment(client, db, admin_headers):
+    paid = _payment(db, add_student(db), status="paid")
+    review = _review(db)
+    response = client.put(f"/rent/review/{review.id}", json={"rent_payment_id": paid.id}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_review_endpoint_needs_admin(client, db):
+    payment = _payment(db, add_student(db))
+    review = _review(db)
+    assert client.put(f"/rent/review/{review.id}", json={"rent_payment_id": payment.id}).status_code == 401
+    assert _status(db, payment.id) != "paid"
+
+
+def test_unknown_status_is_rejected(client, db, admin_headers):
+    student = add_student(db)
+    body = {"student_id": student.id, "amount": 10, "month": "2024-05", "status": "pending"}
+    assert client.post("/rent/", json=body, headers=admin_headers).status_code == 422
+
+
+def test_status_migration_keeps_previously_pending_rows_pending(db):
+    student = add_student(db)
+    for status in ("Unpaid", "pending", None, "PAID", "late"):
+        _payment(db, student, status=status)
+    with database.engine.begin() as conn:
+        migrations.rent_payment_statuses(conn)
+    statuses = sorted(s for (s,) in db.query(models.RentPayment.status))
+    assert statuses == ["late", "paid", "unpaid", "unpaid", "unpaid"]
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+
+import config
+import models
+import retention
+from conftest import add_student
+
+
+def _gate_entries(db, student, stamps):
+    db.add_all(models.GateEntry(student_id=student.id, timestamp=s, event_type="OUT") for s in stamps)
+    db.commit()
+
+
+def test_archive_moves_old_gate_entries_and_reads_them_back(db, read_db, tmp_path, monkeypatch, client, admin_headers):
+    monkeypatch.setattr(config, "ARCHIVE_DIR", str(tmp_path))
+    student = add_student(db)
+    _gate_entries(db, student, [datetime(2023, 1, d, 8) for d in range(1, 6)] + [datetime(2024, 6, 1, 8)])
+
+    result = retention.archive("gate_entries", datetime(2024, 1, 1), batch_rows=2)
+    assert result["archived"] == 5
+    assert read_db.query(models.GateEntry).count() == 1
+
+    rows = list(retention.read_archive("gate_entries", date(2023, 1, 2), date(2023, 1, 4), {"student_id": student.id}))
+    assert [r["timestamp"][:10] for r in rows] == ["2023-01-02", "2023-01-03", "2023-01-04"]
+
+    response = client.get("/archive/gate_entries", params={"room_number": "101"}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+def test_tables_behind_reports_are_not_archived(db, read_db, client, admin_headers):
+    student = add_student(db)
+    db.add(models.AttendanceLog(student_id=student.id, date=date(2020, 1, 1), status="Present"))
+    db.commit()
+
+    for table in ("attendance_logs", "electricity_readings"):
+        response = client.post(f"/archive/{table}/run", params={"days": 1}, headers=admin_headers)
+        assert response.status_code == 400, table
+    assert read_db.query(models.AttendanceLog).count() == 1
+
+
+def test_unknown_filter_column_is_rejected():
+    try:
+        retention.read_archive("gate_entries", filters={"room_number": "101"})
+    except ValueError as e:
+        assert "room_number" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
@@ -0,0 +1,24 @@
+import pytest
+
+from system_settings import SettingsCache
+
+
+def test_own_write_is_visible_immediately(db):
+    cache = SettingsCache(refresh_seconds=3600)
+    cache.all()
+    cache.update(db, {"GEOFENCE_RADIUS_METERS": "250"})
+    assert cache.get("GEOFENCE_RADIUS_METERS") == 250.0
+
+
+def test_write_after_another_workers_write_reloads(db):
+    ours, theirs = SettingsCache(refresh_seconds=3600), SettingsCache(refresh_seconds=3600)
+    ours.all()
+    theirs.update(db, {"HOSTEL_LAT": "12.5"})   # ours hasn't revalidated yet
+    ours.update(db, {"HOSTEL_LNG": "80.25"})
+    assert ours.get("HOSTEL_LNG") == 80.25
+    assert ours.get("HOSTEL_LAT") == pytest.approx(12.5)
+
+
+def test_invalid_value_is_rejected(db):
+    with pytest.raises(ValueError):
+        SettingsCache(refresh_seconds=3600).update(db, {"HOSTEL_LAT": "north"})
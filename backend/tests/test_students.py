@@ -0,0 +1,20 @@
+import models
+from conftest import add_student
+
+
+def test_update_to_taken_phone_is_rejected_and_rolled_back(client, db, read_db):
+    db.add_all([models.Room(number="101", capacity=2, current_occupancy=2),
+                models.Room(number="102", capacity=2, current_occupancy=0)])
+    db.commit()
+    first, second = add_student(db), add_student(db)
+
+    response = client.put(f"/students/{second.id}", json={"phone": first.phone, "room_number": "102"})
+    assert response.status_code == 400
+
+    occupancy = dict(read_db.query(models.Room.number, models.Room.current_occupancy))
+    assert occupancy == {"101": 2, "102": 0}
+    assert read_db.get(models.Student, second.id).room_number == "101"
+
+    # The session is usable again afterwards
+    response = client.put(f"/students/{second.id}", json={"room_number": "102"})
+    assert response.status_code == 200
@@ -0,0 +1,137 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class BoundedPool:
+    """Thread pool for blocking work called from async endpoints.
+
+    Jobs beyond `workers + queue_depth` are rejected instead of queueing forever,
+    so one slow subsystem can't starve the default threadpool the rest of the API uses.
+    """
+
+    def __init__(self, name: str, workers: int, queue_depth: int):
+        self.name = name
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._executor = None
+        self._in_flight = 0  # only touched from the event loop thread
+        self._rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=f"{self.name}-pool"
+            )
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        if self._in_flight >= self.workers + self.queue_depth:
+            self._rejected += 1
+            raise PoolSaturated(f"{self.name} pool is full")
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+        finally:
+            self._in_flight -= 1
+
+    def map(self, fn, items):
+        """Blocking fan-out for callers already on a worker thread (not the event loop).
+
+        Doesn't count against the queue limit; keep batches modest so jobs from
+        `run` aren't stuck behind a long one.
+        """
+        return list(self._get_executor().map(fn, items))
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.workers),
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batches.
+
+    `submit(item)` waits until either `max_batch` items are queued or `window_ms`
+    has passed since the first one, then `handler(items)` runs once on a worker
+    thread and must return one result per item, in order.
+    """
+
+    def __init__(self, handler, max_batch: int, window_ms: int):
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.window = max(0, window_ms) / 1000
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, item):
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+        try:
+            results = await loop.run_in_executor(None, self.handler, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": int(self.window * 1000),
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "items": self.items,
+        }
@@ -132,6 +132,20 @@ const Hostel3D = ({ students = [] }) => {
             }
         };
         fetchRooms();
+
+        // Live updates: the server pushes room deltas instead of us polling /rooms
+        const stream = roomsService.subscribe({
+            onRoom: (room) => {
+                setRooms(prev => {
+                    const exists = prev.some(r => r.id === room.id);
+                    return exists ? prev.map(r => (r.id === room.id ? { ...r, ...room } : r)) : [...prev, room];
+                });
+                setSelectedRoom(prev => (prev && prev.id === room.id ? { ...prev, ...room } : prev));
+            },
+            // We fell behind and missed events; take a fresh snapshot
+            onResync: fetchRooms,
+        });
+        return () => stream.close();
     }, []);
 
     const roomStudents = selectedRoom && students
@@ -15,15 +15,27 @@ export const AuthProvider = ({ children }) => {
         setLoading(false);
     }, []);
 
-    const login = (username, password) => {
-        // Hardcoded check for admin/admin
-        if (username === 'admin' && password === 'admin') {
-            const userData = { username, role: 'admin' };
-            setUser(userData);
-            localStorage.setItem('user', JSON.stringify(userData));
-            return { success: true };
+    const login = async (username, password) => {
+        try {
+            const API_URL = import.meta.env.VITE_API_URL || 'http://127.0.0.1:8000';
+            const response = await fetch(`${API_URL}/students/admin/login`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ username, password })
+            });
+
+            if (response.ok) {
+                const { access_token } = await response.json();
+                const userData = { username, role: 'admin', access_token };
+                setUser(userData);
+                localStorage.setItem('user', JSON.stringify(userData));
+                return { success: true };
+            }
+            return { success: false, message: 'Invalid admin credentials' };
+        } catch (error) {
+            console.error(error);
+            return { success: false, message: 'Login failed' };
         }
-        return { success: false, message: 'Invalid admin credentials' };
     };
 
     const studentLogin = async (phone, password) => {
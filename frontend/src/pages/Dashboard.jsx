@@ -2,9 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Users, CreditCard, AlertCircle, MessageSquare, Zap, DollarSign, AlertTriangle, Box } from 'lucide-react';
 import { cn } from '../lib/utils';
 import studentsService from '../services/studentsService';
-import rentService from '../services/rentService';
-import complaintService from '../services/complaintService';
-import monitoringService from '../services/monitoringService';
+import dashboardService from '../services/dashboardService';
 import attendanceService from '../services/attendanceService';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
@@ -48,37 +46,20 @@ const Dashboard = () => {
 
     useEffect(() => {
         const fetchStats = async () => {
-            // ... existing fetch logic
+            // One aggregated call; the server counts, we just display
             try {
-                const students = await studentsService.getAll();
-                setStudentsList(students); // Store for 3D view
-                const payments = await rentService.getPending();
-                const complaints = await complaintService.getAll();
-
-                const pendingRentPayments = payments.filter(p => p.status === 'Pending');
-                const pendingAmount = pendingRentPayments.reduce((sum, p) => sum + p.amount, 0);
-                const activeComplaints = complaints.filter(c => c.status !== 'Resolved');
-
-                let energyData = { projected_bill: 0, total_bill: 0 };
-                try {
-                    if (user?.role === 'admin') {
-                        const res = await monitoringService.getAdminStats();
-                        energyData = res.data;
-                    } else if (user?.id) {
-                        const res = await monitoringService.getStudentStats(user.id);
-                        energyData = res.data;
-                    }
-                } catch (e) { }
+                const summary = await dashboardService.getSummary();
+                const isAdmin = summary.role === 'admin';
 
                 setStats({
-                    totalStudents: students.length,
-                    pendingDues: pendingAmount,
-                    pendingDuesCount: pendingRentPayments.length,
-                    activeIssues: activeComplaints.length,
-                    totalComplaints: complaints.length,
-                    pendingComplaints: activeComplaints.length,
-                    energyBill: user?.role === 'admin' ? energyData.total_bill : energyData.projected_bill,
-                    energyLabel: user?.role === 'admin' ? 'Total Collected' : 'Est. Bill'
+                    totalStudents: summary.students.total,
+                    pendingDues: summary.rent.pending_amount,
+                    pendingDuesCount: summary.rent.pending_count,
+                    activeIssues: summary.complaints.open,
+                    totalComplaints: summary.complaints.total,
+                    pendingComplaints: summary.complaints.open,
+                    energyBill: isAdmin ? summary.energy.total_bill : summary.energy.projected_bill,
+                    energyLabel: isAdmin ? 'Total Collected' : 'Est. Bill'
                 });
             } catch (error) {
                 console.error("Error fetching dashboard stats:", error);
@@ -109,6 +90,15 @@ const Dashboard = () => {
         }
     }, [user]);
 
+    // The 3D twin needs the student list; only fetch it when the view is opened
+    useEffect(() => {
+        if (show3D && studentsList.length === 0) {
+            studentsService.getAll()
+                .then(setStudentsList)
+                .catch((error) => console.error("Error fetching students for 3D view:", error));
+        }
+    }, [show3D]);
+
     if (loading) {
         return <div className="p-8 text-center text-muted-foreground">Loading dashboard data...</div>;
     }
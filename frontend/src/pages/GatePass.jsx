@@ -156,7 +156,7 @@ const LogsView = () => {
     const fetchLogs = async () => {
         try {
             const response = await api.get('/gate/logs');
-            setLogs(response.data);
+            setLogs(response.data.items);
         } catch (error) {
             console.error(error);
         }
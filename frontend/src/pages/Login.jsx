@@ -24,7 +24,7 @@ const Login = () => {
 
         let result;
         if (role === 'admin') {
-            result = login(username, password);
+            result = await login(username, password);
         } else {
             result = await studentLogin(phone, studentPassword);
         }
@@ -26,7 +26,7 @@ const Mailroom = () => {
     const fetchPendingParcels = async () => {
         try {
             const res = await parcelService.getPending();
-            setParcels(res.data);
+            setParcels(res.data.items);
         } catch (e) { console.error(e); }
         setLoading(false);
     };
@@ -21,15 +21,21 @@ const Marketplace = () => {
     });
 
     useEffect(() => {
-        if (activeTab === 'buy') fetchAvailableItems();
         if (activeTab === 'my-items') fetchMyItems();
     }, [activeTab]);
 
-    const fetchAvailableItems = async () => {
+    // Search runs on the server (full-text index); wait for a pause in typing
+    useEffect(() => {
+        if (activeTab !== 'buy') return;
+        const timer = setTimeout(() => fetchAvailableItems(searchTerm), 300);
+        return () => clearTimeout(timer);
+    }, [activeTab, searchTerm]);
+
+    const fetchAvailableItems = async (q) => {
         setLoading(true);
         try {
-            const res = await marketplaceService.getAvailableItems();
-            setItems(res.data);
+            const res = await marketplaceService.getAvailableItems(q ? { q } : {});
+            setItems(res.data.items);
         } catch (error) {
             console.error(error);
         } finally {
@@ -80,10 +86,7 @@ const Marketplace = () => {
         }
     };
 
-    const filteredItems = (items || []).filter(item =>
-        item.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        item.description.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+    const filteredItems = items || [];
 
     return (
         <div className="space-y-6 animate-in fade-in slide-in-from-bottom-4 duration-500">
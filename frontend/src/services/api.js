@@ -7,4 +7,14 @@ const api = axios.create({
     },
 });
 
+// Attach the access token from the stored login, if any
+api.interceptors.request.use((config) => {
+    const userStr = localStorage.getItem('user');
+    const token = userStr ? JSON.parse(userStr).access_token : null;
+    if (token) {
+        config.headers.Authorization = `Bearer ${token}`;
+    }
+    return config;
+});
+
 export default api;
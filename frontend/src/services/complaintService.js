@@ -3,7 +3,7 @@ import api from './api';
 const complaintService = {
     getAll: async () => {
         const response = await api.get('/complaints/');
-        return response.data;
+        return response.data.items;
     },
     create: async (data) => {
         const response = await api.post('/complaints/', data);
@@ -0,0 +1,11 @@
+import api from './api';
+
+const dashboardService = {
+    // Counts and totals for the overview page; shape depends on the logged-in role
+    getSummary: async () => {
+        const response = await api.get('/dashboard/summary');
+        return response.data;
+    },
+};
+
+export default dashboardService;
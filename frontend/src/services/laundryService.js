@@ -4,7 +4,7 @@ const laundryService = {
     getAll: async (date) => {
         const url = date ? `/laundry/?date=${date}` : '/laundry/';
         const response = await api.get(url);
-        return response.data;
+        return response.data.items;
     },
     logUsage: async (data) => {
         const response = await api.post('/laundry/', data);
@@ -8,12 +8,14 @@ const getAuthHeader = () => {
     const userStr = localStorage.getItem('user');
     if (!userStr) return {};
     const user = JSON.parse(userStr);
-    return { 'X-Student-ID': user.id };
+    return user.access_token ? { Authorization: `Bearer ${user.access_token}` } : {};
 };
 
-const getAvailableItems = async () => {
+// params: q, min_price, max_price, condition, cursor, limit
+const getAvailableItems = async (params = {}) => {
     return await axios.get(`${API_URL}/items`, {
-        headers: getAuthHeader()
+        headers: getAuthHeader(),
+        params
     });
 };
 
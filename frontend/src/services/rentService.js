@@ -3,7 +3,7 @@ import api from './api';
 const rentService = {
     getAll: async () => {
         const response = await api.get('/rent/');
-        return response.data;
+        return response.data.items;
     },
     getPending: async () => {
         const response = await api.get('/rent/pending');
@@ -3,7 +3,7 @@ import api from './api';
 const roomsService = {
     getAll: async () => {
         const response = await api.get('/rooms/');
-        return response.data;
+        return response.data.items;
     },
     getById: async (id) => {
         const response = await api.get(`/rooms/${id}`);
@@ -12,6 +12,13 @@ const roomsService = {
     seed: async () => {
         const response = await api.post('/seed');
         return response.data;
+    },
+    // Server-Sent Events stream of room changes. Returns the EventSource so callers can close it.
+    subscribe: ({ onRoom, onResync }) => {
+        const source = new EventSource(`${api.defaults.baseURL}/events/stream?topics=room`);
+        source.addEventListener('room', (e) => onRoom && onRoom(JSON.parse(e.data)));
+        source.addEventListener('resync', () => onResync && onResync());
+        return source;
     }
 };
 
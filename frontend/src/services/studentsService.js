@@ -3,7 +3,7 @@ import api from './api';
 const studentsService = {
     getAll: async () => {
         const response = await api.get('/students/');
-        return response.data;
+        return response.data.items;
     },
     getById: async (id) => {
         const response = await api.get(`/students/${id}`);
@@ -20,7 +20,7 @@ const studentsService = {
     },
     getAllRooms: async () => {
         const response = await api.get('/students/rooms/');
-        return response.data;
+        return response.data.items;
     }
 };
 